@@ -1,13 +1,42 @@
+import asyncio
 import json
 import os
 import sys
-from typing import Dict, List, Tuple, Set
+import time
+from typing import AsyncIterator, Dict, FrozenSet, Iterator, List, Tuple, Set
 from abc import ABC, abstractmethod
 
-# 强制设置UTF-8编码
-import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+from contextlib import contextmanager
+
+try:
+    from .catalog import TEXT_FIELDS, load_exercises
+    from .constraints import DayConstraints, HardConstraints, InfeasibleConstraintsError
+    from .compiled_catalog import (BILATERAL, COMMON, COMPOUND, EQUIPMENT, FREE,
+                                   ISOLATION, MAJOR, MINOR, SINGLE_SIDED,
+                                   CompiledCatalog)
+    from .plan_stats import PlanStats
+    from .records import ExerciseRecord
+    from .stretching import StretchIndex, worked_muscles
+    from .tracing import NULL_TRACER
+    from .unified_catalog import UnifiedCatalog
+    from .validation import ValidationCache, validator_for
+except ImportError:
+    from catalog import TEXT_FIELDS, load_exercises
+    from constraints import DayConstraints, HardConstraints, InfeasibleConstraintsError
+    from compiled_catalog import (BILATERAL, COMMON, COMPOUND, EQUIPMENT, FREE,
+                                  ISOLATION, MAJOR, MINOR, SINGLE_SIDED,
+                                  CompiledCatalog)
+    from plan_stats import PlanStats
+    from records import ExerciseRecord
+    from stretching import StretchIndex, worked_muscles
+    from tracing import NULL_TRACER
+    from unified_catalog import UnifiedCatalog
+    from validation import ValidationCache, validator_for
+
+# 强制设置UTF-8编码（原地重新配置，多个模块一起导入时不会关闭底层流）
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 # Windows控制台UTF-8设置
 if sys.platform.startswith('win'):
     import locale
@@ -42,43 +71,156 @@ class BaseSelector(ABC):
     EXCLUDED_EXERCISES = {
         35  # 示例：排除 Rotational Throw – Medicine Ball
     }
+
+    # 硬约束（可选），支持的键见 constraints.CONSTRAINT_KEYS，例如：
+    # {"must_include": [9], "max_machine_per_day": 2, "min_unilateral_per_day": 1,
+    #  "banned_families": ["Deadlift"], "unavailable_equipment": ["Barbell"]}
+    HARD_CONSTRAINTS = {}
+
+    # 可用的器械（动作名称 " – " 之后的部分，如 ["Dumbbell", "Band"]），None 表示不限制
+    # - 名称按 compiled_catalog.equipment_key 归并：不区分大小写，Rings/Ring、
+    #   Cable With Rope/Cable 视为同一器械；动作库中没有的名称忽略并给出警告
+    # - 名称中没有器械后缀的动作（如 "Face Pull"、"Leg Extension"）无法判断器械，
+    #   总是视为可用；需要排除这类动作时请使用 EXCLUDED_EXERCISES
+    AVAILABLE_EQUIPMENT = None
+
+    # 每个训练日末尾附加的放松拉伸数量（来自 flexibility.json），0 表示不附加
+    COOL_DOWN_STRETCHES = 0
     # ========== 配置区结束 ==========
 
-    def __init__(self):
-        # 获取 project 根目录
-        # 当前文件在 project/exercises/algorithms/base_selector.py
-        # 所以需要向上三级到达 project/
-        current_file_dir = os.path.dirname(
-            os.path.abspath(__file__))  # algorithms/
-        exercises_dir = os.path.dirname(current_file_dir)  # exercises/
-        project_root = os.path.dirname(exercises_dir)  # project/
+    def __init__(self, data_dir: str = None, lazy_text: bool = False,
+                 compiled_catalog: CompiledCatalog = None,
+                 unified_catalog: UnifiedCatalog = None, validate: bool = True):
+        """
+        Args:
+            data_dir: 数据目录（包含 strength.json、config.json 和 classification/），
+                      默认使用仓库自带的数据
+            lazy_text: 不在内存中保留 steps/notes，展示计划时再按需从文件读取
+            compiled_catalog: 已编译好的数值索引（如工作进程中内存映射的共享索引），
+                              提供时不再加载和编译分类文件
+            unified_catalog: 已加载的统一列式索引（UnifiedCatalog.load），提供时
+                             力量和拉伸动作都从中取出，不再单独读取数据文件，
+                             文字说明总是按需读取
+            validate: 加载 strength.json 时按 schemas/strength.json 校验（与解析
+                      共用一次遍历，结论按内容哈希缓存在 out/validation_cache.json），
+                      未通过时抛出 validation.CatalogValidationError
+        """
+        if data_dir is None:
+            # 获取 project 根目录
+            # 当前文件在 project/exercises/algorithms/base_selector.py
+            # 所以需要向上三级到达 project/
+            current_file_dir = os.path.dirname(
+                os.path.abspath(__file__))  # algorithms/
+            exercises_dir = os.path.dirname(current_file_dir)  # exercises/
+            project_root = os.path.dirname(exercises_dir)  # project/
+            data_dir = os.path.join(project_root, 'exercises')
+
+        self.data_dir = data_dir
+        load_start = time.perf_counter()
 
         # 加载所有需要的文件
-        self.exercises = self._load_json(
-            os.path.join(project_root, 'exercises', 'strength.json'))
+        self.unified_catalog = unified_catalog
+        if unified_catalog is not None:
+            self.exercises = unified_catalog.exercises('strength')
+            self.text_index = unified_catalog.text_index('strength')
+        else:
+            strength_file = os.path.join(self.data_dir, 'strength.json')
+            validator = None
+            if validate:
+                validator = validator_for(strength_file, ValidationCache(
+                    ValidationCache.default_path(self.data_dir)))
+            self.exercises, self.text_index = load_exercises(
+                strength_file, lazy_text, validator=validator)
         self.config = self._load_json(
-            os.path.join(project_root, 'exercises', 'config.json'))
+            os.path.join(self.data_dir, 'config.json'))
 
         # 加载分类文件
-        classification_dir = os.path.join(
-            project_root, 'exercises', 'classification')
+        classification_dir = os.path.join(self.data_dir, 'classification')
 
         # 加载新的映射文件（在classification文件夹中）
-        self.category_mapping = self._load_json(
-            os.path.join(classification_dir, 'categoryMapping.json'))
         self.preference_mapping = self._load_json(
             os.path.join(classification_dir, 'preferenceMapping.json'))
         self.training_templates = self._load_json(
             os.path.join(classification_dir, 'trainingTemplates.json'))
 
-        self.classifications = {
-            'major': self._load_json(os.path.join(classification_dir, 'type1_isMajor.json')),
-            'compound': self._load_json(os.path.join(classification_dir, 'type2_isCompound.json')),
-            'single': self._load_json(os.path.join(classification_dir, 'type3_isSingle.json')),
-            'machine': self._load_json(os.path.join(classification_dir, 'type4_isMachine.json')),
-            'common': self._load_json(os.path.join(classification_dir, 'type5_isCommon.json')),
-            'family': self._load_json(os.path.join(classification_dir, 'type6_movementFamily.json'))
-        }
+        if compiled_catalog is None:
+            self.category_mapping = self._load_json(
+                os.path.join(classification_dir, 'categoryMapping.json'))
+            self.classifications = {
+                'major': self._load_json(os.path.join(classification_dir, 'type1_isMajor.json')),
+                'compound': self._load_json(os.path.join(classification_dir, 'type2_isCompound.json')),
+                'single': self._load_json(os.path.join(classification_dir, 'type3_isSingle.json')),
+                'machine': self._load_json(os.path.join(classification_dir, 'type4_isMachine.json')),
+                'common': self._load_json(os.path.join(classification_dir, 'type5_isCommon.json')),
+                'family': self._load_json(os.path.join(classification_dir, 'type6_movementFamily.json'))
+            }
+            # 评分热点路径使用的数值索引（分类属性位、肌群位掩码、动作族编号）
+            compiled_catalog = CompiledCatalog.compile(
+                self.exercises, self.category_mapping, self.classifications)
+        else:
+            if compiled_catalog.exercise_count != len(self.exercises):
+                raise ValueError(
+                    "compiled catalog does not match strength.json; recompile it")
+            # 分类文件已编译进共享索引，不再单独加载
+            self.category_mapping = compiled_catalog.category_mapping()
+            self.classifications = None
+        self.compiled_catalog = compiled_catalog
+
+        # 评分用的紧凑动作记录（通过 compiled_catalog.pk_rows 按pk查找），
+        # 使用统一索引时直接共享其按列生成的记录
+        if unified_catalog is not None:
+            self.records = unified_catalog.records('strength')
+        else:
+            self.records = [ExerciseRecord.from_dict(row, exercise)
+                            for row, exercise in enumerate(self.exercises)]
+
+        # 数据加载耗时（计入 PlanStats 的 catalog_load 阶段）
+        self.load_time = time.perf_counter() - load_start
+
+        # 当前计划生成的统计对象
+        self._stats = PlanStats()
+
+        # 可选的耗时追踪器（设置为 tracing.Tracer() 即可开启）
+        self.tracer = NULL_TRACER
+
+        # 影响计划结果的所有数据文件（供缓存计算内容哈希）
+        self.source_files = [
+            os.path.join(self.data_dir, 'strength.json'),
+            os.path.join(self.data_dir, 'config.json'),
+        ] + [
+            os.path.join(classification_dir, name) for name in (
+                'categoryMapping.json', 'preferenceMapping.json',
+                'trainingTemplates.json', 'type1_isMajor.json',
+                'type2_isCompound.json', 'type3_isSingle.json',
+                'type4_isMachine.json', 'type5_isCommon.json',
+                'type6_movementFamily.json')
+        ]
+        # 拉伸动作库（开启 COOL_DOWN_STRETCHES 时使用，首次需要时才加载）
+        self.flexibility_file = os.path.join(self.data_dir, 'flexibility.json')
+        if os.path.exists(self.flexibility_file):
+            self.source_files.append(self.flexibility_file)
+        self._stretch_index = None
+
+        # 租户增量（overlay.TenantOverlay.apply 创建的租户选择器才会设置）
+        self.overlay = None
+
+        # 多周计划中前几周已选的动作（用于跨周轮换惩罚）
+        self.previous_week_ids = set()
+
+        # 候选动作及静态分数缓存（只保留当前用户配置下的结果）
+        self._candidate_cache = {}
+        self._candidate_cache_profile = None
+
+    def set_config(self, config: Dict) -> None:
+        """
+        替换评分配置（config.json 的内容），数据和编译索引保持不变
+        只有 scoring_weights 变化时才需要重新计算静态分数（清空候选缓存），
+        position_scores / diversity_rules 在搜索时直接读取
+        """
+        if config.get('scoring_weights') != self.config.get('scoring_weights'):
+            self._candidate_cache = {}
+            self._candidate_cache_profile = None
+        self.config = config
 
     def _load_json(self, filepath: str) -> Dict:
         """加载JSON文件 - 使用UTF-8编码"""
@@ -92,14 +234,38 @@ class BaseSelector(ABC):
         except UnicodeEncodeError:
             print(text.encode('utf-8', errors='replace').decode('utf-8'))
 
-    def generate_weekly_plan(self) -> Dict:
-        """生成一周的训练计划"""
+    def generate_weekly_plan(self, stats: PlanStats = None) -> Dict:
+        """
+        生成一周的训练计划
+
+        Args:
+            stats: 可选的 PlanStats，传入时写入本次生成的分阶段耗时和计数
+        """
+        return {day_name: day_plan
+                for day_name, day_plan, _ in self.iter_weekly_plan(stats)}
+
+    def iter_weekly_plan(self, stats: PlanStats = None) -> Iterator[Tuple[str, Dict, FrozenSet[int]]]:
+        """
+        逐天生成训练计划，每天求解完成后立即产出
+
+        Args:
+            stats: 可选的 PlanStats，传入时写入本次生成的分阶段耗时和计数
+
+        Yields:
+            (训练日名称, 当日计划, 截至当日的全周已选动作ID)
+        """
+        self._stats = stats if stats is not None else PlanStats()
+        self._stats.phase_times['catalog_load'] = self.load_time
+
         training_days = self.TRAINING_DAYS
 
         # 获取训练模板
         template = self.training_templates[str(training_days)]
 
-        weekly_plan = {}
+        # 必选动作必须能放进模板的某一天
+        if self.HARD_CONSTRAINTS:
+            self._get_hard_constraints().check_placement(self, template)
+
         global_selected_ids = set()  # 追踪整周已选动作，避免重复
 
         for day_index, muscle_groups in enumerate(template):
@@ -107,37 +273,97 @@ class BaseSelector(ABC):
 
             # 休息日
             if not muscle_groups:
-                weekly_plan[day_name] = {
-                    "type": "Rest Day",
-                    "exercises": [],
-                    "total_score": 0
-                }
+                yield day_name, self._build_rest_day_plan(), frozenset(global_selected_ids)
                 continue
 
             # 为这一天选择动作 - 调用子类实现的方法
-            exercises_with_scores = self._select_exercises_for_day(
-                muscle_groups,
-                global_selected_ids
-            )
+            self._stats.current_day = day_name
+            day_start = time.perf_counter()
+            with self.tracer.span(day_name, category='day',
+                                  muscle_groups=muscle_groups):
+                try:
+                    exercises_with_scores = self._select_exercises_for_day(
+                        muscle_groups,
+                        global_selected_ids
+                    )
+                except InfeasibleConstraintsError as error:
+                    raise InfeasibleConstraintsError(
+                        f"{day_name} ({', '.join(muscle_groups)}): {error}") from None
+            self._stats.total_time += time.perf_counter() - day_start
 
             # 更新全局已选动作集合
             for ex in exercises_with_scores:
                 global_selected_ids.add(ex['pk'])
 
-            # 计算当日总分
-            total_day_score = sum(ex['score'] for ex in exercises_with_scores)
+            day_plan = self._build_day_plan(
+                muscle_groups, exercises_with_scores)
+            yield day_name, day_plan, frozenset(global_selected_ids)
+
+    async def agenerate_weekly_plan(self, stats: PlanStats = None) -> AsyncIterator[Tuple[str, Dict, FrozenSet[int]]]:
+        """
+        iter_weekly_plan 的异步版本
+        每天的求解在默认线程池中运行，不阻塞事件循环
 
-            # 生成训练类型描述
-            day_type = self._generate_day_type(muscle_groups)
+        Args:
+            stats: 可选的 PlanStats，传入时写入本次生成的分阶段耗时和计数
+        """
+        loop = asyncio.get_running_loop()
+        iterator = self.iter_weekly_plan(stats)
+        finished = object()
+
+        while True:
+            item = await loop.run_in_executor(None, next, iterator, finished)
+            if item is finished:
+                break
+            yield item
+
+    def _build_rest_day_plan(self) -> Dict:
+        """休息日计划"""
+        return {
+            "type": "Rest Day",
+            "exercises": [],
+            "total_score": 0
+        }
 
-            weekly_plan[day_name] = {
-                "type": day_type,
-                "muscle_groups": muscle_groups,
-                "exercises": exercises_with_scores,
-                "total_score": round(total_day_score, 2)
-            }
+    def _build_day_plan(self, muscle_groups: List[str],
+                        exercises_with_scores: List[Dict]) -> Dict:
+        """根据选中的动作构建当日计划"""
+        # 计算当日总分
+        total_day_score = sum(ex['score'] for ex in exercises_with_scores)
+
+        # 生成训练类型描述
+        day_type = self._generate_day_type(muscle_groups)
+
+        day_plan = {
+            "type": day_type,
+            "muscle_groups": muscle_groups,
+            "exercises": exercises_with_scores,
+            "total_score": round(total_day_score, 2)
+        }
+
+        # 放松拉伸：覆盖当天练到的肌群（主肌群权重高于次肌群）
+        if self.COOL_DOWN_STRETCHES > 0:
+            with self._phase('cool_down'):
+                day_plan["cool_down"] = self._get_stretch_index().select(
+                    worked_muscles(exercises_with_scores), self.COOL_DOWN_STRETCHES)
 
-        return weekly_plan
+        return day_plan
+
+    def _get_stretch_index(self) -> StretchIndex:
+        """拉伸动作的肌群倒排索引（首次使用时加载，之后复用）"""
+        if self._stretch_index is None:
+            if self.unified_catalog is not None:
+                stretches = self.unified_catalog.exercises('flexibility')
+            else:
+                stretches, _ = load_exercises(self.flexibility_file, lazy_text=True)
+            self._stretch_index = StretchIndex(stretches)
+        return self._stretch_index
+
+    @contextmanager
+    def _phase(self, name: str, **args):
+        """一个计划生成阶段：同时计入 PlanStats 和追踪器"""
+        with self._stats.phase(name), self.tracer.span(name, category='phase', **args):
+            yield
 
     @abstractmethod
     def _select_exercises_for_day(self, muscle_groups: List[str],
@@ -157,8 +383,52 @@ class BaseSelector(ABC):
 
     def _get_candidate_exercises(self, muscle_groups: List[str],
                                  global_selected_ids: Set[int]) -> Dict[int, Dict]:
-        """获取候选动作并计算静态分数"""
-        # 1. 获取今天要训练的动作ID列表
+        """
+        获取候选动作并计算静态分数
+
+        Returns:
+            {动作ID: {'record': ExerciseRecord, 'static_score': 静态分数}}
+        """
+        # 静态分数只取决于肌群、系数、排除列表和硬约束，同一配置下可复用
+        profile = (tuple(sorted(self.MUSCLE_PREFERENCES.items())),
+                   frozenset(self.EXCLUDED_EXERCISES),
+                   repr(sorted(self.HARD_CONSTRAINTS.items())),
+                   None if self.AVAILABLE_EQUIPMENT is None
+                   else frozenset(self.AVAILABLE_EQUIPMENT))
+        if profile != self._candidate_cache_profile:
+            self._candidate_cache = {}
+            self._candidate_cache_profile = profile
+
+        cache_key = tuple(muscle_groups)
+        if cache_key in self._candidate_cache:
+            return self._candidate_cache[cache_key]
+
+        # 1. 获取今天要训练的动作
+        with self._phase('candidate_building'):
+            exercise_ids = self._get_candidate_ids(muscle_groups)
+            constraints = self._get_hard_constraints()
+            records = []
+            for exercise_id in exercise_ids:
+                record = self._get_record(exercise_id)
+                # 检查是否被排除，以及是否满足禁用族/器械约束和可用器械
+                if record and not self._is_exercise_excluded(record) and \
+                        constraints.allows(self, record):
+                    records.append(record)
+
+        # 2. 计算每个动作的静态分数
+        with self._phase('static_scoring'):
+            candidates = {}
+            for record in records:
+                candidates[record.pk] = {
+                    'record': record,
+                    'static_score': self._calculate_static_score(record)
+                }
+
+        self._candidate_cache[cache_key] = candidates
+        return candidates
+
+    def _get_candidate_ids(self, muscle_groups: List[str]) -> Set[int]:
+        """获取当天肌群对应的动作ID集合（未过滤排除列表）"""
         exercise_ids = set()
         for muscle_group in muscle_groups:
             if muscle_group in self.category_mapping:
@@ -166,21 +436,9 @@ class BaseSelector(ABC):
 
         # 如果是全身训练
         if not exercise_ids or muscle_groups == ["all"]:
-            exercise_ids = {ex['pk'] for ex in self.exercises}
+            exercise_ids = {record.pk for record in self.records}
 
-        # 2. 计算每个动作的静态分数
-        candidates = {}
-        for exercise_id in exercise_ids:
-            exercise = self._get_exercise_by_id(exercise_id)
-            # 检查是否被排除
-            if exercise and not self._is_exercise_excluded(exercise):
-                static_score = self._calculate_static_score(exercise)
-                candidates[exercise_id] = {
-                    'exercise': exercise,
-                    'static_score': static_score
-                }
-
-        return candidates
+        return exercise_ids
 
     def _generate_day_type(self, muscle_groups: List[str]) -> str:
         """根据肌群列表生成训练日类型描述"""
@@ -213,17 +471,56 @@ class BaseSelector(ABC):
         return 1.0
 
     def _get_exercise_by_id(self, exercise_id: int) -> Dict:
-        """根据ID获取动作"""
-        for exercise in self.exercises:
-            if exercise['pk'] == exercise_id:
-                return exercise
-        return None
-
-    def _is_exercise_excluded(self, exercise: Dict) -> bool:
+        """根据ID获取完整的动作字典"""
+        record = self._get_record(exercise_id)
+        if record is None:
+            return None
+        return self.exercises[record.row]
+
+    def get_exercise_text(self, exercise_id: int) -> Dict:
+        """获取动作的文字说明（steps/notes），懒加载模式下从文件读取"""
+        exercise = self._get_exercise_by_id(exercise_id)
+        if exercise is None:
+            return {}
+        text = {field: exercise[field] for field in TEXT_FIELDS if field in exercise}
+        if not text and self.text_index is not None:
+            return self.text_index.get(exercise_id)
+        return text
+
+    def attach_exercise_text(self, weekly_plan: Dict) -> Dict:
+        """返回附带每个动作文字说明的计划副本（用于最终展示）"""
+        rendered = {}
+        for day_name, day_plan in weekly_plan.items():
+            rendered[day_name] = dict(day_plan, exercises=[
+                dict(exercise, **self.get_exercise_text(exercise['pk']))
+                for exercise in day_plan['exercises']])
+        return rendered
+
+    def _get_record(self, exercise_id: int) -> ExerciseRecord:
+        """根据ID获取紧凑动作记录"""
+        pk_rows = self.compiled_catalog.pk_rows
+        if not 0 <= exercise_id < len(pk_rows) or pk_rows[exercise_id] < 0:
+            return None
+        return self.records[pk_rows[exercise_id]]
+
+    def _get_hard_constraints(self) -> HardConstraints:
+        """编译当前配置的硬约束（包括可用器械）"""
+        return HardConstraints(self.HARD_CONSTRAINTS, self.compiled_catalog,
+                               self.EXCLUDED_EXERCISES, self.AVAILABLE_EQUIPMENT)
+
+    def _get_day_constraints(self, candidates: Dict[int, Dict],
+                             global_selected_ids: Set[int]) -> DayConstraints:
+        """当天搜索中的可行性检查，没有相关约束时返回 None"""
+        if not self.HARD_CONSTRAINTS:
+            return None
+        return self._get_hard_constraints().for_day(
+            self, candidates, global_selected_ids)
+
+    def _is_exercise_excluded(self, record: ExerciseRecord) -> bool:
         """检查动作是否在排除列表中"""
-        return exercise['pk'] in self.EXCLUDED_EXERCISES
+        return record.pk in self.EXCLUDED_EXERCISES
 
-    def _calculate_static_score(self, exercise: Dict) -> float:
+    def _calculate_static_score(self, record: ExerciseRecord) -> float:
         """计算静态分数 - 使用分摊机制"""
         score = 0
 
@@ -232,7 +529,7 @@ class BaseSelector(ABC):
         secondary_base = self.config['scoring_weights']['secondary_muscle']['base_score']
 
         # 主肌群分数（分摊机制）
-        primary_muscles = exercise.get('primaryMuscles', [])
+        primary_muscles = record.primary_muscles
         if primary_muscles:
             score_per_muscle = primary_base / len(primary_muscles)
             for muscle in primary_muscles:
@@ -240,7 +537,7 @@ class BaseSelector(ABC):
                 score += score_per_muscle * preference
 
         # 次肌群分数（分摊机制）
-        secondary_muscles = exercise.get('secondaryMuscles', [])
+        secondary_muscles = record.secondary_muscles
         if secondary_muscles:
             score_per_muscle = secondary_base / len(secondary_muscles)
             for muscle in secondary_muscles:
@@ -248,63 +545,80 @@ class BaseSelector(ABC):
                 score += score_per_muscle * preference
 
         # 常用动作加分
-        if exercise['pk'] in self.classifications['common']['Common']:
+        if self.compiled_catalog.flags[record.pk] & COMMON:
             score += self.config['scoring_weights']['common_exercise_bonus']['score']
 
         return score
 
-    def _calculate_dynamic_score(self, exercise: Dict, position: int,
-                                 selected_exercises: List[Dict],
-                                 selected_families: Set[str],
-                                 global_selected_ids: Set[int]) -> float:
-        """计算动态分数 - 两层结构"""
+    def _calculate_position_score(self, exercise_id: int, position: int) -> float:
+        """计算动态分数第一层：位置相关得分（与已选动作无关）"""
         score = 0
-        exercise_id = exercise['pk']
-
-        # === 第一层：位置相关得分 ===
         position_scores = self.config['position_scores']
+        flags = self.compiled_catalog.flags[exercise_id]
 
         # 大肌群动作位置得分
-        if exercise_id in self.classifications['major']['Major']:
+        if flags & MAJOR:
             score += position_scores['major_muscle']['scores'][position]
         # 小肌群动作位置得分
-        elif exercise_id in self.classifications['major']['Minor']:
+        elif flags & MINOR:
             score += position_scores['minor_muscle']['scores'][position]
 
         # 复合动作位置得分
-        if exercise_id in self.classifications['compound']['compound']:
+        if flags & COMPOUND:
             score += position_scores['compound']['scores'][position]
         # 孤立动作位置得分
-        elif exercise_id in self.classifications['compound']['isolation']:
+        elif flags & ISOLATION:
             score += position_scores['isolation']['scores'][position]
 
         # 自由重量位置得分
-        if exercise_id in self.classifications['machine']['free']:
+        if flags & FREE:
             score += position_scores['free_weight']['scores'][position]
         # 器械动作位置得分
-        elif exercise_id in self.classifications['machine']['equipment']:
+        elif flags & EQUIPMENT:
             score += position_scores['equipment']['scores'][position]
 
+        return score
+
+    def _calculate_dynamic_score(self, record: ExerciseRecord, position: int,
+                                 selected_ids: List[int],
+                                 selected_families: Set[str],
+                                 global_selected_ids: Set[int]) -> float:
+        """
+        计算动态分数 - 两层结构
+
+        Args:
+            record: 待评分的动作
+            position: 位置（从0开始）
+            selected_ids: 当天已选动作ID（按位置顺序）
+            selected_families: 当天已选动作族
+            global_selected_ids: 全周已选择的动作ID集合
+        """
+        self._stats.dynamic_score_evaluations += 1
+        exercise_id = record.pk
+        all_flags = self.compiled_catalog.flags
+        group_masks = self.compiled_catalog.group_masks
+        flags = all_flags[exercise_id]
+
+        # === 第一层：位置相关得分 ===
+        score = self._calculate_position_score(exercise_id, position)
+
         # === 第二层：多样性平衡 ===
         # 统计已选动作的特征
         bilateral_count = 0
         compound_count = 0
         machine_count = 0
 
-        # 统计已选动作覆盖的肌群（基于categoryMapping）
-        selected_muscle_groups = set()
-        for ex in selected_exercises:
-            ex_id = ex['pk']
-            # 找出这个动作属于哪些肌群
-            for muscle_group, exercise_ids in self.category_mapping.items():
-                if ex_id in exercise_ids:
-                    selected_muscle_groups.add(muscle_group)
+        # 统计已选动作覆盖的肌群（基于categoryMapping的位掩码）
+        selected_muscle_groups = 0
+        for ex_id in selected_ids:
+            selected_muscle_groups |= group_masks[ex_id]
 
-            if ex_id in self.classifications['single']['bilateral']:
+            selected_flags = all_flags[ex_id]
+            if selected_flags & BILATERAL:
                 bilateral_count += 1
-            if ex_id in self.classifications['compound']['compound']:
+            if selected_flags & COMPOUND:
                 compound_count += 1
-            if ex_id in self.classifications['machine']['equipment']:
+            if selected_flags & EQUIPMENT:
                 machine_count += 1
 
         # 从配置文件读取多样性规则
@@ -313,21 +627,21 @@ class BaseSelector(ABC):
         penalty = diversity['balance_penalty']
 
         # 单双侧平衡（只惩罚，不奖励）
-        if exercise_id in self.classifications['single']['bilateral'] and bilateral_count >= threshold:
+        if flags & BILATERAL and bilateral_count >= threshold:
             score += penalty  # 双侧动作超过阈值，惩罚
-        elif exercise_id in self.classifications['single']['single_sided'] and (len(selected_exercises) - bilateral_count) >= threshold:
+        elif flags & SINGLE_SIDED and (len(selected_ids) - bilateral_count) >= threshold:
             score += penalty  # 单侧动作超过阈值，惩罚
 
         # 复合/孤立平衡（只惩罚，不奖励）
-        if exercise_id in self.classifications['compound']['compound'] and compound_count >= threshold:
+        if flags & COMPOUND and compound_count >= threshold:
             score += penalty  # 复合动作超过阈值，惩罚
-        elif exercise_id in self.classifications['compound']['isolation'] and (len(selected_exercises) - compound_count) >= threshold:
+        elif flags & ISOLATION and (len(selected_ids) - compound_count) >= threshold:
             score += penalty  # 孤立动作超过阈值，惩罚
 
         # 器械/自由平衡（只惩罚，不奖励）
-        if exercise_id in self.classifications['machine']['equipment'] and machine_count >= threshold:
+        if flags & EQUIPMENT and machine_count >= threshold:
             score += penalty  # 器械动作超过阈值，惩罚
-        elif exercise_id in self.classifications['machine']['free'] and (len(selected_exercises) - machine_count) >= threshold:
+        elif flags & FREE and (len(selected_ids) - machine_count) >= threshold:
             score += penalty  # 自由动作超过阈值，惩罚
 
         # === 惩罚机制 ===
@@ -342,11 +656,13 @@ class BaseSelector(ABC):
         if exercise_id in global_selected_ids:
             score += penalties['weekly_repeat']
 
+        # 跨周重复动作惩罚（多周计划轮换）
+        if exercise_id in self.previous_week_ids:
+            score += penalties.get('cross_week_repeat', 0)
+
         # 同肌群动作惩罚：计算当前动作有多少肌群已被选中
-        muscle_group_overlap = 0
-        for muscle_group, exercise_ids in self.category_mapping.items():
-            if exercise_id in exercise_ids and muscle_group in selected_muscle_groups:
-                muscle_group_overlap += 1
+        muscle_group_overlap = bin(
+            group_masks[exercise_id] & selected_muscle_groups).count('1')
 
         if muscle_group_overlap > 0:
             score += penalties['same_muscle_group'] * muscle_group_overlap
@@ -355,10 +671,7 @@ class BaseSelector(ABC):
 
     def _get_exercise_family(self, exercise_id: int) -> str:
         """获取动作所属的族"""
-        for family_name, exercise_ids in self.classifications['family'].items():
-            if exercise_id in exercise_ids:
-                return family_name
-        return None
+        return self.compiled_catalog.family_name(exercise_id)
 
     def print_detailed_plan(self, weekly_plan: Dict) -> None:
         """打印详细的训练计划"""
@@ -420,6 +733,11 @@ class BaseSelector(ABC):
                     if exercise['secondaryMuscles']:
                         self._safe_print(
                             f"   Secondary Muscles: {', '.join(exercise['secondaryMuscles'])}")
+                if plan.get('cool_down'):
+                    self._safe_print("\nCool-down Stretches:")
+                    for stretch in plan['cool_down']:
+                        self._safe_print(
+                            f"   - [{stretch['pk']}] {stretch['name']} ({', '.join(stretch['primaryMuscles'])})")
             else:
                 self._safe_print("   Rest and Recovery!")
 
@@ -456,5 +774,6 @@ class BaseSelector(ABC):
         self._safe_print("\nPenalties:")
         self._safe_print("  - Same movement family: -10")
         self._safe_print("  - Weekly repetition: -8")
+        self._safe_print("  - Cross-week repetition (mesocycles): -4")
         self._safe_print(
             "  - Same muscle group: -1 per overlapping muscle group")
@@ -0,0 +1,179 @@
+import codecs
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# 只在展示计划时才需要的文字字段（占 strength.json 的大部分体积）
+TEXT_FIELDS = ('steps', 'notes')
+
+# 流式读取的块大小（字节）
+CHUNK_SIZE = 1 << 16
+# 单个动作对象的最大长度（字符），超过仍无法解析时视为格式错误
+MAX_RECORD_SIZE = 1 << 20
+# 解析错误落在缓冲区末尾这几个字符内时，对象可能只是被块边界截断（如 "fals"、"\u00"）
+_TRUNCATION_SLACK = 8
+
+_WHITESPACE = ' \t\r\n'
+
+
+def _file_signature(filepath: str) -> Tuple[float, int]:
+    stat = os.stat(filepath)
+    return stat.st_mtime, stat.st_size
+
+
+class ExerciseTextIndex:
+    """
+    动作文字字段的偏移索引
+
+    记录每个动作对象在 strength.json 中的字节范围，需要时按 pk
+    定位并只解析该对象，取出 steps/notes（或 fields 指定的文字字段）
+    """
+
+    def __init__(self, filepath: str, offsets: Dict[int, Tuple[int, int]],
+                 fields: Sequence[str] = TEXT_FIELDS):
+        self.filepath = filepath
+        self.offsets = offsets  # {pk: (起始字节, 字节长度)}
+        self.fields = tuple(fields)
+        self._signature = _file_signature(filepath)
+
+    def get(self, exercise_id: int) -> Dict:
+        """读取单个动作的文字字段，动作不存在时返回空字典"""
+        if exercise_id not in self.offsets:
+            return {}
+        if _file_signature(self.filepath) != self._signature:
+            raise RuntimeError(
+                f"{self.filepath} changed after it was indexed; reload the catalog")
+
+        start, length = self.offsets[exercise_id]
+        with open(self.filepath, 'rb') as f:
+            f.seek(start)
+            exercise = json.loads(f.read(length).decode('utf-8'))
+        return {field: exercise[field] for field in self.fields if field in exercise}
+
+
+def iter_exercises(filepath: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[Dict, int, int]]:
+    """
+    流式解析 strength.json 格式的数组，逐个产出动作对象
+
+    文件按块读取，缓冲区只保留尚未解析完的部分，因此峰值内存与
+    单个对象和块大小相关，而与整个文件大小无关
+
+    Yields:
+        (动作字典, 起始字节, 字节长度)
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    with open(filepath, 'rb') as f:
+        buffer = ''
+        position = 0
+        byte_position = 0  # buffer[position] 在文件中的字节偏移
+        eof = False
+        started = False
+
+        def read_more() -> bool:
+            nonlocal buffer, position, eof
+            if eof:
+                return False
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + utf8.decode(chunk, final=eof)
+            position = 0
+            return not eof
+
+        def skip(characters: str) -> str:
+            """跳过指定字符，返回下一个字符（文件结束时返回空字符串）"""
+            nonlocal position, byte_position
+            while True:
+                while position < len(buffer) and buffer[position] in characters:
+                    byte_position += 1  # 跳过的字符都是单字节的
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if not read_more():
+                    return ''
+
+        if skip(_WHITESPACE) != '[':
+            raise ValueError(f"{filepath}: expected a JSON array")
+        position += 1
+        byte_position += 1
+
+        while True:
+            separator = skip(_WHITESPACE)
+            if separator == ']':
+                return
+            if started:
+                if separator != ',':
+                    raise ValueError(
+                        f"{filepath}: expected ',' at byte {byte_position}")
+                position += 1
+                byte_position += 1
+            if skip(_WHITESPACE) == '':
+                raise ValueError(f"{filepath}: unexpected end of file")
+
+            # 对象可能跨块：只有错误落在缓冲区末尾（或字符串尚未结束）时才继续读，
+            # 对象中间的格式错误立即报告，不会一直读到文件末尾
+            while True:
+                try:
+                    exercise, end = decoder.raw_decode(buffer, position)
+                    break
+                except json.JSONDecodeError as error:
+                    truncated = error.pos >= len(buffer) - _TRUNCATION_SLACK or \
+                        error.msg.startswith('Unterminated string')
+                    if len(buffer) - position > MAX_RECORD_SIZE:
+                        raise ValueError(
+                            f"{filepath}: exercise at byte {byte_position} is longer "
+                            f"than {MAX_RECORD_SIZE} characters") from None
+                    if not truncated or not read_more():
+                        raise ValueError(
+                            f"{filepath}: invalid exercise at byte {byte_position}: "
+                            f"{error.msg}") from None
+
+            # raw_decode 每次调用都会清空键名缓存，这里手动驻留键名，
+            # 使所有动作共享同一组键字符串（与 json.load 的内存占用一致）
+            exercise = {sys.intern(key): value for key, value in exercise.items()}
+
+            length = len(buffer[position:end].encode('utf-8'))
+            yield exercise, byte_position, length
+            byte_position += length
+            position = end
+            started = True
+
+
+def load_exercises(filepath: str, lazy_text: bool = False,
+                   fields: Sequence[str] = None,
+                   validator=None) -> Tuple[List[Dict], ExerciseTextIndex]:
+    """
+    流式加载 strength.json 格式的动作库
+
+    Args:
+        filepath: 动作库文件
+        lazy_text: 为 True 时丢弃 steps/notes，只保留评分需要的字段，
+                   并返回文字字段的偏移索引
+        fields: 只保留这些字段（None 表示保留全部字段）
+        validator: 可选的 validation.CatalogValidator，在同一次遍历中校验每个动作，
+                   结束时有问题则抛出 CatalogValidationError
+
+    Returns:
+        (动作列表, 文字索引)，非懒加载模式下索引为 None
+    """
+    exercises = []
+    offsets = {} if lazy_text else None
+
+    for exercise, start, length in iter_exercises(filepath):
+        if validator is not None:
+            validator.check(exercise, start)
+        if lazy_text:
+            offsets.setdefault(exercise['pk'], (start, length))
+            for field in TEXT_FIELDS:
+                exercise.pop(field, None)
+        if fields is not None:
+            exercise = {field: exercise[field] for field in fields if field in exercise}
+        exercises.append(exercise)
+
+    if validator is not None:
+        validator.finish()
+    if not lazy_text:
+        return exercises, None
+    return exercises, ExerciseTextIndex(filepath, offsets)
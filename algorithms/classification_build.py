@@ -0,0 +1,388 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .catalog import iter_exercises
+    from .compiled_catalog import equipment_key, equipment_of
+except ImportError:
+    from catalog import iter_exercises
+    from compiled_catalog import equipment_key, equipment_of
+
+# 分类维度：(分类名, 文件, 是否每个动作都必须归类)
+# 分类名与 BaseSelector.classifications 一致；categoryMapping 没有核心肌群分组，
+# 动作族也允许为空，这两个维度只检查重复和失效的 pk
+DIMENSIONS = (
+    ('category', 'categoryMapping.json', False),
+    ('major', 'type1_isMajor.json', True),
+    ('compound', 'type2_isCompound.json', True),
+    ('single', 'type3_isSingle.json', True),
+    ('machine', 'type4_isMachine.json', True),
+    ('common', 'type5_isCommon.json', True),
+    ('family', 'type6_movementFamily.json', False)
+)
+
+# 推导使用的动作特征，按从具体到宽泛的顺序尝试
+FEATURES = ('base_name', 'primary_muscle', 'equipment')
+
+# 某个特征取值下至少有这么多已标注动作、且分组完全一致时才据此推导
+MIN_SUPPORT = 3
+
+# 构建逻辑有变化时递增，使旧的构建状态失效
+BUILD_VERSION = 1
+
+# 已审核、暂不处理的已知问题清单（classification 目录下），check 只对清单外的问题报错
+BASELINE_FILE = 'knownIssues.json'
+
+
+def exercise_features(exercise: Dict) -> List[str]:
+    """推导用的特征：去掉器械的名称、第一个主肌群、器械"""
+    name = exercise.get('name', '')
+    base_name = name.rsplit(' – ', 1)[0] if ' – ' in name else name
+    primary = exercise.get('primaryMuscles') or ['']
+    return [base_name.strip().casefold(), primary[0],
+            equipment_key(equipment_of(name))]
+
+
+def _fingerprint(exercise: Dict) -> str:
+    """与分类有关的字段的哈希，用于判断动作是否改动过"""
+    payload = json.dumps([exercise.get('name'), exercise.get('primaryMuscles')],
+                         ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ClassificationIssue:
+    """分类文件与 strength.json 之间的一处不一致"""
+
+    __slots__ = ('dimension', 'filename', 'pk', 'kind', 'groups', 'derived')
+
+    def __init__(self, dimension: str, filename: str, pk: int, kind: str,
+                 groups: List[str] = (), derived: str = None):
+        self.dimension = dimension
+        self.filename = filename
+        self.pk = pk
+        self.kind = kind          # 'unknown' | 'duplicate' | 'unclassified'
+        self.groups = list(groups)
+        self.derived = derived    # 可推导出的分组（仅 unclassified）
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        """在已知问题清单中的标识"""
+        return self.filename, self.kind, self.pk
+
+    def __str__(self) -> str:
+        if self.kind == 'unknown':
+            detail = f"pk {self.pk} in {self.groups} does not exist in strength.json"
+        elif self.kind == 'duplicate':
+            detail = f"pk {self.pk} is classified more than once: {self.groups}"
+        elif self.derived is not None:
+            detail = f"pk {self.pk} is unclassified (derivable: {self.derived!r})"
+        else:
+            detail = f"pk {self.pk} is unclassified"
+        return f"{self.filename}: {detail}"
+
+
+class BuildResult:
+    """一次分类构建的结果"""
+
+    def __init__(self, issues: List[ClassificationIssue], derived: Dict[str, Dict[int, str]],
+                 processed: int, total: int):
+        self.issues = issues
+        self.derived = derived      # {分类名: {pk: 推导出的分组}}
+        self.processed = processed  # 本次重新处理的动作数
+        self.total = total
+
+    def new_issues(self, baseline: set) -> List[ClassificationIssue]:
+        """不在已知问题清单 {(文件, 类型, pk)} 中的问题"""
+        return [issue for issue in self.issues if issue.key not in baseline]
+
+    def resolved(self, baseline: set) -> set:
+        """清单中已经不再出现的问题"""
+        return baseline - {issue.key for issue in self.issues}
+
+
+class ClassificationBuilder:
+    """
+    检查并补全由 strength.json 派生的分类文件
+
+    - 检查每个维度中 pk 最多归类一次、没有失效的 pk，
+      必须归类的维度（type1-type5）中每个动作都有分组
+    - 未归类的动作按已标注动作学到的规则推导分组：某个特征取值
+      （去掉器械的名称 / 第一个主肌群 / 器械）下已标注动作的分组完全一致
+      且不少于 MIN_SUPPORT 个时才推导，否则只报告
+    - 构建状态（每个动作的指纹、特征、推导结果和规则）保存在
+      out/classification_build.json，下次只重新处理改动过的动作；
+      分类文件或已标注动作的特征改动时才重新学习规则
+    - classification/knownIssues.json 记录已审核的已知问题，
+      检查时只有清单之外的新问题才算失败
+    """
+
+    def __init__(self, data_dir: str, state_path: str = None):
+        self.data_dir = data_dir
+        self.classification_dir = os.path.join(data_dir, 'classification')
+        self.state_path = state_path or os.path.join(
+            data_dir, 'out', 'classification_build.json')
+        self.baseline_path = os.path.join(self.classification_dir, BASELINE_FILE)
+
+    # ========== 已知问题 ==========
+
+    def load_baseline(self) -> set:
+        """已知问题 {(文件, 类型, pk)}，清单文件不存在时为空"""
+        try:
+            with open(self.baseline_path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            return set()
+        return {(filename, kind, exercise_id)
+                for filename, kinds in baseline.items()
+                for kind, exercise_ids in kinds.items()
+                for exercise_id in exercise_ids}
+
+    def write_baseline(self, issues: List[ClassificationIssue]) -> None:
+        """把当前的全部问题写成已知问题清单 {文件: {类型: [pk]}}"""
+        baseline = {}
+        for issue in issues:
+            baseline.setdefault(issue.filename, {}).setdefault(issue.kind, []).append(issue.pk)
+        for kinds in baseline.values():
+            for exercise_ids in kinds.values():
+                exercise_ids.sort()
+        with open(self.baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+
+    # ========== 状态 ==========
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get('version') == BUILD_VERSION else {}
+
+    def _save_state(self, state: Dict) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _load_mappings(self) -> Tuple[Dict[str, Dict[str, List[int]]], str]:
+        """所有分类文件及其组合内容哈希"""
+        mappings = {}
+        digest = hashlib.sha256()
+        for dimension, filename, _ in DIMENSIONS:
+            with open(os.path.join(self.classification_dir, filename), 'rb') as f:
+                content = f.read()
+            digest.update(filename.encode('utf-8'))
+            digest.update(hashlib.sha256(content).digest())
+            mappings[dimension] = json.loads(content.decode('utf-8'))
+        return mappings, digest.hexdigest()
+
+    # ========== 规则 ==========
+
+    @staticmethod
+    def _learn_rules(features: Dict[int, List[str]],
+                     memberships: Dict[str, Dict[int, List[str]]]) -> Dict:
+        """{分类名: [每个特征的 {特征取值: 分组}]}，只保留完全一致且支持数足够的取值"""
+        rules = {}
+        for dimension, _, _ in DIMENSIONS:
+            labelled = memberships[dimension]
+            per_feature = []
+            for feature_index in range(len(FEATURES)):
+                votes = {}
+                for exercise_id, groups in labelled.items():
+                    if len(groups) != 1 or exercise_id not in features:
+                        continue
+                    value = features[exercise_id][feature_index]
+                    votes.setdefault(value, {}).setdefault(groups[0], 0)
+                    votes[value][groups[0]] += 1
+                per_feature.append({
+                    value: next(iter(counts))
+                    for value, counts in votes.items()
+                    if value and len(counts) == 1 and sum(counts.values()) >= MIN_SUPPORT})
+            rules[dimension] = per_feature
+        return rules
+
+    @staticmethod
+    def _derive(rules: Dict, features: List[str]) -> Dict[str, Optional[str]]:
+        derived = {}
+        for dimension, per_feature in rules.items():
+            derived[dimension] = None
+            for feature_index, table in enumerate(per_feature):
+                group = table.get(features[feature_index])
+                if group is not None:
+                    derived[dimension] = group
+                    break
+        return derived
+
+    # ========== 构建 ==========
+
+    def run(self, full: bool = False) -> BuildResult:
+        """
+        检查分类文件并推导未归类动作的分组（不修改分类文件）
+
+        Args:
+            full: 忽略构建状态，重新处理所有动作
+        """
+        mappings, labels_digest = self._load_mappings()
+        state = {} if full else self._load_state()
+        previous = state.get('exercises', {})
+
+        # pk -> 所属分组（按文件中的顺序）
+        memberships = {}
+        for dimension, _, _ in DIMENSIONS:
+            groups_of = {}
+            for group, exercise_ids in mappings[dimension].items():
+                for exercise_id in exercise_ids:
+                    groups_of.setdefault(exercise_id, []).append(group)
+            memberships[dimension] = groups_of
+
+        # 只为新增或改动过的动作重新计算特征
+        exercises = {}
+        changed = set()
+        for exercise, _, _ in iter_exercises(os.path.join(self.data_dir, 'strength.json')):
+            exercise_id = exercise['pk']
+            if exercise_id in exercises:
+                continue
+            fingerprint = _fingerprint(exercise)
+            entry = previous.get(str(exercise_id))
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                exercises[exercise_id] = entry
+            else:
+                exercises[exercise_id] = {'fingerprint': fingerprint,
+                                          'features': exercise_features(exercise),
+                                          'derived': None}
+                changed.add(exercise_id)
+        removed = {int(exercise_id) for exercise_id in previous} - set(exercises)
+
+        # 分类文件或已标注动作的特征变了才需要重新学习规则
+        labelled_changed = any(
+            exercise_id in groups_of
+            for exercise_id in changed | removed
+            for groups_of in memberships.values())
+        if state.get('labels_digest') == labels_digest and not labelled_changed \
+                and 'rules' in state:
+            rules = state['rules']
+            to_derive = changed
+        else:
+            features = {exercise_id: entry['features']
+                        for exercise_id, entry in exercises.items()}
+            rules = self._learn_rules(features, memberships)
+            to_derive = set(exercises)
+
+        for exercise_id in to_derive:
+            exercises[exercise_id]['derived'] = self._derive(
+                rules, exercises[exercise_id]['features'])
+
+        issues = []
+        derived = {dimension: {} for dimension, _, _ in DIMENSIONS}
+        for dimension, filename, required in DIMENSIONS:
+            groups_of = memberships[dimension]
+            for exercise_id, groups in groups_of.items():
+                if exercise_id not in exercises:
+                    issues.append(ClassificationIssue(
+                        dimension, filename, exercise_id, 'unknown', groups))
+                elif len(groups) > 1:
+                    issues.append(ClassificationIssue(
+                        dimension, filename, exercise_id, 'duplicate', groups))
+            for exercise_id, entry in exercises.items():
+                if exercise_id in groups_of:
+                    continue
+                group = entry['derived'][dimension]
+                if group is not None:
+                    derived[dimension][exercise_id] = group
+                if required or group is not None:
+                    issues.append(ClassificationIssue(
+                        dimension, filename, exercise_id, 'unclassified', derived=group))
+
+        self._save_state({
+            'version': BUILD_VERSION,
+            'labels_digest': labels_digest,
+            'rules': rules,
+            'exercises': {str(exercise_id): entry for exercise_id, entry in exercises.items()}
+        })
+        return BuildResult(issues, derived, len(to_derive), len(exercises))
+
+    def write(self, result: BuildResult) -> List[str]:
+        """把推导出的分组写入分类文件（保持各文件原有的缩进和列表格式），返回改动的文件"""
+        written = []
+        for dimension, filename, _ in DIMENSIONS:
+            additions = result.derived[dimension]
+            if not additions:
+                continue
+            filepath = os.path.join(self.classification_dir, filename)
+            with open(filepath, 'r', encoding='utf-8') as f:
+                text = f.read()
+            mapping = json.loads(text)
+            for exercise_id, group in sorted(additions.items()):
+                exercise_ids = mapping[group]
+                exercise_ids.append(exercise_id)
+                if exercise_ids[:-1] == sorted(exercise_ids[:-1]):
+                    exercise_ids.sort()
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(_dump_mapping(mapping, text))
+            written.append(filepath)
+        return written
+
+
+def _dump_mapping(mapping: Dict[str, List[int]], original: str) -> str:
+    """按原文件的缩进和列表格式（每个 pk 一行或整个列表一行）序列化"""
+    lines = original.split('\n')
+    indent = len(lines[1]) - len(lines[1].lstrip()) if len(lines) > 1 else 2
+    compact = any(', ' in line and not line.lstrip().startswith('"') for line in lines)
+    pad = ' ' * indent
+
+    parts = []
+    for group, exercise_ids in mapping.items():
+        if compact:
+            body = f"{pad * 2}{', '.join(str(pk) for pk in exercise_ids)}"
+        else:
+            body = ',\n'.join(f"{pad * 2}{pk}" for pk in exercise_ids)
+        parts.append(f"{pad}{json.dumps(group, ensure_ascii=False)}: [\n{body}\n{pad}]")
+    text = "{\n" + ",\n".join(parts) + "\n}"
+    return text + '\n' if original.endswith('\n') else text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check classification files against strength.json and fill derivable gaps")
+    parser.add_argument('command', choices=['check', 'build', 'baseline'],
+                        help="check: 只报告问题；build: 把可推导的分组写入分类文件；"
+                             "baseline: 把当前的全部问题写入已知问题清单")
+    parser.add_argument('data_dir', nargs='?',
+                        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--full', action='store_true', help="忽略构建状态，重新处理所有动作")
+    parser.add_argument('--all', action='store_true', help="忽略已知问题清单，报告全部问题")
+    args = parser.parse_args()
+
+    builder = ClassificationBuilder(args.data_dir)
+    result = builder.run(full=args.full)
+    if args.command == 'baseline':
+        builder.write_baseline(result.issues)
+        print(f"Wrote {len(result.issues)} known issue(s) to {builder.baseline_path}")
+        return
+    if args.command == 'build':
+        for filepath in builder.write(result):
+            print(f"Updated {filepath}")
+        # 写入后重新检查，剩下的是需要人工处理的问题
+        result = builder.run()
+
+    baseline = set() if args.all else builder.load_baseline()
+    new_issues = result.new_issues(baseline)
+    for issue in new_issues:
+        print(issue)
+    resolved = result.resolved(baseline)
+    if resolved:
+        print(f"{len(resolved)} known issue(s) no longer occur; "
+              f"remove them from {builder.baseline_path}")
+    print(f"Checked {result.total} exercises ({result.processed} reprocessed), "
+          f"{len(new_issues)} new issue(s), {len(result.issues) - len(new_issues)} known")
+    sys.exit(1 if new_issues else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import json
+import mmap
+import os
+import re
+import struct
+import warnings
+from typing import Dict, List
+
+# 分类属性位（按 pk 存储在 flags 数组中）
+MAJOR = 1 << 0
+MINOR = 1 << 1
+COMPOUND = 1 << 2
+ISOLATION = 1 << 3
+FREE = 1 << 4
+EQUIPMENT = 1 << 5
+BILATERAL = 1 << 6
+SINGLE_SIDED = 1 << 7
+COMMON = 1 << 8
+
+# (分类名, 分组名, 属性位)，与 BaseSelector.classifications 的结构对应
+FLAG_SOURCES = (
+    ('major', 'Major', MAJOR),
+    ('major', 'Minor', MINOR),
+    ('compound', 'compound', COMPOUND),
+    ('compound', 'isolation', ISOLATION),
+    ('machine', 'free', FREE),
+    ('machine', 'equipment', EQUIPMENT),
+    ('single', 'bilateral', BILATERAL),
+    ('single', 'single_sided', SINGLE_SIDED),
+    ('common', 'Common', COMMON)
+)
+
+_MAGIC = b'EXCC'
+_VERSION = 3
+# 文件头：魔数、版本、pk 表长度、肌群成员总数、元数据字节数
+_HEADER = struct.Struct('<4sIIII')
+
+
+def _align(offset: int, size: int = 8) -> int:
+    return (offset + size - 1) // size * size
+
+
+# 动作名称与器械后缀之间的分隔符：' – '，个别名称写成 ' - ' 或 ' — '
+_EQUIPMENT_SEPARATOR = re.compile(r'\s+[–—-]\s+')
+
+# 同一种器械的不同写法（复数、附件、握法）归并到同一个比较键
+EQUIPMENT_ALIASES = {
+    'rings': 'ring',
+    'feet in rings': 'ring',
+    'hands in rings': 'ring',
+    'double kettlebell': 'kettlebell',
+    'hand weights': 'dumbbell',
+    'trap bar high handles': 'trap bar',
+    'trap bar low handles': 'trap bar',
+    'leg press machine': 'machine',
+}
+
+
+def equipment_of(name: str) -> str:
+    """按 '<名称> – <器械>' 约定取出器械，没有器械后缀时返回空字符串"""
+    parts = _EQUIPMENT_SEPARATOR.split(name)
+    if len(parts) < 2:
+        return ''
+    return parts[-1].strip()
+
+
+def equipment_key(equipment: str) -> str:
+    """
+    器械名称的比较键：忽略大小写和多余空白，去掉 'with ...' 附件说明
+    （Cable With Rope / Cable With Bar 都是 Cable），再按 EQUIPMENT_ALIASES 归并
+    """
+    key = ' '.join(equipment.split()).casefold()
+    key = key.split(' with ', 1)[0]
+    return EQUIPMENT_ALIASES.get(key, key)
+
+
+class CompiledCatalog:
+    """
+    编译后的数值动作索引，供评分热点路径使用
+
+    所有数组都按 pk 直接寻址（长度为最大 pk + 1）：
+    - flags: 分类属性位（大/小肌群、复合/孤立、自由/器械、双侧/单侧、常用）
+    - group_masks: 动作所属 categoryMapping 肌群的位掩码
+    - family_ids: 动作族编号（-1 表示无族），同族判断只需比较整数
+    - pk_rows: pk 在动作库中的行号（-1 表示不存在）
+    - equipment_ids: 动作名称中器械后缀的编号（0 表示名称中没有器械）
+
+    另外保存每个肌群的成员 pk（保持 categoryMapping 中的原始顺序）。
+    整个索引是一段连续的字节，写入文件后各工作进程以只读方式内存映射，
+    直接挂载而无需重新加载分类文件和编译。
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, version, size, member_count, meta_length = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a compiled exercise catalog")
+
+        offset = _HEADER.size
+        meta = json.loads(bytes(view[offset:offset + meta_length]).decode('utf-8'))
+        offset = _align(offset + meta_length)
+
+        self.size = size
+        self.exercise_count = meta['exercise_count']
+        self.group_names = meta['group_names']
+        self.family_names = meta['family_names']
+        self._group_offsets = meta['group_offsets']
+
+        # 零拷贝的类型化视图
+        self.group_masks = view[offset:offset + 8 * size].cast('Q')
+        offset += 8 * size
+        self.flags = view[offset:offset + 4 * size].cast('I')
+        offset += 4 * size
+        self.family_ids = view[offset:offset + 4 * size].cast('i')
+        offset += 4 * size
+        self.pk_rows = view[offset:offset + 4 * size].cast('i')
+        offset += 4 * size
+        self.equipment_ids = view[offset:offset + 4 * size].cast('i')
+        offset += 4 * size
+        self.group_members = view[offset:offset + 4 * member_count].cast('i')
+
+        self.nbytes = offset + 4 * member_count
+        self._group_bits = {name: 1 << index for index, name in enumerate(self.group_names)}
+        self.equipment_names = meta['equipment_names']
+        self._equipment_ids = {equipment_key(name): index
+                               for index, name in enumerate(self.equipment_names)}
+
+    @classmethod
+    def compile(cls, exercises: List[Dict], category_mapping: Dict[str, List[int]],
+                classifications: Dict[str, Dict]) -> 'CompiledCatalog':
+        """从已加载的动作库和分类文件编译索引"""
+        all_ids = [exercise['pk'] for exercise in exercises]
+        for mapping in [category_mapping] + list(classifications.values()):
+            for exercise_ids in mapping.values():
+                all_ids.extend(exercise_ids)
+        size = max(all_ids, default=-1) + 1
+
+        group_names = list(category_mapping)
+        if len(group_names) > 64:
+            raise ValueError("at most 64 categoryMapping groups are supported")
+        family_names = list(classifications['family'])
+
+        group_masks = [0] * size
+        flags = [0] * size
+        family_ids = [-1] * size
+        pk_rows = [-1] * size
+
+        for bit_index, exercise_ids in enumerate(category_mapping.values()):
+            for exercise_id in exercise_ids:
+                group_masks[exercise_id] |= 1 << bit_index
+
+        for classification, group, flag in FLAG_SOURCES:
+            for exercise_id in classifications[classification].get(group, []):
+                flags[exercise_id] |= flag
+
+        # 与 _get_exercise_family 一致：动作属于多个族时取第一个
+        for family_id, exercise_ids in enumerate(classifications['family'].values()):
+            for exercise_id in exercise_ids:
+                if family_ids[exercise_id] == -1:
+                    family_ids[exercise_id] = family_id
+
+        # 器械编号：0 保留给名称中没有器械的动作，同一器械的不同写法合并
+        equipment_ids = [0] * size
+        equipment_names = ['']
+        equipment_lookup = {'': 0}
+        for row, exercise in enumerate(exercises):
+            if pk_rows[exercise['pk']] == -1:
+                pk_rows[exercise['pk']] = row
+                equipment = equipment_of(exercise['name'])
+                key = equipment_key(equipment)
+                if key not in equipment_lookup:
+                    equipment_lookup[key] = len(equipment_names)
+                    equipment_names.append(equipment)
+                elif equipment.casefold() == key:
+                    # 显示名称优先使用规范写法（Ring 而不是 Feet in Rings）
+                    equipment_names[equipment_lookup[key]] = equipment
+                equipment_ids[exercise['pk']] = equipment_lookup[key]
+
+        group_members = []
+        group_offsets = []
+        for exercise_ids in category_mapping.values():
+            group_offsets.append(len(group_members))
+            group_members.extend(exercise_ids)
+        group_offsets.append(len(group_members))
+
+        meta = json.dumps({
+            'exercise_count': len(exercises),
+            'group_names': group_names,
+            'family_names': family_names,
+            'group_offsets': group_offsets,
+            'equipment_names': equipment_names
+        }).encode('utf-8')
+
+        header = _HEADER.pack(_MAGIC, _VERSION, size, len(group_members), len(meta))
+        data = bytearray(header + meta)
+        data.extend(b'\0' * (_align(len(data)) - len(data)))
+        data.extend(struct.pack(f'<{size}Q', *group_masks))
+        data.extend(struct.pack(f'<{size}I', *flags))
+        data.extend(struct.pack(f'<{size}i', *family_ids))
+        data.extend(struct.pack(f'<{size}i', *pk_rows))
+        data.extend(struct.pack(f'<{size}i', *equipment_ids))
+        data.extend(struct.pack(f'<{len(group_members)}i', *group_members))
+        return cls(data)
+
+    # ========== 查询 ==========
+
+    def category_mapping(self) -> Dict[str, memoryview]:
+        """{肌群: 成员pk视图}，顺序与 categoryMapping.json 相同"""
+        return {name: self.group_members[self._group_offsets[index]:
+                                         self._group_offsets[index + 1]]
+                for index, name in enumerate(self.group_names)}
+
+    def group_bit(self, group_name: str) -> int:
+        """肌群对应的位，未知肌群返回0"""
+        return self._group_bits.get(group_name, 0)
+
+    def equipment_mask(self, equipment_names) -> int:
+        """
+        器械名称集合对应的位掩码（按器械编号置位），用于一次位与判断可用性
+        名称按 equipment_key 归并；动作库中没有的器械不对应任何动作，忽略并给出警告
+        """
+        mask = 0
+        for equipment in equipment_names:
+            key = equipment_key(equipment)
+            if key not in self._equipment_ids:
+                warnings.warn(f"unknown equipment ignored: {equipment!r}", stacklevel=2)
+                continue
+            mask |= 1 << self._equipment_ids[key]
+        return mask
+
+    def family_name(self, exercise_id: int) -> str:
+        """动作所属的族名，无族时返回 None"""
+        if exercise_id >= self.size:
+            return None
+        family_id = self.family_ids[exercise_id]
+        return self.family_names[family_id] if family_id >= 0 else None
+
+    # ========== 共享 ==========
+
+    def write(self, filepath: str) -> None:
+        """写入文件，之后可用 open_mmap 内存映射"""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        with open(filepath, 'wb') as f:
+            f.write(self._buffer[:self.nbytes])
+
+    @classmethod
+    def open_mmap(cls, filepath: str) -> 'CompiledCatalog':
+        """
+        只读内存映射一个已写入的索引文件（零拷贝）
+        多个进程映射同一文件时共享操作系统页缓存中的同一份数据
+        """
+        with open(filepath, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
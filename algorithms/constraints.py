@@ -0,0 +1,180 @@
+from typing import Dict, Iterable, List, Set
+
+try:
+    from .compiled_catalog import EQUIPMENT, SINGLE_SIDED
+except ImportError:
+    from compiled_catalog import EQUIPMENT, SINGLE_SIDED
+
+# 支持的硬约束（BaseSelector.HARD_CONSTRAINTS 中的键）
+CONSTRAINT_KEYS = (
+    'must_include',            # 必须出现在周计划中的动作ID
+    'max_machine_per_day',     # 每天最多几个器械动作
+    'min_unilateral_per_day',  # 每天至少几个单侧动作
+    'banned_families',         # 禁用的动作族（type6_movementFamily）
+    'unavailable_equipment'    # 没有的器械，写法同 AVAILABLE_EQUIPMENT
+)
+
+
+class InfeasibleConstraintsError(ValueError):
+    """某个训练日不存在满足硬约束的完整动作组合"""
+
+
+class HardConstraints:
+    """
+    编译后的用户硬约束
+
+    - 候选阶段：禁用族、缺少的器械（包括 AVAILABLE_EQUIPMENT 之外的器械）
+      直接从候选中去掉，器械判断只需一次位与
+    - 搜索阶段：每加入一个动作都检查当天剩余位置是否还可能满足
+      器械数量上限、单侧动作下限和必选动作，不可行的分支直接跳过
+    """
+
+    def __init__(self, spec: Dict, catalog, excluded_ids: Iterable[int] = (),
+                 available_equipment: Iterable[str] = None):
+        unknown = set(spec) - set(CONSTRAINT_KEYS)
+        if unknown:
+            raise ValueError(f"unknown hard constraints: {sorted(unknown)}")
+
+        self.must_include = set(spec.get('must_include', []))
+        self.max_machine_per_day = spec.get('max_machine_per_day')
+        self.min_unilateral_per_day = spec.get('min_unilateral_per_day', 0)
+        self.banned_families = set(spec.get('banned_families', []))
+
+        # 不可用器械的位掩码（按 catalog 的器械编号）
+        self.equipment_ids = catalog.equipment_ids
+        blocked = catalog.equipment_mask(spec.get('unavailable_equipment', []))
+        if available_equipment is not None:
+            all_equipment = (1 << len(catalog.equipment_names)) - 1
+            blocked |= all_equipment & ~catalog.equipment_mask(available_equipment)
+        self.blocked_equipment = blocked & ~1  # 名称中没有器械的动作总是可用
+
+        conflicts = self.must_include & set(excluded_ids)
+        if conflicts:
+            raise ValueError(
+                f"exercises {sorted(conflicts)} are both excluded and must be included")
+
+        # 是否有需要在搜索中检查的约束
+        self.has_day_rules = bool(self.must_include) or \
+            self.max_machine_per_day is not None or self.min_unilateral_per_day > 0
+
+    def allows(self, selector, record) -> bool:
+        """候选过滤：动作是否满足禁用族和器械约束（必选动作总是保留）"""
+        if record.pk in self.must_include:
+            return True
+        if self.banned_families and \
+                selector._get_exercise_family(record.pk) in self.banned_families:
+            return False
+        if self.blocked_equipment and \
+                (1 << self.equipment_ids[record.pk]) & self.blocked_equipment:
+            return False
+        return True
+
+    def check_placement(self, selector, template: List[List[str]]) -> None:
+        """
+        检查每个必选动作都能放进训练模板的某一天（属于某天的候选池），
+        不属于任何 categoryMapping 肌群的动作无法安排，直接报错而不是静默忽略
+        """
+        if not self.must_include:
+            return
+        placeable = set()
+        for muscle_groups in template:
+            if muscle_groups:
+                placeable |= selector._get_candidate_ids(muscle_groups) & self.must_include
+        missing = self.must_include - placeable
+        if missing:
+            raise ValueError(
+                f"must-include exercises {sorted(missing)} are not in the pool of any "
+                f"training day of the {len(template)}-day template")
+
+    def for_day(self, selector, candidate_ids: Iterable[int],
+                global_selected_ids: Set[int]) -> 'DayConstraints':
+        """生成当天的可行性检查，没有搜索阶段约束时返回 None"""
+        if not self.has_day_rules:
+            return None
+
+        # 必选动作放在第一个候选中包含它、且本周尚未选过的训练日
+        required = {exercise_id for exercise_id in candidate_ids
+                    if exercise_id in self.must_include
+                    and exercise_id not in global_selected_ids}
+        exercises_per_day = selector.config['algorithm_params']['exercises_per_day']
+        if len(required) > exercises_per_day:
+            raise ValueError(
+                f"{len(required)} must-include exercises fall on one day, "
+                f"but a day has only {exercises_per_day} slots: {sorted(required)}")
+
+        return DayConstraints(self, selector.compiled_catalog.flags,
+                              required, exercises_per_day, candidate_ids)
+
+
+def _kind(flag: int) -> int:
+    """动作在可行性计数中的类别：单侧 ×2 + 器械"""
+    return (2 if flag & SINGLE_SIDED else 0) + (1 if flag & EQUIPMENT else 0)
+
+
+class DayConstraints:
+    """
+    一天内的可行性检查（由 HardConstraints.for_day 创建）
+
+    can_add 是精确的：除了已选和必选动作本身，还按当天候选池中各类动作
+    （单侧/双侧 × 器械/自由）的剩余数量检查剩余位置能否凑满且满足约束，
+    因此逐个加入动作的贪心不会走进死路
+    """
+
+    def __init__(self, constraints: HardConstraints, flags, required: Set[int],
+                 exercises_per_day: int, candidate_ids: Iterable[int] = ()):
+        self.max_machine = constraints.max_machine_per_day
+        self.min_unilateral = constraints.min_unilateral_per_day
+        self.flags = flags
+        self.required = required
+        self.exercises_per_day = exercises_per_day
+
+        # 候选池中各类动作的数量（下标见 _kind）
+        self.pool_counts = [0, 0, 0, 0]
+        self.pool = set(candidate_ids)
+        for exercise_id in self.pool:
+            self.pool_counts[_kind(flags[exercise_id])] += 1
+
+    def can_add(self, exercise_id: int, selected_ids: List[int]) -> bool:
+        """在已选动作之后加入该动作，剩余位置是否仍能用候选池中的动作满足所有约束"""
+        flags = self.flags
+        slots_after = self.exercises_per_day - len(selected_ids) - 1
+
+        chosen = selected_ids + [exercise_id]
+        machine_count = 0
+        unilateral_count = 0
+        counts = list(self.pool_counts)
+        for chosen_id in chosen:
+            if flags[chosen_id] & EQUIPMENT:
+                machine_count += 1
+            if flags[chosen_id] & SINGLE_SIDED:
+                unilateral_count += 1
+            if chosen_id in self.pool:
+                counts[_kind(flags[chosen_id])] -= 1
+
+        # 尚未选入的必选动作一定会占用剩余位置，计入它们的属性
+        missing = [required_id for required_id in self.required
+                   if required_id not in chosen]
+        if len(missing) > slots_after:
+            return False
+        for required_id in missing:
+            if flags[required_id] & EQUIPMENT:
+                machine_count += 1
+            if flags[required_id] & SINGLE_SIDED:
+                unilateral_count += 1
+            if required_id in self.pool:
+                counts[_kind(flags[required_id])] -= 1
+
+        if self.max_machine is not None and machine_count > self.max_machine:
+            return False
+        machine_left = len(self.pool) if self.max_machine is None \
+            else self.max_machine - machine_count
+        free_slots = slots_after - len(missing)
+
+        # 剩余位置优先放单侧动作（先自由后器械），其余位置用双侧动作补满；
+        # 换掉单侧器械动作只会腾出器械名额给双侧器械动作，不会更好
+        unilateral_free = min(counts[2], free_slots)
+        unilateral_machine = min(counts[3], machine_left, free_slots - unilateral_free)
+        if unilateral_count + unilateral_free + unilateral_machine < self.min_unilateral:
+            return False
+        rest = free_slots - unilateral_free - unilateral_machine
+        return counts[0] + min(counts[1], machine_left - unilateral_machine) >= rest
@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import random
+import re
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    from .catalog import iter_exercises
+except ImportError:
+    from catalog import iter_exercises
+
+# MinHash 签名长度 = 分带数 × 每带行数；相似度 s 的两个动作至少在一个带上
+# 碰撞的概率为 1 - (1 - s^ROWS)^BANDS（s=0.5 时约 0.65，s=0.8 时约 1.0）
+BANDS = 16
+ROWS = 4
+SIGNATURE_SIZE = BANDS * ROWS
+
+# 综合相似度各部分的权重（总和为1）
+NAME_WEIGHT = 0.4      # 名称词组的 MinHash 相似度
+STEPS_WEIGHT = 0.3     # 步骤文字的 MinHash 相似度
+MUSCLE_WEIGHT = 0.3    # 主/次肌群集合的 Jaccard
+
+# 综合相似度不低于该值时视为疑似重复
+DEFAULT_THRESHOLD = 0.6
+# 推荐动作族时参与投票的相似度下限（同族动作不一定是重复，门槛更低；
+# 对现有动作逐个留一验证，约九成给出的首选族与标注一致）
+FAMILY_THRESHOLD = 0.3
+
+_EMPTY = (1 << 32) - 1
+_WORD = re.compile(r"[a-z0-9]+")
+
+# 固定种子：不同进程中同一动作的签名相同
+_rng = random.Random(20240601)
+_SALTS = tuple(_rng.getrandbits(32) for _ in range(SIGNATURE_SIZE))
+
+
+def normalize(text: str) -> List[str]:
+    """小写并只保留字母数字词，'–' 等标点和多余空白都被忽略"""
+    return _WORD.findall(text.casefold())
+
+
+def name_shingles(name: str) -> set:
+    """名称的单词和相邻词对（器械也是名称的一部分，不同器械的变体不算重复）"""
+    words = normalize(name)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def steps_shingles(steps: Iterable[str]) -> set:
+    """步骤文字的连续三词组"""
+    words = normalize(' '.join(steps))
+    if len(words) < 3:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def minhash(shingles: set) -> Tuple[int, ...]:
+    """
+    单次排列 MinHash（one permutation hashing）：每个词组只哈希一次，
+    按哈希值分到 SIGNATURE_SIZE 个桶中各取最小值，空桶从右侧最近的
+    非空桶借值（旋转补齐）并加盐区分，整个签名的计算量与词组数量成正比
+    """
+    bins = [_EMPTY] * SIGNATURE_SIZE
+    for shingle in shingles:
+        value = zlib.crc32(shingle.encode('utf-8'))
+        index = value % SIGNATURE_SIZE
+        value //= SIGNATURE_SIZE
+        if value < bins[index]:
+            bins[index] = value
+
+    if all(value == _EMPTY for value in bins):
+        return tuple(bins)
+    filled = list(bins)
+    for index in range(SIGNATURE_SIZE):
+        if bins[index] != _EMPTY:
+            continue
+        offset = 1
+        while bins[(index + offset) % SIGNATURE_SIZE] == _EMPTY:
+            offset += 1
+        source = bins[(index + offset) % SIGNATURE_SIZE]
+        filled[index] = (source ^ _SALTS[offset]) | (1 << 31)
+    return tuple(filled)
+
+
+def _estimate(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """两个签名估计的 Jaccard 相似度（任一为空时为0）"""
+    if a[0] == _EMPTY or b[0] == _EMPTY:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / SIGNATURE_SIZE
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    __slots__ = ('pk', 'name', 'name_signature', 'steps_signature', 'muscles')
+
+    def __init__(self, exercise: Dict):
+        self.pk = exercise.get('pk')
+        self.name = exercise.get('name', '')
+        self.name_signature = minhash(name_shingles(self.name))
+        self.steps_signature = minhash(steps_shingles(exercise.get('steps', [])))
+        self.muscles = frozenset(
+            [f"p:{muscle}" for muscle in exercise.get('primaryMuscles', [])] +
+            [f"s:{muscle}" for muscle in exercise.get('secondaryMuscles', [])])
+
+
+class DuplicateIndex:
+    """
+    动作库的近似重复检测索引
+
+    每个动作保存名称和步骤两个 MinHash 签名以及肌群集合；两个签名都按
+    BANDS × ROWS 分带放入 LSH 桶中。查询时只比较至少在一个带上碰撞的动作，
+    单次查询的耗时与相似动作的数量有关，而与动作库大小无关。
+    """
+
+    def __init__(self, families: Dict[int, str] = None):
+        self.entries = {}   # {pk: _Entry}
+        self.buckets = {}   # {(签名类型, 带号, 带内值): [pk]}
+        self.families = families or {}  # {pk: 动作族}
+
+    @classmethod
+    def from_data_dir(cls, data_dir: str) -> 'DuplicateIndex':
+        """流式读取 strength.json 和 type6_movementFamily.json 建立索引"""
+        family_path = os.path.join(data_dir, 'classification', 'type6_movementFamily.json')
+        families = {}
+        if os.path.exists(family_path):
+            with open(family_path, 'r', encoding='utf-8') as f:
+                # 与 CompiledCatalog 一致：动作属于多个族时取第一个
+                for family, exercise_ids in json.load(f).items():
+                    for exercise_id in exercise_ids:
+                        families.setdefault(exercise_id, family)
+
+        index = cls(families)
+        for exercise, _, _ in iter_exercises(os.path.join(data_dir, 'strength.json')):
+            if exercise['pk'] not in index.entries:
+                index.add(exercise)
+        return index
+
+    def copy(self) -> 'DuplicateIndex':
+        """独立的副本：在副本上 add 不影响原索引（条目本身只读，可以共用）"""
+        index = DuplicateIndex(self.families)
+        index.entries = dict(self.entries)
+        index.buckets = {key: list(exercise_ids) for key, exercise_ids in self.buckets.items()}
+        return index
+
+    def _band_keys(self, entry: _Entry):
+        for kind, signature in (('n', entry.name_signature), ('s', entry.steps_signature)):
+            if signature[0] == _EMPTY:
+                continue  # 没有文字时不入桶（补齐后只有空签名的首位为空）
+            for band in range(BANDS):
+                yield (kind, band, signature[band * ROWS:(band + 1) * ROWS])
+
+    def add(self, exercise: Dict) -> None:
+        """加入一个动作（如审核通过的新提交）"""
+        entry = _Entry(exercise)
+        self.entries[entry.pk] = entry
+        for key in self._band_keys(entry):
+            self.buckets.setdefault(key, []).append(entry.pk)
+
+    def similarity(self, a: _Entry, b: _Entry) -> float:
+        return round(NAME_WEIGHT * _estimate(a.name_signature, b.name_signature) +
+                     STEPS_WEIGHT * _estimate(a.steps_signature, b.steps_signature) +
+                     MUSCLE_WEIGHT * _jaccard(a.muscles, b.muscles), 4)
+
+    def _query_entry(self, entry: _Entry, threshold: float,
+                     k: int) -> List[Tuple[int, float]]:
+        candidates = set()
+        for key in self._band_keys(entry):
+            candidates.update(self.buckets.get(key, ()))
+        candidates.discard(entry.pk)
+
+        matches = []
+        for other_id in candidates:
+            score = self.similarity(entry, self.entries[other_id])
+            if score >= threshold:
+                matches.append((other_id, score))
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches[:k]
+
+    def query(self, exercise: Dict, threshold: float = DEFAULT_THRESHOLD,
+              k: int = 10) -> List[Tuple[int, float]]:
+        """与提交的动作疑似重复的已有动作 [(pk, 综合相似度)]，按相似度降序"""
+        return self._query_entry(_Entry(exercise), threshold, k)
+
+    def suggest_families(self, exercise: Dict, threshold: float = FAMILY_THRESHOLD,
+                         k: int = 10) -> List[Tuple[str, float]]:
+        """
+        type6_movementFamily.json 的候选族 [(族名, 得分)]：
+        相似动作所属族按相似度累加，得分归一化到 0-1
+        """
+        votes = {}
+        matches = self.query(exercise, threshold, k)
+        for other_id, score in matches:
+            family = self.families.get(other_id)
+            if family is not None:
+                votes[family] = votes.get(family, 0) + score
+        total = sum(score for _, score in matches)
+        return sorted(((family, round(score / total, 4)) for family, score in votes.items()),
+                      key=lambda item: (-item[1], item[0]))
+
+    def catalog_duplicates(self, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[int, int, float]]:
+        """动作库内部的疑似重复对 [(pk, pk, 综合相似度)]"""
+        pairs = []
+        for exercise_id, entry in self.entries.items():
+            for other_id, score in self._query_entry(entry, threshold, len(self.entries)):
+                if exercise_id < other_id:
+                    pairs.append((exercise_id, other_id, score))
+        pairs.sort(key=lambda item: (-item[2], item[0], item[1]))
+        return pairs
+
+
+def review_submissions(index: DuplicateIndex, submissions: List[Dict],
+                       threshold: float = DEFAULT_THRESHOLD, k: int = 5) -> List[Dict]:
+    """
+    检查一批新提交：每个提交的疑似重复动作和候选动作族
+    同一批中的提交依次加入索引的副本，批内的重复也会被发现；
+    传入的 index 不会被修改，可以反复用于多批提交
+
+    Returns:
+        [{'name', 'duplicates': [{'pk', 'name', 'similarity'}], 'families': [{'family', 'score'}]}]
+    """
+    # 提交只加入副本：临时编号在每一批内从 -1 开始，不能留在共用的索引中
+    index = index.copy()
+    report = []
+    for number, submission in enumerate(submissions):
+        # 提交使用负数临时编号（提交中自带的 pk 可能与已有动作冲突）
+        submission = dict(submission, pk=-(number + 1))
+        duplicates = index.query(submission, threshold, k)
+        report.append({
+            'name': submission.get('name', ''),
+            'duplicates': [{'pk': other_id, 'name': index.entries[other_id].name,
+                            'similarity': score} for other_id, score in duplicates],
+            'families': [{'family': family, 'score': score} for family, score
+                         in index.suggest_families(submission, k=k)]
+        })
+        index.add(submission)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find near-duplicate exercises")
+    parser.add_argument('submissions', nargs='?',
+                        help="strength.json 格式的新提交文件（不提供时检查动作库本身）")
+    parser.add_argument('--data-dir',
+                        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    index = DuplicateIndex.from_data_dir(args.data_dir)
+    if args.submissions is None:
+        for exercise_id, other_id, score in index.catalog_duplicates(args.threshold):
+            print(f"{score:.2f}  [{exercise_id}] {index.entries[exercise_id].name}  "
+                  f"<->  [{other_id}] {index.entries[other_id].name}")
+        return
+
+    submissions = [exercise for exercise, _, _ in iter_exercises(args.submissions)]
+    for item in review_submissions(index, submissions, args.threshold):
+        print(f"\n{item['name']}")
+        for duplicate in item['duplicates']:
+            print(f"   possible duplicate: [{duplicate['pk']}] {duplicate['name']} "
+                  f"({duplicate['similarity']:.2f})")
+        if item['families']:
+            print("   family candidates: " + ", ".join(
+                f"{family['family']} ({family['score']:.2f})" for family in item['families']))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 try:
     from .base_selector import BaseSelector
+    from .constraints import InfeasibleConstraintsError
+    from .records import ScoredExercise
 except ImportError:
     from base_selector import BaseSelector
+    from constraints import InfeasibleConstraintsError
+    from records import ScoredExercise
 from typing import List, Set, Dict
 
 
@@ -26,11 +30,23 @@ class GreedySelector(BaseSelector):
         # 1. 获取候选动作和它们的静态分数
         candidates = self._get_candidate_exercises(
             muscle_groups, global_selected_ids)
+        self._stats.record_day(len(candidates), 'greedy')
 
         # 2. 贪心选择5个动作
+        with self._phase('search', branch='greedy', candidates=len(candidates)):
+            selected = self._greedy_select(candidates, global_selected_ids)
+
+        # 3. 只在输出时生成结果字典
+        with self._phase('materialization'):
+            return [ex.to_dict() for ex in selected]
+
+    def _greedy_select(self, candidates: Dict[int, Dict],
+                       global_selected_ids: Set[int]) -> List[ScoredExercise]:
+        """贪心选择5个动作"""
         selected_exercises = []
-        selected_ids = set()
+        selected_ids = []
         selected_families = set()
+        day_constraints = self._get_day_constraints(candidates, global_selected_ids)
 
         for position in range(self.config['algorithm_params']['exercises_per_day']):
             best_exercise_id = None
@@ -41,12 +57,16 @@ class GreedySelector(BaseSelector):
             for exercise_id, data in candidates.items():
                 if exercise_id in selected_ids:
                     continue
+                # 硬约束：加入后剩余位置无法满足的动作直接跳过
+                if day_constraints is not None and \
+                        not day_constraints.can_add(exercise_id, selected_ids):
+                    continue
 
                 # 计算动态分数
                 dynamic_score = self._calculate_dynamic_score(
-                    data['exercise'],
+                    data['record'],
                     position,
-                    selected_exercises,
+                    selected_ids,
                     selected_families,
                     global_selected_ids
                 )
@@ -58,24 +78,22 @@ class GreedySelector(BaseSelector):
                     best_exercise_id = exercise_id
                     best_dynamic_score = dynamic_score
 
+            if best_exercise_id is None and day_constraints is not None:
+                # can_add 是精确的，只有当天根本不存在可行组合时才会走到这里
+                raise InfeasibleConstraintsError(
+                    f"no {self.config['algorithm_params']['exercises_per_day']}-exercise "
+                    f"combination of {len(candidates)} candidates satisfies the hard constraints")
+
             # 添加最佳动作
             if best_exercise_id:
-                selected_exercise = candidates[best_exercise_id]['exercise']
-
                 # 创建包含分数信息的动作记录
-                exercise_with_score = {
-                    'pk': selected_exercise['pk'],
-                    'name': selected_exercise['name'],
-                    'primaryMuscles': selected_exercise['primaryMuscles'],
-                    'secondaryMuscles': selected_exercise.get('secondaryMuscles', []),
-                    'static_score': round(candidates[best_exercise_id]['static_score'], 2),
-                    'dynamic_score': round(best_dynamic_score, 2),
-                    'score': round(best_score, 2),
-                    'position': position + 1
-                }
-
-                selected_exercises.append(exercise_with_score)
-                selected_ids.add(best_exercise_id)
+                selected_exercises.append(ScoredExercise(
+                    candidates[best_exercise_id]['record'],
+                    candidates[best_exercise_id]['static_score'],
+                    best_dynamic_score,
+                    position + 1
+                ))
+                selected_ids.append(best_exercise_id)
 
                 # 更新已选择的动作族
                 family = self._get_exercise_family(best_exercise_id)
@@ -1,9 +1,13 @@
 try:
     from .base_selector import BaseSelector
+    from .constraints import InfeasibleConstraintsError
+    from .records import ScoredExercise
 except ImportError:
     from base_selector import BaseSelector
+    from constraints import InfeasibleConstraintsError
+    from records import ScoredExercise
 from typing import List, Set, Dict
-from itertools import combinations
+import math
 import time
 
 
@@ -28,17 +32,22 @@ class HybridSelector(BaseSelector):
 
         if num_candidates <= 30:
             # 使用穷举算法
-            print(f"  Using exhaustive search ({num_candidates} candidates)")
-            return self._exhaustive_search(candidates, global_selected_ids)
+            self._stats.record_day(num_candidates, 'exhaustive')
+            result = self._exhaustive_search(candidates, global_selected_ids)
         else:
             # 使用贪心 + 2-opt
-            print(f"  Using greedy + 2-opt ({num_candidates} candidates)")
+            self._stats.record_day(num_candidates, 'greedy+2opt')
             greedy_result = self._greedy_search(
                 candidates, global_selected_ids)
-            return self._two_opt_improvement(greedy_result, candidates, global_selected_ids)
+            result = self._two_opt_improvement(
+                greedy_result, candidates, global_selected_ids)
+
+        # 输出边界：生成结果字典
+        with self._phase('materialization'):
+            return [ex.to_dict() for ex in result]
 
     def _exhaustive_search(self, candidates: Dict[int, Dict],
-                           global_selected_ids: Set[int]) -> List[Dict]:
+                           global_selected_ids: Set[int]) -> List[ScoredExercise]:
         """穷举所有5个动作的组合，找到最优解"""
         candidate_ids = list(candidates.keys())
 
@@ -46,26 +55,237 @@ class HybridSelector(BaseSelector):
             # 候选不足5个，返回所有
             return self._build_result_from_ids(candidate_ids, candidates, global_selected_ids)
 
-        best_combination = None
-        best_total_score = float('-inf')
+        # 分支定界穷举，只保留最优的一个组合
+        kept = []
+        with self._phase('search', branch='exhaustive', candidates=len(candidate_ids)):
+            self._search_top_combinations(
+                candidate_ids, candidates, global_selected_ids, kept, 1, 1)
+
+        if not kept:
+            # 分支定界是完整的：没有组合说明当天不存在满足硬约束的方案
+            raise InfeasibleConstraintsError(
+                f"no {self.config['algorithm_params']['exercises_per_day']}-exercise "
+                f"combination of {len(candidate_ids)} candidates satisfies the hard constraints")
+        best_combination = kept[0][1]
+
+        return self._build_result_from_ids(best_combination, candidates, global_selected_ids)
+
+    def select_day_alternatives(self, muscle_groups: List[str],
+                                global_selected_ids: Set[int], k: int = 3,
+                                min_difference: int = 1) -> List[List[Dict]]:
+        """
+        一次搜索返回当天得分最高的K个不同方案（"换一组"功能）
+
+        - 候选动作 ≤ 30个：在全部组合上穷举
+        - 候选动作 > 30个：在静态分数最高的候选（top_candidates_for_optimization）
+          加上贪心+2-opt解的动作上穷举，并以贪心+2-opt解作为初始方案
+
+        方案按总分从高到低依次选取，与已选方案差异不足 min_difference 的组合跳过；
+        穷举时只保留足以确定这K个方案的若干个最高分组合（见 _alternative_capacity）
+
+        Args:
+            muscle_groups: 当天要训练的肌群列表
+            global_selected_ids: 全周已选择的动作ID集合
+            k: 需要的方案数量
+            min_difference: 任意两个方案之间至少不同的动作数量
+
+        Returns:
+            按总分从高到低排列的方案列表，每个方案格式与 _select_exercises_for_day 相同
+        """
+        if k < 1 or min_difference < 1:
+            raise ValueError("k and min_difference must be at least 1")
+
+        candidates = self._get_candidate_exercises(
+            muscle_groups, global_selected_ids)
+        candidate_ids = list(candidates.keys())
+        exercises_per_day = self.config['algorithm_params']['exercises_per_day']
 
-        # 尝试所有组合
-        for combo in combinations(candidate_ids, 5):
-            total_score = self._evaluate_combination(
+        if len(candidate_ids) < exercises_per_day:
+            # 候选不足，只有一个方案
+            result = self._build_result_from_ids(
+                candidate_ids, candidates, global_selected_ids)
+            return [[ex.to_dict() for ex in result]]
+
+        kept = []  # [(总分, 组合)]，按总分降序
+
+        if len(candidate_ids) > 30:
+            # 候选过多：以贪心+2-opt解为初始方案，再在缩小的候选池上穷举
+            greedy_result = self._greedy_search(
+                candidates, global_selected_ids)
+            initial = self._two_opt_improvement(
+                greedy_result, candidates, global_selected_ids)
+            initial_combo = tuple(ex.pk for ex in initial)
+            kept.append((self._evaluate_combination(
+                initial_combo, candidates, global_selected_ids), initial_combo))
+
+            top_n = self.config['algorithm_params']['top_candidates_for_optimization']
+            top_ids = set(sorted(candidate_ids,
+                                 key=lambda pk: candidates[pk]['static_score'],
+                                 reverse=True)[:top_n])
+            top_ids.update(initial_combo)
+            day_constraints = self._get_day_constraints(
+                candidates, global_selected_ids)
+            if day_constraints is not None:
+                top_ids.update(day_constraints.required)
+            candidate_ids = [pk for pk in candidate_ids if pk in top_ids]
+
+        self._search_top_combinations(
+            candidate_ids, candidates, global_selected_ids, kept, k, min_difference)
+
+        alternatives = []
+        for combo in self._pick_alternatives(kept, k, min_difference):
+            result = self._build_result_from_ids(
                 combo, candidates, global_selected_ids)
+            alternatives.append([ex.to_dict() for ex in result])
+        return alternatives
 
-            if total_score > best_total_score:
-                best_total_score = total_score
-                best_combination = combo
+    def _search_top_combinations(self, candidate_ids: List[int],
+                                 candidates: Dict[int, Dict],
+                                 global_selected_ids: Set[int], kept: List[tuple],
+                                 k: int, min_difference: int) -> None:
+        """
+        分支定界枚举所有组合，分数最高的若干个组合写入有序列表 kept
+
+        kept 的容量见 _alternative_capacity（min_difference 为1时就是K），
+        调用前 kept 中已有的组合（如初始方案）也计入容量。
+        枚举顺序与 itertools.combinations 相同，组合分数与 _evaluate_combination
+        一致；前缀分数逐层累加。kept 已满时，若"前缀分数 + 剩余位置的分数上界"
+        不超过其中最低分，则整棵子树被剪掉。有硬约束时，不可行的动作不再展开；
+        某个必选动作被跳过后（组合只会向后取），其后的分支全部剪掉。
+        """
+        exercises_per_day = self.config['algorithm_params']['exercises_per_day']
+        num_candidates = len(candidate_ids)
+
+        # 剩余位置的分数上界：每个位置取 静态分 + 位置分 的最大值
+        # 多样性平衡和惩罚项只会扣分；若配置中出现正值则不剪枝
+        diversity = self.config['diversity_rules']
+        can_prune = diversity['balance_penalty'] <= 0 and all(
+            value <= 0 for value in diversity['penalties'].values())
+
+        suffix_bounds = [0.0] * (exercises_per_day + 1)
+        for position in reversed(range(exercises_per_day)):
+            best = max(candidates[pk]['static_score'] +
+                       self._calculate_position_score(pk, position)
+                       for pk in candidate_ids)
+            suffix_bounds[position] = suffix_bounds[position + 1] + best
+
+        day_constraints = self._get_day_constraints(candidates, global_selected_ids)
+        required_indices = []
+        if day_constraints is not None:
+            required_indices = sorted((index, exercise_id) for index, exercise_id
+                                      in enumerate(candidate_ids)
+                                      if exercise_id in day_constraints.required)
+
+        # 预先放入的组合可能与枚举到的组合相同，多留出相应的位置
+        capacity = self._alternative_capacity(
+            num_candidates, exercises_per_day, k, min_difference) + len(kept)
+
+        selected_so_far = []
+
+        def extend(start: int, position: int, prefix_score: float,
+                   selected_families: Set[str]) -> None:
+            if can_prune and len(kept) >= capacity and \
+                    prefix_score + suffix_bounds[position] <= kept[-1][0]:
+                return
+
+            last_start = num_candidates - (exercises_per_day - position) + 1
+            # 第一个尚未选入的必选动作之后的位置都不可行
+            for required_index, required_id in required_indices:
+                if required_id not in selected_so_far:
+                    last_start = min(last_start, required_index + 1)
+                    break
 
-        return self._build_result_from_ids(best_combination, candidates, global_selected_ids)
+            for index in range(start, last_start):
+                exercise_id = candidate_ids[index]
+                if day_constraints is not None and \
+                        not day_constraints.can_add(exercise_id, selected_so_far):
+                    continue
+                dynamic_score = self._calculate_dynamic_score(
+                    candidates[exercise_id]['record'],
+                    position,
+                    selected_so_far,
+                    selected_families,
+                    global_selected_ids
+                )
+                total_score = prefix_score + \
+                    (candidates[exercise_id]['static_score'] + dynamic_score)
+
+                if position + 1 == exercises_per_day:
+                    self._stats.combinations_evaluated += 1
+                    combo = tuple(selected_so_far) + (exercise_id,)
+                    self._keep_alternative(kept, combo, total_score, capacity)
+                    continue
+
+                family = self._get_exercise_family(exercise_id)
+                next_families = selected_families | {
+                    family} if family else selected_families
+
+                selected_so_far.append(exercise_id)
+                extend(index + 1, position + 1, total_score, next_families)
+                selected_so_far.pop()
+
+        extend(0, 0, 0, set())
+
+    @staticmethod
+    def _alternative_capacity(num_candidates: int, exercises_per_day: int,
+                              k: int, min_difference: int) -> int:
+        """
+        确定前K个方案所需保留的最高分组合数量
+
+        与某个组合差异不足 min_difference 的组合（包括它自己）最多有
+        B = Σ_{j<min_difference} C(每天动作数, j) × C(候选数 - 每天动作数, j) 个，
+        因此在任意 (K-1)×B+1 个组合中按分数依次选取，至少能选出K个方案：
+        分数更低（同分时枚举更晚）的组合不可能被选中，可以丢弃
+        """
+        conflicts = sum(math.comb(exercises_per_day, j) *
+                        math.comb(num_candidates - exercises_per_day, j)
+                        for j in range(min(min_difference, exercises_per_day + 1)))
+        return (k - 1) * conflicts + 1
+
+    @staticmethod
+    def _keep_alternative(kept: List[tuple], combo: tuple, total_score: float,
+                          capacity: int) -> None:
+        """把组合放入容量为 capacity 的有序列表（同分时先到者优先）"""
+        # 已满且不比最低分好，直接丢弃
+        if len(kept) >= capacity and total_score <= kept[-1][0]:
+            return
+
+        # 二分查找插入位置并保持降序（同分时新方案排在后面）
+        low, high = 0, len(kept)
+        while low < high:
+            middle = (low + high) // 2
+            if kept[middle][0] < total_score:
+                high = middle
+            else:
+                low = middle + 1
+        kept.insert(low, (total_score, combo))
+        del kept[capacity:]
+
+    @staticmethod
+    def _pick_alternatives(kept: List[tuple], k: int, min_difference: int) -> List[tuple]:
+        """按总分从高到低选取K个方案，跳过与已选方案差异不足 min_difference 的组合"""
+        picked = []
+        for _, combo in kept:
+            combo_ids = set(combo)
+            if all(len(combo_ids - set(other)) >= min_difference for other in picked):
+                picked.append(combo)
+                if len(picked) == k:
+                    break
+        return picked
 
     def _greedy_search(self, candidates: Dict[int, Dict],
-                       global_selected_ids: Set[int]) -> List[Dict]:
+                       global_selected_ids: Set[int]) -> List[ScoredExercise]:
         """贪心算法实现（与GreedySelector相同）"""
+        with self._phase('search', branch='greedy', candidates=len(candidates)):
+            return self._greedy_select(candidates, global_selected_ids)
+
+    def _greedy_select(self, candidates: Dict[int, Dict],
+                       global_selected_ids: Set[int]) -> List[ScoredExercise]:
+        """逐位置选择当前总分最高的动作"""
         selected_exercises = []
-        selected_ids = set()
+        selected_ids = []
         selected_families = set()
+        day_constraints = self._get_day_constraints(candidates, global_selected_ids)
 
         for position in range(self.config['algorithm_params']['exercises_per_day']):
             best_exercise_id = None
@@ -75,11 +295,15 @@ class HybridSelector(BaseSelector):
             for exercise_id, data in candidates.items():
                 if exercise_id in selected_ids:
                     continue
+                # 硬约束：加入后剩余位置无法满足的动作直接跳过
+                if day_constraints is not None and \
+                        not day_constraints.can_add(exercise_id, selected_ids):
+                    continue
 
                 dynamic_score = self._calculate_dynamic_score(
-                    data['exercise'],
+                    data['record'],
                     position,
-                    selected_exercises,
+                    selected_ids,
                     selected_families,
                     global_selected_ids
                 )
@@ -91,22 +315,20 @@ class HybridSelector(BaseSelector):
                     best_exercise_id = exercise_id
                     best_dynamic_score = dynamic_score
 
+            if best_exercise_id is None and day_constraints is not None:
+                # can_add 是精确的，只有当天根本不存在可行组合时才会走到这里
+                raise InfeasibleConstraintsError(
+                    f"no {self.config['algorithm_params']['exercises_per_day']}-exercise "
+                    f"combination of {len(candidates)} candidates satisfies the hard constraints")
+
             if best_exercise_id:
-                selected_exercise = candidates[best_exercise_id]['exercise']
-
-                exercise_with_score = {
-                    'pk': selected_exercise['pk'],
-                    'name': selected_exercise['name'],
-                    'primaryMuscles': selected_exercise['primaryMuscles'],
-                    'secondaryMuscles': selected_exercise.get('secondaryMuscles', []),
-                    'static_score': round(candidates[best_exercise_id]['static_score'], 2),
-                    'dynamic_score': round(best_dynamic_score, 2),
-                    'score': round(best_score, 2),
-                    'position': position + 1
-                }
-
-                selected_exercises.append(exercise_with_score)
-                selected_ids.add(best_exercise_id)
+                selected_exercises.append(ScoredExercise(
+                    candidates[best_exercise_id]['record'],
+                    candidates[best_exercise_id]['static_score'],
+                    best_dynamic_score,
+                    position + 1
+                ))
+                selected_ids.append(best_exercise_id)
 
                 family = self._get_exercise_family(best_exercise_id)
                 if family:
@@ -114,14 +336,19 @@ class HybridSelector(BaseSelector):
 
         return selected_exercises
 
-    def _two_opt_improvement(self, initial_solution: List[Dict],
+    def _two_opt_improvement(self, initial_solution: List[ScoredExercise],
                              candidates: Dict[int, Dict],
-                             global_selected_ids: Set[int]) -> List[Dict]:
+                             global_selected_ids: Set[int]) -> List[ScoredExercise]:
         """2-opt局部优化：尝试交换动作位置来改进解"""
-        current_solution = initial_solution.copy()
-        current_score = sum(ex['score'] for ex in current_solution)
+        with self._phase('search', branch='2-opt'):
+            return self._two_opt_search(initial_solution, candidates, global_selected_ids)
 
-        print(f"    Initial greedy score: {current_score:.2f}")
+    def _two_opt_search(self, initial_solution: List[ScoredExercise],
+                        candidates: Dict[int, Dict],
+                        global_selected_ids: Set[int]) -> List[ScoredExercise]:
+        """2-opt交换循环"""
+        current_solution = initial_solution.copy()
+        current_score = sum(ex.score for ex in current_solution)
 
         improved = True
         iterations = 0
@@ -130,49 +357,45 @@ class HybridSelector(BaseSelector):
         while improved and iterations < max_iterations:
             improved = False
             iterations += 1
-
-            # 尝试交换任意两个位置的动作
-            for i in range(5):
-                for j in range(i + 1, 5):
-                    # 创建新解：交换位置i和j的动作
-                    new_solution = self._swap_and_recalculate(
-                        current_solution, i, j, candidates, global_selected_ids
-                    )
-
-                    new_score = sum(ex['score'] for ex in new_solution)
-
-                    # 如果改进了，接受新解
-                    if new_score > current_score:
-                        current_solution = new_solution
-                        current_score = new_score
-                        improved = True
+            self._stats.two_opt_iterations += 1
+
+            with self.tracer.span('two_opt_iteration', category='iteration',
+                                  iteration=iterations):
+                # 尝试交换任意两个位置的动作
+                for i in range(len(current_solution)):
+                    for j in range(i + 1, len(current_solution)):
+                        # 创建新解：交换位置i和j的动作
+                        new_solution = self._swap_and_recalculate(
+                            current_solution, i, j, candidates, global_selected_ids
+                        )
+
+                        new_score = sum(ex.score for ex in new_solution)
+
+                        # 如果改进了，接受新解
+                        if new_score > current_score:
+                            current_solution = new_solution
+                            current_score = new_score
+                            improved = True
+                            break
+
+                    if improved:
                         break
 
-                if improved:
-                    break
-
-        print(
-            f"    After 2-opt: {current_score:.2f} ({iterations} iterations)")
-
         return current_solution
 
     def _evaluate_combination(self, combo: tuple, candidates: Dict[int, Dict],
                               global_selected_ids: Set[int]) -> float:
         """评估一个动作组合的总分"""
+        self._stats.combinations_evaluated += 1
         total_score = 0
         selected_families = set()
 
         for position, exercise_id in enumerate(combo):
-            # 构建已选动作列表（用于动态评分）
-            selected_so_far = []
-            for i in range(position):
-                selected_so_far.append({'pk': combo[i]})
-
-            # 计算动态分数
+            # 计算动态分数（已选动作即组合中的前几个）
             dynamic_score = self._calculate_dynamic_score(
-                candidates[exercise_id]['exercise'],
+                candidates[exercise_id]['record'],
                 position,
-                selected_so_far,
+                combo[:position],
                 selected_families,
                 global_selected_ids
             )
@@ -189,40 +412,33 @@ class HybridSelector(BaseSelector):
         return total_score
 
     def _build_result_from_ids(self, exercise_ids: tuple, candidates: Dict[int, Dict],
-                               global_selected_ids: Set[int]) -> List[Dict]:
+                               global_selected_ids: Set[int]) -> List[ScoredExercise]:
         """根据ID列表构建完整的结果"""
+        with self._phase('materialization'):
+            return self._materialize(exercise_ids, candidates, global_selected_ids)
+
+    def _materialize(self, exercise_ids: tuple, candidates: Dict[int, Dict],
+                     global_selected_ids: Set[int]) -> List[ScoredExercise]:
+        """逐位置重新计算动态分数，生成紧凑的结果记录"""
         result = []
         selected_families = set()
 
         for position, exercise_id in enumerate(exercise_ids):
-            # 构建已选动作列表
-            selected_so_far = result.copy()
-
             # 计算动态分数
             dynamic_score = self._calculate_dynamic_score(
-                candidates[exercise_id]['exercise'],
+                candidates[exercise_id]['record'],
                 position,
-                selected_so_far,
+                exercise_ids[:position],
                 selected_families,
                 global_selected_ids
             )
 
-            # 构建结果
-            exercise = candidates[exercise_id]['exercise']
-            static_score = candidates[exercise_id]['static_score']
-
-            exercise_with_score = {
-                'pk': exercise['pk'],
-                'name': exercise['name'],
-                'primaryMuscles': exercise['primaryMuscles'],
-                'secondaryMuscles': exercise.get('secondaryMuscles', []),
-                'static_score': round(static_score, 2),
-                'dynamic_score': round(dynamic_score, 2),
-                'score': round(static_score + dynamic_score, 2),
-                'position': position + 1
-            }
-
-            result.append(exercise_with_score)
+            result.append(ScoredExercise(
+                candidates[exercise_id]['record'],
+                candidates[exercise_id]['static_score'],
+                dynamic_score,
+                position + 1
+            ))
 
             # 更新族
             family = self._get_exercise_family(exercise_id)
@@ -231,15 +447,15 @@ class HybridSelector(BaseSelector):
 
         return result
 
-    def _swap_and_recalculate(self, solution: List[Dict], pos1: int, pos2: int,
+    def _swap_and_recalculate(self, solution: List[ScoredExercise], pos1: int, pos2: int,
                               candidates: Dict[int, Dict],
-                              global_selected_ids: Set[int]) -> List[Dict]:
+                              global_selected_ids: Set[int]) -> List[ScoredExercise]:
         """交换两个位置的动作并重新计算所有分数"""
         # 获取动作ID列表
-        exercise_ids = [ex['pk'] for ex in solution]
+        exercise_ids = [ex.pk for ex in solution]
 
         # 交换
         exercise_ids[pos1], exercise_ids[pos2] = exercise_ids[pos2], exercise_ids[pos1]
 
         # 重新计算（因为位置分数会变）
-        return self._build_result_from_ids(exercise_ids, candidates, global_selected_ids)
+        return self._materialize(exercise_ids, candidates, global_selected_ids)
@@ -0,0 +1,65 @@
+from typing import Dict, Iterator, Set, Tuple
+
+try:
+    from .base_selector import BaseSelector
+except ImportError:
+    from base_selector import BaseSelector
+
+
+# 支持的训练周期长度（周）
+MIN_WEEKS = 4
+MAX_WEEKS = 16
+
+
+def iter_mesocycle(selector: BaseSelector, weeks: int,
+                   rotation_window: int = 1) -> Iterator[Tuple[str, Dict]]:
+    """
+    逐周生成多周训练计划（惰性生成，按需求解下一周）
+
+    每周内部与 generate_weekly_plan 相同；前 rotation_window 周选过的动作
+    会受到 config 中 cross_week_repeat 的惩罚，使动作在各周之间轮换。
+    候选动作和静态分数在选择器内按配置缓存，各周之间只重新做搜索。
+
+    Args:
+        selector: 已设置好训练天数、系数和排除列表的选择器
+        weeks: 周数（4-16）
+        rotation_window: 参与跨周惩罚的前几周数量
+
+    Yields:
+        (周名称, 该周计划)
+    """
+    if not MIN_WEEKS <= weeks <= MAX_WEEKS:
+        raise ValueError(
+            f"weeks must be between {MIN_WEEKS} and {MAX_WEEKS}, got {weeks}")
+    if rotation_window < 1:
+        raise ValueError(
+            f"rotation_window must be at least 1, got {rotation_window}")
+
+    recent_weeks = []  # 最近几周各自选中的动作ID
+
+    try:
+        for week_index in range(weeks):
+            selector.previous_week_ids = set().union(*recent_weeks)
+
+            weekly_plan = selector.generate_weekly_plan()
+            yield f"Week {week_index + 1}", weekly_plan
+
+            recent_weeks.append(_plan_exercise_ids(weekly_plan))
+            if len(recent_weeks) > rotation_window:
+                recent_weeks.pop(0)
+    finally:
+        # 恢复单周模式
+        selector.previous_week_ids = set()
+
+
+def generate_mesocycle(selector: BaseSelector, weeks: int,
+                       rotation_window: int = 1) -> Dict:
+    """生成完整的多周训练计划"""
+    return dict(iter_mesocycle(selector, weeks, rotation_window))
+
+
+def _plan_exercise_ids(weekly_plan: Dict) -> Set[int]:
+    """一周计划中所有选中的动作ID"""
+    return {ex['pk']
+            for day_plan in weekly_plan.values()
+            for ex in day_plan['exercises']}
@@ -0,0 +1,261 @@
+import copy
+import hashlib
+import json
+from itertools import chain
+from typing import Dict, Iterable, List
+
+try:
+    from .base_selector import BaseSelector
+    from .compiled_catalog import (FLAG_SOURCES, CompiledCatalog, equipment_key,
+                                   equipment_of)
+    from .plan_stats import PlanStats
+    from .records import ExerciseRecord
+except ImportError:
+    from base_selector import BaseSelector
+    from compiled_catalog import (FLAG_SOURCES, CompiledCatalog, equipment_key,
+                                  equipment_of)
+    from plan_stats import PlanStats
+    from records import ExerciseRecord
+
+
+class _OverlayArray:
+    """按 pk 寻址的数组：先查租户覆盖，再查共享的基础数组"""
+
+    __slots__ = ('base', 'overrides', 'size', 'default')
+
+    def __init__(self, base, overrides: Dict[int, int], size: int, default: int = 0):
+        self.base = base
+        self.overrides = overrides
+        self.size = size
+        self.default = default  # 超出基础数组范围时的值
+
+    def __getitem__(self, exercise_id: int) -> int:
+        value = self.overrides.get(exercise_id)
+        if value is not None:
+            return value
+        if exercise_id < len(self.base):
+            return self.base[exercise_id]
+        return self.default
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class _OverlayRows:
+    """基础行 + 租户新增行，新增行排在基础行之后"""
+
+    __slots__ = ('base', 'added')
+
+    def __init__(self, base, added: List):
+        self.base = base
+        self.added = added
+
+    def __getitem__(self, row: int):
+        if row < len(self.base):
+            return self.base[row]
+        return self.added[row - len(self.base)]
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.added)
+
+    def __iter__(self):
+        return chain(self.base, self.added)
+
+
+class _GroupMembers:
+    """
+    租户视角下某个肌群的成员：基础成员中去掉改过肌群的动作，
+    再追加租户新增/改组后属于该肌群的动作（不复制基础成员）
+    """
+
+    __slots__ = ('base', 'regrouped', 'extra')
+
+    def __init__(self, base, regrouped: Dict[int, int], extra: List[int]):
+        self.base = base
+        self.regrouped = regrouped
+        self.extra = extra
+
+    def __iter__(self):
+        regrouped = self.regrouped
+        for exercise_id in self.base:
+            if exercise_id not in regrouped:
+                yield exercise_id
+        yield from self.extra
+
+    def __contains__(self, exercise_id: int) -> bool:
+        if exercise_id in self.regrouped:
+            return exercise_id in self.extra
+        return exercise_id in self.base
+
+
+class TenantOverlay:
+    """
+    单个租户相对共享动作库的增量
+
+    - additions: 新增动作（strength.json 格式），附带 "classification" 分类说明
+    - overrides: {pk: 分类说明}，只替换说明中出现的分类
+    - removals: 从租户动作库中移除的 pk
+
+    分类说明的格式：
+        {
+            "groups": ["chest", "tricep"],   # categoryMapping 肌群
+            "major": "Major",                # type1_isMajor 的分组
+            "compound": "compound",          # type2_isCompound
+            "single": "bilateral",           # type3_isSingle
+            "machine": "free",               # type4_isMachine
+            "common": "Common",              # type5_isCommon
+            "family": "Bench Press"          # type6_movementFamily，null 表示无族
+        }
+    """
+
+    def __init__(self, additions: List[Dict] = None, overrides: Dict[int, Dict] = None,
+                 removals: Iterable[int] = None):
+        self.additions = list(additions or [])
+        self.overrides = {int(pk): spec for pk, spec in (overrides or {}).items()}
+        self.removals = set(removals or [])
+
+    @classmethod
+    def from_file(cls, filepath: str) -> 'TenantOverlay':
+        """从 JSON 文件加载：{"additions": [...], "overrides": {...}, "removals": [...]}"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('additions'), data.get('overrides'), data.get('removals'))
+
+    def digest(self) -> str:
+        """增量内容的哈希（用于计划缓存键）"""
+        payload = {
+            'additions': self.additions,
+            'overrides': {str(pk): spec for pk, spec in sorted(self.overrides.items())},
+            'removals': sorted(self.removals)
+        }
+        encoded = json.dumps(payload, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def apply(self, base_selector: BaseSelector) -> BaseSelector:
+        """
+        创建租户选择器：与基础选择器共享动作记录、编译索引和配置，
+        只额外保存本租户的增量，内存占用与增量大小成正比
+        """
+        tenant = copy.copy(base_selector)
+
+        base_exercises = base_selector.exercises
+        added_exercises = [{key: value for key, value in exercise.items()
+                            if key != 'classification'} for exercise in self.additions]
+        added_records = [ExerciseRecord.from_dict(len(base_exercises) + index, exercise)
+                         for index, exercise in enumerate(added_exercises)]
+
+        tenant.exercises = _OverlayRows(base_exercises, added_exercises)
+        tenant.records = _OverlayRows(base_selector.records, added_records)
+        tenant.compiled_catalog = OverlayCatalog(
+            base_selector.compiled_catalog, len(base_exercises), self)
+        tenant.category_mapping = tenant.compiled_catalog.category_mapping()
+        tenant.classifications = None
+        tenant.overlay = self
+
+        # 用户配置和运行时状态不与基础选择器共享
+        tenant.MUSCLE_PREFERENCES = dict(base_selector.MUSCLE_PREFERENCES)
+        tenant.EXCLUDED_EXERCISES = set(base_selector.EXCLUDED_EXERCISES)
+        tenant.previous_week_ids = set()
+        tenant._stats = PlanStats()
+        tenant._candidate_cache = {}
+        tenant._candidate_cache_profile = None
+        return tenant
+
+
+class OverlayCatalog:
+    """
+    在共享 CompiledCatalog 之上叠加租户增量的只读索引
+    查询接口与 CompiledCatalog 相同，查找时租户增量优先
+    """
+
+    def __init__(self, base: CompiledCatalog, base_exercise_count: int,
+                 overlay: TenantOverlay):
+        self.base = base
+        self.group_names = base.group_names
+        self._group_bits = {name: 1 << index for index, name in enumerate(self.group_names)}
+
+        flags = {}
+        group_masks = {}
+        pk_rows = {exercise_id: -1 for exercise_id in overlay.removals}
+        families = {}
+
+        # 新增动作的器械，租户独有的器械编号排在基础器械之后
+        self.equipment_names = list(base.equipment_names)
+        self._equipment_ids = dict(base._equipment_ids)
+        equipment_ids = {}
+
+        specs = [(exercise['pk'], exercise.get('classification', {}))
+                 for exercise in overlay.additions]
+        for index, exercise in enumerate(overlay.additions):
+            pk_rows[exercise['pk']] = base_exercise_count + index
+            equipment = equipment_of(exercise['name'])
+            key = equipment_key(equipment)
+            if key not in self._equipment_ids:
+                self._equipment_ids[key] = len(self.equipment_names)
+                self.equipment_names.append(equipment)
+            equipment_ids[exercise['pk']] = self._equipment_ids[key]
+        specs.extend(overlay.overrides.items())
+
+        for exercise_id, spec in specs:
+            if 'groups' in spec:
+                group_masks[exercise_id] = self._encode_groups(spec['groups'])
+            if any(classification in spec for classification, _, _ in FLAG_SOURCES):
+                flags[exercise_id] = self._encode_flags(
+                    exercise_id, spec, flags.get(exercise_id),
+                    overlay.overrides.get(exercise_id) is spec)
+            if 'family' in spec:
+                families[exercise_id] = spec['family']
+
+        size = max([base.size] + [exercise_id + 1 for exercise_id in pk_rows])
+        self.size = size
+        self.exercise_count = base_exercise_count + len(overlay.additions)
+        self.flags = _OverlayArray(base.flags, flags, size)
+        self.group_masks = _OverlayArray(base.group_masks, group_masks, size)
+        self.pk_rows = _OverlayArray(base.pk_rows, pk_rows, size, default=-1)
+        self.equipment_ids = _OverlayArray(base.equipment_ids, equipment_ids, size)
+        self._family_overrides = families
+
+        # 肌群成员有变化的动作（新增动作和改了肌群的动作）
+        self._regrouped = group_masks
+
+    def _encode_groups(self, groups: List[str]) -> int:
+        mask = 0
+        for group in groups:
+            if group not in self._group_bits:
+                raise ValueError(f"unknown categoryMapping group: {group}")
+            mask |= self._group_bits[group]
+        return mask
+
+    def _encode_flags(self, exercise_id: int, spec: Dict, previous: int,
+                      is_override: bool) -> int:
+        # 覆盖已有动作时，未出现在说明中的分类保留原值
+        flags = previous or 0
+        if previous is None and is_override and exercise_id < self.base.size:
+            flags = self.base.flags[exercise_id]
+        for classification, group, flag in FLAG_SOURCES:
+            if classification not in spec:
+                continue
+            flags &= ~flag
+            if spec[classification] == group:
+                flags |= flag
+        return flags
+
+    def category_mapping(self) -> Dict[str, _GroupMembers]:
+        """{肌群: 成员pk}，基础成员在前，租户新增/改组的动作在后"""
+        mapping = {}
+        for name, members in self.base.category_mapping().items():
+            bit = self._group_bits[name]
+            extra = [exercise_id for exercise_id, mask in self._regrouped.items()
+                     if mask & bit]
+            mapping[name] = _GroupMembers(members, self._regrouped, extra)
+        return mapping
+
+    def group_bit(self, group_name: str) -> int:
+        return self._group_bits.get(group_name, 0)
+
+    equipment_mask = CompiledCatalog.equipment_mask
+
+    def family_name(self, exercise_id: int) -> str:
+        if exercise_id in self._family_overrides:
+            return self._family_overrides[exercise_id]
+        return self.base.family_name(exercise_id)
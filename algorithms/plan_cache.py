@@ -0,0 +1,290 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    from .base_selector import BaseSelector
+    from .compiled_catalog import CompiledCatalog, equipment_key
+    from .greedy_selector import GreedySelector
+    from .hybrid_selector import HybridSelector
+    from .sensitivity import PreferenceRegion, PreferenceSensitivity
+except ImportError:
+    from base_selector import BaseSelector
+    from compiled_catalog import CompiledCatalog, equipment_key
+    from greedy_selector import GreedySelector
+    from hybrid_selector import HybridSelector
+    from sensitivity import PreferenceRegion, PreferenceSensitivity
+
+# 工作进程中挂载共享索引后创建的选择器：{类名: 选择器}
+_worker_selectors = {}
+
+
+def _init_worker(catalog_path: str, selector_classes: List[type]) -> None:
+    """工作进程初始化：内存映射共享的编译索引，而不是各自加载和编译分类文件"""
+    compiled_catalog = CompiledCatalog.open_mmap(catalog_path)
+    for selector_class in selector_classes:
+        _worker_selectors[selector_class.__name__] = selector_class(
+            lazy_text=True, compiled_catalog=compiled_catalog)
+
+
+def _generate_in_worker(class_name: str, training_days: int) -> Dict:
+    selector = _worker_selectors[class_name]
+    selector.TRAINING_DAYS = training_days
+    return selector.generate_weekly_plan()
+
+
+class PlanCache:
+    """
+    训练计划两级缓存
+    - 第一级：进程内LRU（保存序列化后的计划，命中时反序列化返回副本）
+    - 第二级：本地SQLite文件，进程重启后依然有效
+
+    缓存键包含算法、训练天数、肌群系数、排除动作、内存中的评分配置（set_config）、
+    前几周已选动作，以及config.json、strength.json和所有分类文件的内容哈希，
+    数据文件一改动旧条目自动失效；
+    get_or_generate_by_region 以肌群系数所在的不变区域代替精确系数作为键
+    """
+
+    # 默认预热的选择器
+    DEFAULT_SELECTORS = {
+        'greedy': GreedySelector,
+        'hybrid': HybridSelector
+    }
+
+    # 按区域缓存时每个键下最多保留的区域数（超出时丢弃最早的）
+    max_regions_per_key = 32
+
+    def __init__(self, db_path: str, max_memory_entries: int = 256):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        # 文件内容哈希缓存：path -> (mtime_ns, size, sha256)
+        self._file_hashes = {}
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            "key TEXT PRIMARY KEY, plan TEXT NOT NULL, created REAL NOT NULL)")
+        self._conn.commit()
+
+        # 命中统计
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def default_path(cls, selector: BaseSelector) -> str:
+        """默认缓存文件位置：数据目录下的 out/plan_cache.sqlite"""
+        return os.path.join(selector.data_dir, 'out', 'plan_cache.sqlite')
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _file_hash(self, path: str) -> str:
+        """计算单个文件的内容哈希（按mtime和大小复用上次结果）"""
+        stat = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, value)
+        return value
+
+    def data_hash(self, selector: BaseSelector) -> str:
+        """config和所有动作/分类文件的组合哈希"""
+        digest = hashlib.sha256()
+        for path in selector.source_files:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            digest.update(self._file_hash(path).encode('ascii'))
+        # 租户选择器还要区分各自的增量
+        if selector.overlay is not None:
+            digest.update(selector.overlay.digest().encode('ascii'))
+        return digest.hexdigest()
+
+    def make_key(self, selector: BaseSelector, include_preferences: bool = True) -> str:
+        """
+        根据选择器的用户配置、当前评分配置、前几周已选动作和数据哈希生成缓存键
+        （可不含肌群系数）
+        """
+        payload = {
+            'algorithm': selector.__class__.__name__,
+            'training_days': selector.TRAINING_DAYS,
+            'excluded': sorted(selector.EXCLUDED_EXERCISES),
+            'constraints': selector.HARD_CONSTRAINTS,
+            'equipment': None if selector.AVAILABLE_EQUIPMENT is None
+            else sorted({equipment_key(name) for name in selector.AVAILABLE_EQUIPMENT}),
+            'cool_down': selector.COOL_DOWN_STRETCHES,
+            # set_config 可以在内存中替换评分配置，不能只依赖 config.json 的文件哈希
+            'config': selector.config,
+            'previous_weeks': sorted(selector.previous_week_ids),
+            'data': self.data_hash(selector)
+        }
+        if include_preferences:
+            payload['preferences'] = sorted(
+                (k, float(v)) for k, v in selector.MUSCLE_PREFERENCES.items())
+        encoded = json.dumps(payload, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """依次查找内存和磁盘，未命中返回None"""
+        serialized = self._memory.get(key)
+        if serialized is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return json.loads(serialized)
+
+        row = self._conn.execute(
+            "SELECT plan FROM plans WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._remember(key, row[0])
+            self.disk_hits += 1
+            return json.loads(row[0])
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, plan: Dict) -> None:
+        """写入内存和磁盘两级缓存"""
+        serialized = json.dumps(plan, ensure_ascii=False)
+        self._remember(key, serialized)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO plans (key, plan, created) VALUES (?, ?, ?)",
+            (key, serialized, time.time()))
+        self._conn.commit()
+
+    def _remember(self, key: str, serialized: str) -> None:
+        """放入LRU，超出容量时淘汰最久未用的条目"""
+        self._memory[key] = serialized
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_generate(self, selector: BaseSelector) -> Dict:
+        """命中则直接返回缓存计划，否则运行搜索并写入缓存"""
+        key = self.make_key(selector)
+        plan = self.get(key)
+        if plan is None:
+            plan = selector.generate_weekly_plan()
+            self.put(key, plan)
+        return plan
+
+    def get_or_generate_by_region(self, selector: BaseSelector) -> Dict:
+        """
+        按肌群系数区域命中：系数以外的配置相同的计划共用一个键，键下保存若干
+        (不变区域, 计划)。当前系数落在某个区域内时直接复用该计划，只按当前系数
+        重算静态分数和总分；否则求解，并把计划连同它的不变区域一起写入
+
+        区域内的计划与重新求解的结果相同：同分的比较按选择器的候选顺序和浮点
+        运算重算（见 PreferenceRegion），求解时的系数本身总是命中
+        """
+        key = 'region-v2:' + self.make_key(selector, include_preferences=False)
+        analysis = PreferenceSensitivity(selector)
+        preferences = analysis.preferences()
+
+        entries = self.get(key) or []
+        for entry in entries:
+            if PreferenceRegion.from_dict(entry['region']).contains(preferences):
+                return analysis.rescore(entry['plan'])
+
+        region, plan = analysis.region()
+        entries.append({'region': region.to_dict(), 'plan': plan})
+        self.put(key, entries[-self.max_regions_per_key:])
+        return plan
+
+    def clear(self) -> None:
+        """清空两级缓存"""
+        self._memory.clear()
+        self._conn.execute("DELETE FROM plans")
+        self._conn.commit()
+
+    def warm_up(self, selector_classes: List[type] = None, processes: int = 1) -> int:
+        """
+        预计算常用预设：所有训练模板 × 默认肌群系数和排除列表
+
+        Args:
+            selector_classes: 要预热的选择器类
+            processes: 大于1时在进程池中生成，编译索引只构建一次，
+                       写入缓存目录后由各工作进程内存映射共享
+
+        Returns:
+            新生成（此前未缓存）的计划数量
+        """
+        if selector_classes is None:
+            selector_classes = list(self.DEFAULT_SELECTORS.values())
+
+        # 先在主进程中找出未缓存的预设
+        missing = []
+        compiled_catalog = None
+        for selector_class in selector_classes:
+            selector = selector_class(compiled_catalog=compiled_catalog)
+            compiled_catalog = selector.compiled_catalog
+            for training_days in sorted(selector.training_templates, key=int):
+                selector.TRAINING_DAYS = int(training_days)
+                key = self.make_key(selector)
+                if self.get(key) is None:
+                    missing.append((selector, int(training_days), key))
+
+        if processes <= 1 or len(missing) <= 1:
+            for selector, training_days, key in missing:
+                selector.TRAINING_DAYS = training_days
+                self.put(key, selector.generate_weekly_plan())
+            return len(missing)
+
+        catalog_path = os.path.join(
+            os.path.dirname(os.path.abspath(self.db_path)), 'compiled_catalog.bin')
+        compiled_catalog.write(catalog_path)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(catalog_path, selector_classes)) as pool:
+            futures = [(key, pool.submit(_generate_in_worker,
+                                         selector.__class__.__name__, training_days))
+                       for selector, training_days, key in missing]
+            for key, future in futures:
+                self.put(key, future.result())
+        return len(missing)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Workout plan cache tools")
+    parser.add_argument('command', choices=['warmup', 'clear'])
+    parser.add_argument('--db', help="缓存文件路径（默认 out/plan_cache.sqlite）")
+    parser.add_argument('--algorithm', choices=['greedy', 'hybrid', 'all'],
+                        default='all')
+    parser.add_argument('--processes', type=int, default=1,
+                        help="预热时使用的工作进程数")
+    args = parser.parse_args()
+
+    if args.algorithm == 'all':
+        selector_classes = list(PlanCache.DEFAULT_SELECTORS.values())
+    else:
+        selector_classes = [PlanCache.DEFAULT_SELECTORS[args.algorithm]]
+
+    db_path = args.db or PlanCache.default_path(selector_classes[0]())
+    cache = PlanCache(db_path)
+
+    if args.command == 'clear':
+        cache.clear()
+        print(f"Cleared plan cache at {db_path}")
+    else:
+        start_time = time.time()
+        generated = cache.warm_up(selector_classes, args.processes)
+        print(f"Warmed up {generated} plans in {time.time() - start_time:.2f}s "
+              f"({db_path})")
+
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class PlanStats:
+    """
+    单次计划生成的分阶段耗时和热点计数
+
+    阶段耗时是"独占"时间：嵌套阶段的耗时只计入最内层阶段，
+    因此各阶段之和约等于总耗时
+    """
+
+    PHASES = (
+        'catalog_load',        # 加载动作库和分类文件（选择器初始化时）
+        'candidate_building',  # 根据肌群筛选候选动作
+        'static_scoring',      # 计算静态分数
+        'search',              # 贪心/穷举/2-opt 搜索
+        'materialization',     # 构建结果字典
+        'cool_down'            # 为训练日匹配放松拉伸
+    )
+
+    def __init__(self):
+        self.phase_times = {phase: 0.0 for phase in self.PHASES}
+        self.total_time = 0.0
+
+        # 热点计数
+        self.dynamic_score_evaluations = 0
+        self.combinations_evaluated = 0
+        self.two_opt_iterations = 0
+
+        # 每天的候选数量和搜索分支
+        self.candidates_per_day = {}
+        self.search_branches = {}
+        self.current_day = None
+
+        # 当前正在计时的阶段栈：[阶段名, 开始时间, 子阶段耗时]
+        self._phase_stack = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """统计一个阶段的独占耗时"""
+        entry = [name, time.perf_counter(), 0.0]
+        self._phase_stack.append(entry)
+        try:
+            yield
+        finally:
+            self._phase_stack.pop()
+            elapsed = time.perf_counter() - entry[1]
+            self.phase_times[name] = self.phase_times.get(
+                name, 0.0) + elapsed - entry[2]
+            if self._phase_stack:
+                self._phase_stack[-1][2] += elapsed
+
+    def record_day(self, num_candidates: int, branch: str) -> None:
+        """记录当天的候选数量和使用的搜索分支"""
+        self.candidates_per_day[self.current_day] = num_candidates
+        self.search_branches[self.current_day] = branch
+
+    def to_dict(self) -> Dict:
+        """转为可序列化的字典（耗时单位：毫秒）"""
+        return {
+            'total_ms': round(self.total_time * 1000, 3),
+            'phase_ms': {phase: round(seconds * 1000, 3)
+                         for phase, seconds in self.phase_times.items()},
+            'dynamic_score_evaluations': self.dynamic_score_evaluations,
+            'combinations_evaluated': self.combinations_evaluated,
+            'two_opt_iterations': self.two_opt_iterations,
+            'candidates_per_day': dict(self.candidates_per_day),
+            'search_branches': dict(self.search_branches)
+        }
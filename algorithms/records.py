@@ -0,0 +1,71 @@
+from typing import Dict, Tuple
+
+
+class ExerciseRecord:
+    """
+    动作库中单个动作的紧凑记录
+    只保存评分需要的字段，肌群使用不可变元组，在所有候选和结果之间共享
+    """
+
+    __slots__ = ('row', 'pk', 'name', 'primary_muscles', 'secondary_muscles')
+
+    def __init__(self, row: int, pk: int, name: str,
+                 primary_muscles: Tuple[str, ...], secondary_muscles: Tuple[str, ...]):
+        self.row = row  # 在动作库中的行号
+        self.pk = pk
+        self.name = name
+        self.primary_muscles = primary_muscles
+        self.secondary_muscles = secondary_muscles
+
+    @classmethod
+    def from_dict(cls, row: int, exercise: Dict) -> 'ExerciseRecord':
+        """从 strength.json 中的动作字典创建记录"""
+        return cls(row, exercise['pk'], exercise['name'],
+                   tuple(exercise.get('primaryMuscles', [])),
+                   tuple(exercise.get('secondaryMuscles', [])))
+
+    def __repr__(self) -> str:
+        return f"ExerciseRecord(pk={self.pk}, name={self.name!r})"
+
+
+class ScoredExercise:
+    """
+    搜索过程中选中的动作：引用动作记录并保存分数和位置
+    只有在输出时才通过 to_dict 生成完整的结果字典
+    """
+
+    __slots__ = ('record', 'static_score', 'dynamic_score', 'position')
+
+    def __init__(self, record: ExerciseRecord, static_score: float,
+                 dynamic_score: float, position: int):
+        self.record = record
+        self.static_score = static_score
+        self.dynamic_score = dynamic_score
+        self.position = position  # 从1开始
+
+    @property
+    def pk(self) -> int:
+        return self.record.pk
+
+    @property
+    def score(self) -> float:
+        """总分（保留两位小数，与输出结果一致）"""
+        return round(self.static_score + self.dynamic_score, 2)
+
+    def to_dict(self) -> Dict:
+        """生成输出用的结果字典"""
+        record = self.record
+        return {
+            'pk': record.pk,
+            'name': record.name,
+            'primaryMuscles': list(record.primary_muscles),
+            'secondaryMuscles': list(record.secondary_muscles),
+            'static_score': round(self.static_score, 2),
+            'dynamic_score': round(self.dynamic_score, 2),
+            'score': self.score,
+            'position': self.position
+        }
+
+    def __repr__(self) -> str:
+        return (f"ScoredExercise(pk={self.pk}, position={self.position}, "
+                f"score={self.score})")
@@ -0,0 +1,130 @@
+from typing import Dict, List, Set, Tuple
+
+try:
+    from .base_selector import BaseSelector
+except ImportError:
+    from base_selector import BaseSelector
+
+
+def apply_profile_delta(selector: BaseSelector, delta: Dict) -> Tuple[Dict, Set[int]]:
+    """
+    把用户配置变更应用到选择器上
+
+    Args:
+        selector: 选择器实例（当前配置即生成旧计划时的配置）
+        delta: 配置变更，支持以下键（均可省略）
+            - "exclude": 新增排除的动作ID列表
+            - "include": 取消排除的动作ID列表
+            - "preferences": 修改后的肌群系数，如 {"shoulder": 1.5}
+
+    Returns:
+        (旧的肌群系数, 旧的排除列表)
+    """
+    old_preferences = dict(selector.MUSCLE_PREFERENCES)
+    old_excluded = set(selector.EXCLUDED_EXERCISES)
+
+    preferences = dict(old_preferences)
+    preferences.update(delta.get('preferences', {}))
+
+    excluded = set(old_excluded)
+    excluded.update(delta.get('exclude', []))
+    excluded.difference_update(delta.get('include', []))
+
+    # 写到实例上，不影响类级默认配置
+    selector.MUSCLE_PREFERENCES = preferences
+    selector.EXCLUDED_EXERCISES = excluded
+
+    return old_preferences, old_excluded
+
+
+def replan_weekly_plan(selector: BaseSelector, previous_plan: Dict,
+                       delta: Dict) -> Tuple[Dict, List[str]]:
+    """
+    增量重新规划：只重新求解受配置变更影响的训练日
+
+    某天需要重新求解，当且仅当以下任一条件成立：
+    1. 排除列表的变动动作出现在当天的候选池中
+    2. 当天候选动作涉及系数被修改的肌群大类（静态分数会变化）
+    3. 前面几天的选择发生了变化，且变化的动作出现在当天候选池中
+       （通过 global_selected_ids 的全周重复惩罚耦合）
+
+    其余训练日的输入与旧计划完全相同，直接沿用旧结果
+
+    Args:
+        selector: 生成 previous_plan 时使用的选择器（同一算法和数据）
+        previous_plan: generate_weekly_plan 返回的旧计划
+        delta: 配置变更，格式见 apply_profile_delta
+
+    Returns:
+        (新计划, 重新求解的训练日名称列表)
+    """
+    old_preferences, old_excluded = apply_profile_delta(selector, delta)
+
+    # 变动的排除动作
+    changed_excluded = old_excluded ^ selector.EXCLUDED_EXERCISES
+
+    # 系数被修改的肌群大类所包含的具体肌群
+    changed_muscles = set()
+    for category, coefficient in selector.MUSCLE_PREFERENCES.items():
+        if old_preferences.get(category, 1.0) != coefficient:
+            changed_muscles.update(
+                selector.preference_mapping.get(category, []))
+
+    template = selector.training_templates[str(selector.TRAINING_DAYS)]
+
+    weekly_plan = {}
+    replanned_days = []
+    old_global_ids = set()  # 旧计划到当前为止的已选动作
+    new_global_ids = set()  # 新计划到当前为止的已选动作
+
+    for day_index, muscle_groups in enumerate(template):
+        day_name = f"Day {day_index + 1}"
+        previous_day = previous_plan[day_name]
+
+        # 休息日不受影响
+        if not muscle_groups:
+            weekly_plan[day_name] = previous_day
+            continue
+
+        previous_ids = [ex['pk'] for ex in previous_day['exercises']]
+        candidate_ids = selector._get_candidate_ids(muscle_groups)
+
+        affected = bool(candidate_ids & changed_excluded)
+        if not affected and changed_muscles:
+            affected = _involves_muscles(
+                selector, candidate_ids, changed_muscles)
+        if not affected:
+            affected = bool(candidate_ids & (old_global_ids ^ new_global_ids))
+
+        if affected:
+            exercises_with_scores = selector._select_exercises_for_day(
+                muscle_groups,
+                new_global_ids
+            )
+            weekly_plan[day_name] = selector._build_day_plan(
+                muscle_groups, exercises_with_scores)
+            replanned_days.append(day_name)
+        else:
+            weekly_plan[day_name] = previous_day
+
+        old_global_ids.update(previous_ids)
+        new_global_ids.update(
+            ex['pk'] for ex in weekly_plan[day_name]['exercises'])
+
+    return weekly_plan, replanned_days
+
+
+def _involves_muscles(selector: BaseSelector, candidate_ids: Set[int],
+                      muscles: Set[str]) -> bool:
+    """候选动作中是否有动作的主/次肌群涉及给定肌群"""
+    for exercise_id in candidate_ids:
+        record = selector._get_record(exercise_id)
+        if record is None or exercise_id in selector.EXCLUDED_EXERCISES:
+            continue
+        for muscle in record.primary_muscles:
+            if muscle in muscles:
+                return True
+        for muscle in record.secondary_muscles:
+            if muscle in muscles:
+                return True
+    return False
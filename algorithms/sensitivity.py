@@ -0,0 +1,664 @@
+import argparse
+import math
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+try:
+    from .compiled_catalog import COMMON
+    from .hybrid_selector import HybridSelector
+except ImportError:
+    from compiled_catalog import COMMON
+    from hybrid_selector import HybridSelector
+
+# 不指定范围时分析的偏好系数区间
+DEFAULT_RANGE = (0.0, 3.0)
+
+# 越过断点后重新求解的步长（两个断点间距小于该值时视为同一个）
+RESOLUTION = 1e-6
+
+# 精确算术下的领先幅度不超过该值即视为同分（浮点误差远小于它）
+_EPSILON = 1e-9
+
+
+def _dot(weights: Dict[str, float], preferences: Dict[str, float]) -> float:
+    return sum(weight * preferences[category] for category, weight in weights.items())
+
+
+def _replay_total(recipe, preferences: Dict[str, float]) -> float:
+    """按 _calculate_static_score 的运算顺序重算总分，浮点结果与选择器逐位相同"""
+    terms, bonus, dynamic_score = recipe
+    score = 0
+    for share, category in terms:
+        score += share * (1.0 if category is None else preferences[category])
+    if bonus:
+        score += bonus
+    return score + dynamic_score
+
+
+def _rounded_sum(items, preferences: Dict[str, float]) -> float:
+    """与 2-opt 相同：各动作总分保留两位小数后按位置顺序求和"""
+    return sum(round(_replay_total(item, preferences), 2) for item in items)
+
+
+class _DayState:
+    """
+    某个系数下单个训练日的求解结果及其不变性证明
+    - fixed: 休息日或候选不足，与系数无关
+    - greedy: 贪心（含混合算法的贪心+2-opt）每一步的胜出条件，
+      rows 为 {系数方向: 常数} 形式的不等式 c + a·p > 0，
+      ties 为 {系数方向: [在当前系数处同分的候选对]}，胜负由候选顺序和浮点舍入决定；
+      混合算法的 2-opt 比较两位小数舍入后的总分，orderings 为舍入可能改变结论的比较
+    - exhaustive: 穷举最优组合的分数（value）和斜率（slopes），
+      以及与次优组合的差距和任意组合斜率的上下界（用于多系数区域）
+    """
+
+    __slots__ = ('muscle_groups', 'selected_before', 'picks', 'kind', 'rows', 'ties',
+                 'orderings', 'value', 'slopes', 'gap', 'min_slopes', 'max_slopes')
+
+    def __init__(self, muscle_groups: List[str], selected_before: frozenset,
+                 picks: Tuple[int, ...], kind: str):
+        self.muscle_groups = muscle_groups
+        self.selected_before = selected_before
+        self.picks = picks
+        self.kind = kind
+        self.rows = {}
+        self.ties = {}
+        self.orderings = []
+        self.value = 0.0
+        self.slopes = {}
+        self.gap = math.inf
+        self.min_slopes = {}
+        self.max_slopes = {}
+
+
+class PlanSegment:
+    """沿一个系数方向周计划保持不变的区间 [low, high]，picks 为区间中点处的计划"""
+
+    __slots__ = ('low', 'high', 'picks')
+
+    def __init__(self, low: float, high: float, picks: Tuple[Tuple[int, ...], ...]):
+        self.low = low
+        self.high = high
+        self.picks = picks  # 每天选中的动作ID（按位置），休息日为空
+
+    def to_dict(self) -> Dict:
+        return {'low': round(self.low, 6), 'high': round(self.high, 6),
+                'picks': [list(day) for day in self.picks]}
+
+    def __repr__(self) -> str:
+        return f"PlanSegment({self.low:.4f}, {self.high:.4f})"
+
+
+class PreferenceRegion:
+    """
+    所有肌群系数同时变化时周计划保持不变的区域（用作计划缓存的键）
+    - rows: 贪心日的胜出条件 c + Σ a[大类]·p[大类] > 0，以及在求解系数处同分的
+      候选对；同分的比较由选择器的候选顺序（严格大于才替换）和浮点舍入决定，
+      落在这类边界上时按选择器的运算顺序重算两者的浮点总分，胜负不变才算在区域内
+    - orderings: 2-opt 中舍入可能改变结论的比较，重算两种顺序舍入后的总分，
+      是否交换的结论不变才算在区域内
+    - bounds: 穷举日的充分条件：最优组合领先次优组合 gap，其他组合在每个大类上的
+      斜率在 [min, max] 之间，因此 gap + Σ (Δ·S − max(Δ·min, Δ·max)) > 0 时最优组合不变
+    origin（求解时的系数）本身总在区域内。
+    区域是保守的：区域内计划一定相同，区域外不一定不同
+    """
+
+    def __init__(self, rows: List[Tuple[float, Dict[str, float], List[Dict]]],
+                 bounds: List[Dict], orderings: List[Dict] = (),
+                 origin: Dict[str, float] = None):
+        self.rows = rows
+        self.bounds = bounds
+        self.orderings = list(orderings)
+        self.origin = origin
+
+    def contains(self, preferences: Dict[str, float]) -> bool:
+        if preferences == self.origin:
+            return True
+        for constant, weights, ties in self.rows:
+            margin = constant + _dot(weights, preferences)
+            if margin > _EPSILON:
+                continue
+            if margin < -_EPSILON or not ties:
+                return False
+            for tie in ties:
+                winner = _replay_total(tie['winner'], preferences)
+                other = _replay_total(tie['other'], preferences)
+                # 胜者排在对方之后时必须严格更高，排在前面时不低于对方即可
+                if winner < other or (winner == other and tie['strict']):
+                    return False
+        for ordering in self.orderings:
+            swapped = _rounded_sum(ordering['swapped'], preferences) > \
+                _rounded_sum(ordering['current'], preferences)
+            if swapped != ordering['swapped_wins']:
+                return False
+        for bound in self.bounds:
+            if bound['gap'] is None:
+                continue  # 当天只有一个可行组合
+            margin = bound['gap']
+            for category, origin in bound['origin'].items():
+                delta = preferences[category] - origin
+                margin += delta * bound['slopes'].get(category, 0.0) - max(
+                    delta * bound['min'].get(category, 0.0),
+                    delta * bound['max'].get(category, 0.0))
+            if margin <= _EPSILON:
+                return False
+        return True
+
+    def to_dict(self) -> Dict:
+        return {'rows': [list(row) for row in self.rows], 'bounds': self.bounds,
+                'orderings': self.orderings, 'origin': self.origin}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PreferenceRegion':
+        return cls([tuple(row) for row in data['rows']], data['bounds'],
+                   data.get('orderings', []), data.get('origin'))
+
+
+class PreferenceSensitivity:
+    """
+    肌群系数的参数化灵敏度分析
+
+    静态分数对六个大类系数是线性的：每个动作的静态分数 = 常数 + Σ 权重[大类] × 系数[大类]，
+    动态分数与系数无关。因此沿某个系数 t 变化时，所有比较都是 t 的一次函数：
+    - 贪心日：重放每一步的选择，胜者与其他候选的分差是一次函数，
+      所有分差保持非负的区间内计划不变，区间端点就是精确的断点
+    - 穷举日：当天最优值是有限个组合分数（直线）的最大值，是 t 的凸函数；
+      从当前组合出发，在区间端点求解，若出现更优的组合则取两条直线的交点继续求解，
+      交点处不再有更优组合时即为第一个断点，每个断点只需要少量求解
+    前面的训练日不变时，后一天的候选和动态分数也不变，按天依次收紧区间即可。
+    整个分析只在断点附近重新求解，不需要在系数网格上逐点生成计划。
+
+    同分时选择器按候选顺序取先出现的一个（严格大于才替换），而数学上同分的两个候选
+    （如肌群构成不同但权重相同）的浮点总分可能差一个舍入误差，胜负随系数来回变化。
+    因此区域中同分的比较按选择器的候选顺序和浮点运算逐一重算（2-opt 的舍入比较同理）；
+    分段在每段中点求解，只因同分换了选择的相邻两段合并为一段。
+    """
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.categories = list(selector.preference_mapping)
+        self._muscle_categories = {}
+        for category, muscles in selector.preference_mapping.items():
+            for muscle in muscles:
+                # 与 _get_muscle_preference 一致：取第一个包含该肌群的大类
+                self._muscle_categories.setdefault(muscle, category)
+        self._weights = {}  # {动作ID: {大类: 权重}}
+        self._recipes = {}  # {动作ID: (静态分数的各项, 常用加分)}
+
+    def preferences(self) -> Dict[str, float]:
+        """选择器当前的系数（未设置的大类为1.0）"""
+        return {category: float(self.selector.MUSCLE_PREFERENCES.get(category, 1.0))
+                for category in self.categories}
+
+    def weights(self, exercise_id: int) -> Dict[str, float]:
+        """动作静态分数中各大类系数的权重（与 _calculate_static_score 的分摊方式相同）"""
+        weights = self._weights.get(exercise_id)
+        if weights is not None:
+            return weights
+
+        record = self.selector._get_record(exercise_id)
+        scoring = self.selector.config['scoring_weights']
+        weights = {}
+        for muscles, base in ((record.primary_muscles, scoring['primary_muscle']['base_score']),
+                              (record.secondary_muscles,
+                               scoring['secondary_muscle']['base_score'])):
+            if not muscles:
+                continue
+            share = base / len(muscles)
+            for muscle in muscles:
+                category = self._muscle_categories.get(muscle)
+                if category is not None:  # 不属于任何大类的肌群系数固定为1，计入常数
+                    weights[category] = weights.get(category, 0.0) + share
+        self._weights[exercise_id] = weights
+        return weights
+
+    def _recipe(self, exercise_id: int) -> Tuple[tuple, float]:
+        """静态分数的浮点运算步骤：按肌群顺序的 (分摊分数, 大类)，以及常用加分"""
+        recipe = self._recipes.get(exercise_id)
+        if recipe is not None:
+            return recipe
+
+        record = self.selector._get_record(exercise_id)
+        scoring = self.selector.config['scoring_weights']
+        terms = []
+        for muscles, base in ((record.primary_muscles, scoring['primary_muscle']['base_score']),
+                              (record.secondary_muscles,
+                               scoring['secondary_muscle']['base_score'])):
+            if muscles:
+                share = base / len(muscles)
+                terms.extend((share, self._muscle_categories.get(muscle)) for muscle in muscles)
+        bonus = scoring['common_exercise_bonus']['score'] \
+            if self.selector.compiled_catalog.flags[exercise_id] & COMMON else 0
+        recipe = (tuple(terms), bonus)
+        self._recipes[exercise_id] = recipe
+        return recipe
+
+    def _slopes(self, exercise_ids) -> Dict[str, float]:
+        slopes = {}
+        for exercise_id in exercise_ids:
+            for category, weight in self.weights(exercise_id).items():
+                slopes[category] = slopes.get(category, 0.0) + weight
+        return slopes
+
+    @contextmanager
+    def _using(self, preferences: Dict[str, float]):
+        """临时替换选择器的系数（候选缓存按系数区分，退出后恢复原配置）"""
+        selector = self.selector
+        own = 'MUSCLE_PREFERENCES' in vars(selector)
+        saved = selector.MUSCLE_PREFERENCES
+        selector.MUSCLE_PREFERENCES = dict(saved, **preferences)
+        try:
+            yield
+        finally:
+            if own:
+                selector.MUSCLE_PREFERENCES = saved
+            else:
+                del selector.MUSCLE_PREFERENCES
+
+    # ========== 求解与证明 ==========
+
+    def _solve(self, preferences: Dict[str, float]) -> Tuple[List[_DayState], Dict]:
+        """在给定系数下生成周计划，并为每个训练日记录不变性证明"""
+        days = []
+        weekly_plan = {}
+        with self._using(preferences):
+            selected_before = frozenset()
+            for day_name, day_plan, selected in self.selector.iter_weekly_plan():
+                picks = tuple(exercise['pk'] for exercise in day_plan['exercises'])
+                if picks:
+                    days.append(self._certify(day_plan['muscle_groups'], selected_before,
+                                              picks, preferences))
+                else:
+                    days.append(_DayState([], selected_before, (), 'fixed'))
+                weekly_plan[day_name] = day_plan
+                selected_before = selected
+        return days, weekly_plan
+
+    def _certify(self, muscle_groups: List[str], selected_before: frozenset,
+                 picks: Tuple[int, ...], preferences: Dict[str, float]) -> _DayState:
+        """按选择器实际走的分支记录当天的证明（与 HybridSelector 的分支条件一致）"""
+        selector = self.selector
+        global_selected_ids = set(selected_before)
+        candidates = selector._get_candidate_exercises(muscle_groups, global_selected_ids)
+        exercises_per_day = selector.config['algorithm_params']['exercises_per_day']
+
+        if isinstance(selector, HybridSelector) and len(candidates) <= 30:
+            if len(candidates) < exercises_per_day:
+                return _DayState(muscle_groups, selected_before, picks, 'fixed')
+            # 选择器已保证当天存在满足硬约束的完整组合（否则抛出 InfeasibleConstraintsError）
+            kept = []
+            selector._search_top_combinations(
+                list(candidates), candidates, global_selected_ids, kept, 2, 1)
+            day = _DayState(muscle_groups, selected_before, picks, 'exhaustive')
+            day.value = kept[0][0]
+            day.slopes = self._slopes(picks)
+            if len(kept) > 1:
+                day.gap = kept[0][0] - kept[1][0]
+            for category in self.categories:
+                column = sorted(self.weights(pk).get(category, 0.0) for pk in candidates)
+                day.min_slopes[category] = sum(column[:exercises_per_day])
+                day.max_slopes[category] = sum(column[-exercises_per_day:])
+            return day
+
+        day = _DayState(muscle_groups, selected_before, picks, 'greedy')
+        day.rows, day.ties = self._greedy_rows(candidates, global_selected_ids, preferences)
+        if isinstance(selector, HybridSelector):
+            day.orderings = self._two_opt_orderings(candidates, global_selected_ids)
+        return day
+
+    def _greedy_rows(self, candidates: Dict[int, Dict], global_selected_ids: set,
+                     preferences: Dict[str, float]) -> Tuple[Dict[tuple, float], Dict]:
+        """
+        重放 _greedy_select，记录每一步胜者领先其他候选的条件
+        同一系数方向只保留最紧的常数；权重相同（方向为空）且明显领先的比较恒成立，
+        不记录。在当前系数处同分的候选对另外记入 ties，静态分数的运算步骤完全相同
+        （浮点结果逐位相同）的候选对胜负只由候选顺序决定，不必记录。
+        混合算法的 2-opt 只交换已选动作的位置，由 _two_opt_orderings 单独记录
+        """
+        selector = self.selector
+        day_constraints = selector._get_day_constraints(candidates, global_selected_ids)
+        selected_ids = []
+        selected_families = set()
+        rows = {}
+        ties = {}
+
+        for position in range(selector.config['algorithm_params']['exercises_per_day']):
+            dynamic_scores = {}
+            best_exercise_id = None
+            best_score = float('-inf')
+            for exercise_id, data in candidates.items():
+                if exercise_id in selected_ids:
+                    continue
+                if day_constraints is not None and \
+                        not day_constraints.can_add(exercise_id, selected_ids):
+                    continue
+                dynamic_score = selector._calculate_dynamic_score(
+                    data['record'], position, selected_ids, selected_families,
+                    global_selected_ids)
+                dynamic_scores[exercise_id] = dynamic_score
+                total_score = data['static_score'] + dynamic_score
+                if total_score > best_score:
+                    best_score = total_score
+                    best_exercise_id = exercise_id
+            if best_exercise_id is None:
+                break
+
+            winner_weights = self.weights(best_exercise_id)
+            winner_recipe = self._recipe(best_exercise_id)
+            strict = True  # 排在胜者之前的候选，胜者必须严格更高
+            for exercise_id, dynamic_score in dynamic_scores.items():
+                if exercise_id == best_exercise_id:
+                    strict = False
+                    continue
+                lead = best_score - candidates[exercise_id]['static_score'] - dynamic_score
+                weights = dict(winner_weights)
+                for category, weight in self.weights(exercise_id).items():
+                    weights[category] = weights.get(category, 0.0) - weight
+                direction = tuple(sorted((category, weight) for category, weight
+                                         in weights.items() if abs(weight) > _EPSILON))
+                recipe = self._recipe(exercise_id)
+                if lead <= 4 * _EPSILON and recipe != winner_recipe:
+                    ties.setdefault(direction, []).append({
+                        'winner': [winner_recipe[0], winner_recipe[1],
+                                   dynamic_scores[best_exercise_id]],
+                        'other': [recipe[0], recipe[1], dynamic_score],
+                        'strict': strict
+                    })
+                elif not direction:
+                    continue
+                constant = lead - _dot(dict(direction), preferences)
+                if direction not in rows or constant < rows[direction]:
+                    rows[direction] = constant
+
+            selected_ids.append(best_exercise_id)
+            family = selector._get_exercise_family(best_exercise_id)
+            if family:
+                selected_families.add(family)
+
+        # 只有在当前系数处最紧的条件同分时才需要重算；领先 4ε 以内的候选对都保留，
+        # 其余候选对在该方向上的分差比最紧的条件至少大 3ε，不会同分
+        ties = {direction: pairs for direction, pairs in ties.items()
+                if rows[direction] + _dot(dict(direction), preferences) <= _EPSILON}
+        return rows, ties
+
+    def _two_opt_orderings(self, candidates: Dict[int, Dict],
+                           global_selected_ids: set) -> List[Dict]:
+        """
+        重放 HybridSelector._two_opt_search，记录舍入可能改变结论的比较
+
+        交换只改变位置，两种顺序的静态分数之和相同，精确分差就是动态分数之差；
+        但每个动作的总分先保留两位小数再求和，每项舍入误差不超过 0.005，
+        动态分数之差超过全部舍入误差之和的比较结论与系数无关，不必记录
+        """
+        selector = self.selector
+        current = selector._greedy_select(candidates, global_selected_ids)
+        current_score = sum(ex.score for ex in current)
+        rounding = 0.01 * len(current)
+        orderings = []
+
+        improved = True
+        iterations = 0
+        while improved and iterations < 100:
+            improved = False
+            iterations += 1
+            for i in range(len(current)):
+                for j in range(i + 1, len(current)):
+                    swapped = selector._swap_and_recalculate(
+                        current, i, j, candidates, global_selected_ids)
+                    swapped_score = sum(ex.score for ex in swapped)
+                    swapped_wins = swapped_score > current_score
+                    if abs(sum(ex.dynamic_score for ex in swapped) -
+                           sum(ex.dynamic_score for ex in current)) <= rounding:
+                        orderings.append({
+                            'swapped': [self._replay_item(ex) for ex in swapped],
+                            'current': [self._replay_item(ex) for ex in current],
+                            'swapped_wins': swapped_wins
+                        })
+                    if swapped_wins:
+                        current, current_score = swapped, swapped_score
+                        improved = True
+                        break
+                if improved:
+                    break
+        return orderings
+
+    def _replay_item(self, scored) -> List:
+        terms, bonus = self._recipe(scored.pk)
+        return [terms, bonus, scored.dynamic_score]
+
+    def _best_combination(self, day: _DayState,
+                          preferences: Dict[str, float]) -> Tuple[float, tuple]:
+        """前面的训练日不变时，当天在给定系数下的最优组合"""
+        selector = self.selector
+        global_selected_ids = set(day.selected_before)
+        with self._using(preferences):
+            candidates = selector._get_candidate_exercises(
+                day.muscle_groups, global_selected_ids)
+            kept = []
+            selector._search_top_combinations(
+                list(candidates), candidates, global_selected_ids, kept, 1, 1)
+        return kept[0]
+
+    # ========== 沿单个系数的分析 ==========
+
+    def _stable_end(self, days: List[_DayState], preferences: Dict[str, float],
+                    category: str, limit: float) -> float:
+        """
+        从当前系数出发沿 category 移动到 limit 的途中，周计划第一次变化的位置
+        （limit 可以小于当前值，表示向下移动）；到达 limit 仍不变时返回 limit
+        """
+        origin = preferences[category]
+        sign = 1.0 if limit >= origin else -1.0
+
+        for day in days:
+            if day.kind == 'greedy':
+                for direction, constant in day.rows.items():
+                    weights = dict(direction)
+                    # 沿移动方向每走一个单位，领先幅度的变化
+                    rate = weights.get(category, 0.0) * sign
+                    if rate < 0:
+                        margin = max(constant + _dot(weights, preferences), 0.0)
+                        distance = min(abs(limit - origin), margin / -rate)
+                        limit = origin + sign * distance
+            elif day.kind == 'exhaustive' and limit != origin:
+                limit = self._envelope_end(day, preferences, category, limit)
+        return limit
+
+    def _envelope_end(self, day: _DayState, preferences: Dict[str, float],
+                      category: str, limit: float) -> float:
+        """
+        穷举日最优值是凸的分段线性函数：在 limit 处求解，若出现分数高于当前组合
+        直线的组合，则移到两条直线的交点继续，直到交点处当前组合仍是最优
+        """
+        origin = preferences[category]
+        slope = day.slopes.get(category, 0.0)
+        picks = set(day.picks)
+        point = limit
+        while True:
+            value, combo = self._best_combination(day, dict(preferences, **{category: point}))
+            line = day.value + slope * (point - origin)
+            if set(combo) == picks or value <= line + _EPSILON * max(1.0, abs(value)):
+                return point
+            other_slope = self._slopes(combo).get(category, 0.0)
+            if other_slope == slope:
+                return origin  # 平行且更高：当前系数处已经同分
+            # 新组合在 point 处更高、在当前系数处不高于当前组合，交点在两者之间
+            point += (value - line) / (slope - other_slope)
+
+    def segments(self, category: str, low: float = DEFAULT_RANGE[0],
+                 high: float = DEFAULT_RANGE[1],
+                 resolution: float = RESOLUTION) -> List[PlanSegment]:
+        """
+        category 系数从 low 变到 high（其他系数保持当前值）时周计划的分段
+
+        先找出候选断点：每次求解后由证明直接算出计划不变的终点，越过终点 resolution
+        后再求解。越过断点的那一点可能恰好让同分的候选换了先后，因此每段的计划在
+        该段中点重新求解；相邻两段中若一段的证明在另一段中点仍然成立，两者只是
+        同分时的不同选择，合并为一段（在合并后的中点重新求解）
+        """
+        if category not in self.categories:
+            raise ValueError(f"unknown preference category: {category}")
+        if low > high:
+            raise ValueError("low must not exceed high")
+
+        base = self.preferences()
+        bounds = [low]
+        point = low
+        while True:
+            preferences = dict(base, **{category: point})
+            days, _ = self._solve(preferences)
+            end = self._stable_end(days, preferences, category, high)
+            if end > bounds[-1] or end >= high:
+                bounds.append(end)
+            if end >= high:
+                break
+            point = min(end + resolution, high)
+
+        segments = []
+        previous = None  # 上一段中点的 (系数, 证明)
+        for start, end in zip(bounds, bounds[1:]):
+            current = self._solve_along(base, category, (start + end) / 2)
+            if segments:
+                segment = segments[-1]
+                if tuple(day.picks for day in current[1]) == segment.picks or \
+                        self._tie_flip(previous, current, category):
+                    previous = self._solve_along(base, category, (segment.low + end) / 2)
+                    segment.high = end
+                    segment.picks = tuple(day.picks for day in previous[1])
+                    continue
+            segments.append(PlanSegment(start, end, tuple(day.picks for day in current[1])))
+            previous = current
+        return segments
+
+    def _solve_along(self, base: Dict[str, float], category: str,
+                     value: float) -> Tuple[Dict[str, float], List[_DayState]]:
+        preferences = dict(base, **{category: value})
+        days, _ = self._solve(preferences)
+        return preferences, days
+
+    def _tie_flip(self, lower: Tuple[Dict[str, float], List[_DayState]],
+                  upper: Tuple[Dict[str, float], List[_DayState]], category: str) -> bool:
+        """两个系数处的计划是否只差同分时的选择：任一个的证明在另一处仍然成立"""
+        (lower_preferences, lower_days), (upper_preferences, upper_days) = lower, upper
+        low, high = lower_preferences[category], upper_preferences[category]
+        return self._stable_end(lower_days, lower_preferences, category, high) >= high or \
+            self._stable_end(upper_days, upper_preferences, category, low) <= low
+
+    def breakpoints(self, category: str, low: float = DEFAULT_RANGE[0],
+                    high: float = DEFAULT_RANGE[1]) -> List[Dict]:
+        """
+        category 系数的断点及每个断点处变化的训练日
+
+        Returns:
+            [{'value': 系数, 'changes': [{'day', 'removed', 'added', 'before', 'after'}]}]
+        """
+        segments = self.segments(category, low, high)
+        result = []
+        for before, after in zip(segments, segments[1:]):
+            changes = []
+            for day_index, (old, new) in enumerate(zip(before.picks, after.picks)):
+                if old != new:
+                    changes.append({
+                        'day': f"Day {day_index + 1}",
+                        'removed': [pk for pk in old if pk not in new],
+                        'added': [pk for pk in new if pk not in old],
+                        'before': list(old),
+                        'after': list(new)
+                    })
+            result.append({'value': round(before.high, 6), 'changes': changes})
+        return result
+
+    def stable_interval(self, category: str, low: float = DEFAULT_RANGE[0],
+                        high: float = DEFAULT_RANGE[1]) -> Tuple[float, float]:
+        """
+        当前系数所在的不变区间：只改变 category 时，系数在区间内周计划不变
+        上端即"要把该系数提高到多少才会换计划"（到 high 仍不变时返回 high）
+        """
+        if category not in self.categories:
+            raise ValueError(f"unknown preference category: {category}")
+        preferences = self.preferences()
+        days, _ = self._solve(preferences)
+        origin = preferences[category]
+        return (self._stable_end(days, preferences, category, min(low, origin)),
+                self._stable_end(days, preferences, category, max(high, origin)))
+
+    # ========== 多系数区域 ==========
+
+    def region(self) -> Tuple[PreferenceRegion, Dict]:
+        """当前系数下的周计划及其不变区域"""
+        preferences = self.preferences()
+        days, weekly_plan = self._solve(preferences)
+        rows = []
+        orderings = []
+        bounds = []
+        for day in days:
+            for direction, constant in day.rows.items():
+                rows.append((constant, dict(direction), day.ties.get(direction, [])))
+            orderings.extend(day.orderings)
+            if day.kind == 'exhaustive':
+                bounds.append({
+                    'gap': None if day.gap == math.inf else day.gap,
+                    'origin': dict(preferences),
+                    'slopes': day.slopes,
+                    'min': day.min_slopes,
+                    'max': day.max_slopes
+                })
+        return PreferenceRegion(rows, bounds, orderings, preferences), weekly_plan
+
+    def rescore(self, weekly_plan: Dict) -> Dict:
+        """
+        把另一组系数下生成的（同一区域内的）周计划按当前系数重算静态分数和总分，
+        动作、位置和动态分数不变
+        """
+        selector = self.selector
+        for day_plan in weekly_plan.values():
+            if not day_plan['exercises']:
+                continue
+            for exercise in day_plan['exercises']:
+                static_score = selector._calculate_static_score(
+                    selector._get_record(exercise['pk']))
+                exercise['static_score'] = round(static_score, 2)
+                exercise['score'] = round(static_score + exercise['dynamic_score'], 2)
+            day_plan['total_score'] = round(
+                sum(exercise['score'] for exercise in day_plan['exercises']), 2)
+        return weekly_plan
+
+
+def main() -> None:
+    try:
+        from .greedy_selector import GreedySelector
+    except ImportError:
+        from greedy_selector import GreedySelector
+
+    parser = argparse.ArgumentParser(description="Preference breakpoints of the weekly plan")
+    parser.add_argument('category', help="肌群大类（preferenceMapping.json 中的键）")
+    parser.add_argument('--algorithm', choices=['greedy', 'hybrid'], default='hybrid')
+    parser.add_argument('--days', type=int, default=5, help="训练天数（训练模板）")
+    parser.add_argument('--low', type=float, default=DEFAULT_RANGE[0])
+    parser.add_argument('--high', type=float, default=DEFAULT_RANGE[1])
+    parser.add_argument('--data-dir',
+                        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    args = parser.parse_args()
+
+    selector_class = GreedySelector if args.algorithm == 'greedy' else HybridSelector
+    selector = selector_class(args.data_dir, lazy_text=True)
+    selector.TRAINING_DAYS = args.days
+    analysis = PreferenceSensitivity(selector)
+
+    current = analysis.preferences()[args.category]
+    low, high = analysis.stable_interval(args.category, args.low, args.high)
+    if low == high:
+        print(f"current {args.category} = {current}: any change gives a different plan")
+    else:
+        print(f"current {args.category} = {current}: plan unchanged for {low:.4f} .. {high:.4f}")
+    for breakpoint in analysis.breakpoints(args.category, args.low, args.high):
+        print(f"\n{args.category} = {breakpoint['value']:.4f}")
+        for change in breakpoint['changes']:
+            print(f"   {change['day']}: -{change['removed']} +{change['added']}"
+                  if change['removed'] or change['added']
+                  else f"   {change['day']}: reordered {change['after']}")
+
+
+if __name__ == "__main__":
+    main()
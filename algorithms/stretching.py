@@ -0,0 +1,90 @@
+import heapq
+from typing import Dict, List
+
+# 肌群在动作中的权重：主肌群完全覆盖，次肌群覆盖一半
+PRIMARY_COVERAGE = 1.0
+SECONDARY_COVERAGE = 0.5
+
+
+def worked_muscles(exercises: List[Dict]) -> Dict[str, float]:
+    """统计当天力量动作练到的肌群及权重（主肌群1，次肌群0.5，多个动作累加）"""
+    weights = {}
+    for exercise in exercises:
+        for muscle in exercise.get('primaryMuscles', []):
+            weights[muscle] = weights.get(muscle, 0) + PRIMARY_COVERAGE
+        for muscle in exercise.get('secondaryMuscles', []):
+            weights[muscle] = weights.get(muscle, 0) + SECONDARY_COVERAGE
+    return weights
+
+
+class StretchIndex:
+    """
+    拉伸动作的肌群倒排索引：{肌群: [(拉伸动作pk, 覆盖系数)]}
+
+    选择时只看与当天肌群相关的拉伸动作，因此耗时与相关动作数量
+    有关，而与整个拉伸动作库的大小无关
+    """
+
+    def __init__(self, stretches: List[Dict]):
+        self.stretches = {}
+        self.coverage = {}   # {拉伸动作pk: {肌群: 覆盖系数}}
+        self.by_muscle = {}
+        for stretch in stretches:
+            exercise_id = stretch['pk']
+            if exercise_id in self.stretches:
+                continue
+            self.stretches[exercise_id] = stretch
+            coverage = {}
+            for muscle in stretch.get('secondaryMuscles', []):
+                coverage[muscle] = SECONDARY_COVERAGE
+            for muscle in stretch.get('primaryMuscles', []):
+                coverage[muscle] = PRIMARY_COVERAGE
+            self.coverage[exercise_id] = coverage
+            for muscle, value in coverage.items():
+                self.by_muscle.setdefault(muscle, []).append((exercise_id, value))
+
+    def select(self, muscle_weights: Dict[str, float], count: int) -> List[Dict]:
+        """
+        加权集合覆盖（贪心）：每次选能覆盖最多剩余肌群权重的拉伸动作
+
+        选中一个拉伸后，它主肌群的剩余权重清零、次肌群的剩余权重减半。
+        增益只会随选择而减少，因此使用惰性贪心：堆顶重新计算后仍不低于
+        下一个候选的上界时直接选中，不必每轮重算所有候选。
+        """
+        residual = dict(muscle_weights)
+
+        def gain(exercise_id: int) -> float:
+            return sum(residual.get(muscle, 0) * value
+                       for muscle, value in self.coverage[exercise_id].items())
+
+        # 只考虑覆盖了当天肌群的拉伸动作
+        candidate_ids = set()
+        for muscle in muscle_weights:
+            candidate_ids.update(exercise_id for exercise_id, _ in
+                                 self.by_muscle.get(muscle, []))
+
+        heap = [(-gain(exercise_id), exercise_id) for exercise_id in candidate_ids]
+        heapq.heapify(heap)
+
+        selected = []
+        while heap and len(selected) < count:
+            _, exercise_id = heapq.heappop(heap)
+            current = gain(exercise_id)
+            if current <= 0:
+                continue
+            if heap and (-heap[0][0], -heap[0][1]) > (current, -exercise_id):
+                # 上界已过期，放回堆中等待下一轮
+                heapq.heappush(heap, (-current, exercise_id))
+                continue
+
+            selected.append(exercise_id)
+            for muscle, value in self.coverage[exercise_id].items():
+                if muscle in residual:
+                    residual[muscle] *= 1 - value
+
+        return [{
+            'pk': exercise_id,
+            'name': self.stretches[exercise_id]['name'],
+            'primaryMuscles': list(self.stretches[exercise_id].get('primaryMuscles', [])),
+            'secondaryMuscles': list(self.stretches[exercise_id].get('secondaryMuscles', []))
+        } for exercise_id in selected]
@@ -0,0 +1,150 @@
+import heapq
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    from .base_selector import BaseSelector
+    from .compiled_catalog import FLAG_SOURCES
+except ImportError:
+    from base_selector import BaseSelector
+    from compiled_catalog import FLAG_SOURCES
+
+# 相似度各部分的权重（总和为1）
+PRIMARY_WEIGHT = 0.45     # 主肌群 Jaccard
+SECONDARY_WEIGHT = 0.15   # 次肌群 Jaccard
+FAMILY_WEIGHT = 0.2       # 同一动作族（type6）
+FLAGS_WEIGHT = 0.2        # type1-type5 分类属性一致的比例
+
+# 每个动作预先保存的近邻数量（过滤后仍能返回足够的替代动作）
+DEFAULT_NEIGHBOURS = 20
+
+# 各分类属性位（大/小肌群算一项，依此类推）
+_FLAG_GROUPS = {}
+for _classification, _, _flag in FLAG_SOURCES:
+    _FLAG_GROUPS[_classification] = _FLAG_GROUPS.get(_classification, 0) | _flag
+_FLAG_GROUPS = tuple(_FLAG_GROUPS.values())
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SubstituteIndex:
+    """
+    预计算的相似动作近邻表，用于"换一个动作"
+
+    相似度由主/次肌群 Jaccard、是否同族和 type1-type5 属性一致比例
+    加权得到。构建时只比较至少共享一个主肌群的动作对，查询时直接
+    从近邻表中按用户排除列表和当天其他动作的族过滤。
+    """
+
+    def __init__(self, neighbours: Dict[int, List[Tuple[int, float]]]):
+        self.neighbours = neighbours  # {pk: [(近邻pk, 相似度)]}，按相似度降序
+
+    @classmethod
+    def build(cls, selector: BaseSelector,
+              neighbours: int = DEFAULT_NEIGHBOURS) -> 'SubstituteIndex':
+        """为选择器当前的动作库构建近邻表"""
+        catalog = selector.compiled_catalog
+        features = {}
+        by_primary = {}
+        for record in selector.records:
+            exercise_id = record.pk
+            if exercise_id in features or selector._get_record(exercise_id) is not record:
+                continue  # 重复或已被租户移除/替换的行
+            features[exercise_id] = (frozenset(record.primary_muscles),
+                                     frozenset(record.secondary_muscles),
+                                     selector._get_exercise_family(exercise_id),
+                                     catalog.flags[exercise_id])
+            for muscle in record.primary_muscles:
+                by_primary.setdefault(muscle, []).append(exercise_id)
+
+        table = {}
+        for exercise_id, (primary, secondary, family, flags) in features.items():
+            others = set()
+            for muscle in primary:
+                others.update(by_primary[muscle])
+            others.discard(exercise_id)
+
+            scored = []
+            for other_id in others:
+                other_primary, other_secondary, other_family, other_flags = features[other_id]
+                matching_flags = sum(1 for mask in _FLAG_GROUPS
+                                     if flags & mask == other_flags & mask)
+                similarity = (
+                    PRIMARY_WEIGHT * _jaccard(primary, other_primary) +
+                    SECONDARY_WEIGHT * _jaccard(secondary, other_secondary) +
+                    FAMILY_WEIGHT * (family is not None and family == other_family) +
+                    FLAGS_WEIGHT * matching_flags / len(_FLAG_GROUPS))
+                scored.append((round(similarity, 4), other_id))
+
+            # 相似度相同时按 pk 升序，结果稳定
+            best = heapq.nsmallest(neighbours, scored, key=lambda item: (-item[0], item[1]))
+            table[exercise_id] = [(other_id, similarity) for similarity, other_id in best]
+
+        return cls(table)
+
+    def substitutes(self, exercise_id: int, k: int = 5,
+                    excluded_ids: Iterable[int] = (),
+                    excluded_families: Iterable[str] = (),
+                    family_of=None) -> List[Tuple[int, float]]:
+        """
+        返回最相似的 k 个替代动作 [(pk, 相似度)]
+
+        Args:
+            exercise_id: 要替换的动作
+            excluded_ids: 不能使用的动作（用户排除列表、当天已选动作等）
+            excluded_families: 不能使用的动作族
+            family_of: pk -> 族名 的函数（过滤族时需要）
+        """
+        excluded_ids = set(excluded_ids)
+        excluded_families = set(excluded_families)
+        result = []
+        for other_id, similarity in self.neighbours.get(exercise_id, []):
+            if other_id in excluded_ids:
+                continue
+            if excluded_families and family_of(other_id) in excluded_families:
+                continue
+            result.append((other_id, similarity))
+            if len(result) == k:
+                break
+        return result
+
+
+def suggest_substitutes(selector: BaseSelector, index: SubstituteIndex,
+                        day_plan: Dict, exercise_id: int, k: int = 5) -> List[Dict]:
+    """
+    为某天计划中的一个动作给出替代动作
+
+    排除用户排除列表、硬约束/器械不允许的动作、当天已有的动作，
+    以及当天其他动作所属的族（被替换动作自己的族仍可使用）
+
+    Returns:
+        [{'pk', 'name', 'primaryMuscles', 'secondaryMuscles', 'similarity'}]
+    """
+    day_ids = [exercise['pk'] for exercise in day_plan['exercises']]
+    other_families = {selector._get_exercise_family(pk)
+                      for pk in day_ids if pk != exercise_id}
+    other_families.discard(None)
+
+    constraints = selector._get_hard_constraints()
+    disallowed = set(selector.EXCLUDED_EXERCISES) | set(day_ids)
+
+    suggestions = []
+    for other_id, similarity in index.substitutes(
+            exercise_id, len(index.neighbours.get(exercise_id, [])),
+            disallowed, other_families, selector._get_exercise_family):
+        record = selector._get_record(other_id)
+        if record is None or not constraints.allows(selector, record):
+            continue
+        suggestions.append({
+            'pk': record.pk,
+            'name': record.name,
+            'primaryMuscles': list(record.primary_muscles),
+            'secondaryMuscles': list(record.secondary_muscles),
+            'similarity': similarity
+        })
+        if len(suggestions) == k:
+            break
+    return suggestions
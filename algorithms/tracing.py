@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+
+
+class Tracer:
+    """
+    记录嵌套耗时区间，导出为 Chrome/Perfetto trace-event JSON
+
+    用法：
+        selector.tracer = Tracer()
+        selector.generate_weekly_plan()
+        selector.tracer.write('out/plan.trace.json')
+
+    生成的文件可直接在 chrome://tracing 或 ui.perfetto.dev 中打开
+    """
+
+    def __init__(self):
+        self.events = []
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def span(self, name: str, category: str = 'plan', **args):
+        """记录一个区间（"X" 完整事件），args 会显示在事件详情中"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start - self._origin) * 1e6, 3),
+                'dur': round((end - start) * 1e6, 3),
+                'pid': self._pid,
+                'tid': threading.get_ident(),
+                'args': args
+            })
+
+    def to_dict(self) -> Dict:
+        """trace-event 格式的字典"""
+        return {
+            'traceEvents': sorted(self.events, key=lambda e: e['ts']),
+            'displayTimeUnit': 'ms'
+        }
+
+    def write(self, filepath: str) -> None:
+        """写入 trace JSON 文件"""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+
+class NullTracer:
+    """默认的空追踪器：不记录任何内容，开销可忽略"""
+
+    _NULL_SPAN = nullcontext()
+
+    def span(self, name: str, category: str = 'plan', **args):
+        return self._NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
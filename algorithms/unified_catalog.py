@@ -0,0 +1,290 @@
+import json
+import os
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    from .catalog import TEXT_FIELDS, ExerciseTextIndex, iter_exercises
+    from .records import ExerciseRecord
+    from .validation import ValidationCache, validator_for
+except ImportError:
+    from catalog import TEXT_FIELDS, ExerciseTextIndex, iter_exercises
+    from records import ExerciseRecord
+    from validation import ValidationCache, validator_for
+
+# 训练方式（modality 列的取值即在此元组中的下标）
+MODALITIES = ('strength', 'flexibility', 'cardio')
+STRENGTH, FLEXIBILITY, CARDIO = range(len(MODALITIES))
+
+# 各训练方式的数据文件，schema 与数据文件同名（位于 schemas/ 下）
+DATASET_FILES = {
+    'strength': 'strength.json',
+    'flexibility': 'flexibility.json',
+    'cardio': 'cardio.json'
+}
+
+# 所有数据集共有的标识字段，其余字段按 schema 分为肌群字段和文字字段
+_IDENTITY_FIELDS = ('pk', 'name', 'slug')
+_MUSCLE_FIELDS = ('primaryMuscles', 'secondaryMuscles')
+
+
+class DatasetSchema:
+    """
+    从 schemas/<数据集>.json 中取出建索引需要的信息：
+    必填字段、肌群词表（肌群字段的 enum）和文字字段
+    """
+
+    def __init__(self, required: Sequence[str], muscle_names: Sequence[str],
+                 text_fields: Sequence[str]):
+        self.required = tuple(required)
+        self.muscle_names = tuple(muscle_names)
+        self.text_fields = tuple(text_fields)
+
+    @classmethod
+    def from_file(cls, filepath: str) -> 'DatasetSchema':
+        with open(filepath, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        item = schema['items']
+        properties = item.get('properties', {})
+
+        muscle_names = []
+        for field in _MUSCLE_FIELDS:
+            for muscle in properties.get(field, {}).get('items', {}).get('enum', []):
+                if muscle not in muscle_names:
+                    muscle_names.append(muscle)
+        text_fields = [field for field in properties
+                       if field not in _IDENTITY_FIELDS and field not in _MUSCLE_FIELDS]
+        return cls(item.get('required', []), muscle_names, text_fields)
+
+    @classmethod
+    def default(cls) -> 'DatasetSchema':
+        """没有 schema 文件时（如合成数据目录）：肌群词表由数据决定"""
+        return cls(('pk', 'name'), (), TEXT_FIELDS + ('instructions',))
+
+
+class ExerciseRows:
+    """
+    某个训练方式的动作行视图（按列存储读取，不复制数据）
+    按下标取出时才生成动作字典（不含文字字段），格式与
+    load_exercises(lazy_text=True) 的结果相同
+    """
+
+    __slots__ = ('catalog', 'start', 'end', 'with_muscles')
+
+    def __init__(self, catalog: 'UnifiedCatalog', start: int, end: int, with_muscles: bool):
+        self.catalog = catalog
+        self.start = start
+        self.end = end
+        self.with_muscles = with_muscles  # cardio 数据没有肌群字段
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, index: int) -> Dict:
+        if not 0 <= index < self.end - self.start:
+            raise IndexError(index)
+        catalog = self.catalog
+        row = self.start + index
+        exercise = {'pk': catalog.pks[row], 'name': catalog.names[row],
+                    'slug': catalog.slugs[row]}
+        if self.with_muscles:
+            exercise['primaryMuscles'] = list(catalog.primary_muscles(row))
+            exercise['secondaryMuscles'] = list(catalog.secondary_muscles(row))
+        return exercise
+
+
+class UnifiedCatalog:
+    """
+    力量、柔韧和有氧三个数据集的统一列式索引
+
+    每个动作占一行，同一训练方式的行连续存放（按 MODALITIES 顺序），列为：
+    - modality: 训练方式编号
+    - pks / names / slugs
+    - 主/次肌群：按行的偏移 + 肌群编号（保持原始顺序），以及肌群位掩码
+      （用于集合运算，肌群编号即 muscle_names 中的下标）
+    文字字段（steps/notes/instructions）不进内存，只记录每个动作在源文件中
+    的字节范围，通过 text_index / text 按需读取。
+
+    三个文件各只流式读取一次，选择器和其他计划组件共用同一份索引。
+    """
+
+    def __init__(self):
+        self.muscle_names = []
+        self._muscle_ids = {}
+
+        self.modality = array('B')
+        self.pks = array('i')
+        self.names = []
+        self.slugs = []
+        self.primary_offsets = array('I', [0])
+        self.primary_ids = array('B')
+        self.secondary_offsets = array('I', [0])
+        self.secondary_ids = array('B')
+        self.primary_masks = array('Q')
+        self.secondary_masks = array('Q')
+
+        self._modality_rows = {}  # {训练方式: (起始行, 结束行)}
+        self._pk_rows = {}        # {训练方式: {pk: 行号}}
+        self._text_indexes = {}   # {训练方式: ExerciseTextIndex}
+        self._records = {}        # {训练方式: [ExerciseRecord]}，首次使用时生成
+
+    @classmethod
+    def load(cls, data_dir: str, schema_dir: str = None,
+             validate: bool = True) -> 'UnifiedCatalog':
+        """
+        加载数据目录中的 strength.json、flexibility.json 和 cardio.json
+        （后两者不存在时跳过），按 schema_dir（默认 data_dir/schemas）编码
+
+        validate 为 True 时在同一次遍历中按 schema 校验（结论按内容哈希缓存），
+        未通过时抛出 validation.CatalogValidationError
+        """
+        if schema_dir is None:
+            schema_dir = os.path.join(data_dir, 'schemas')
+        cache = ValidationCache(ValidationCache.default_path(data_dir)) if validate else None
+
+        catalog = cls()
+        for modality in MODALITIES:
+            filepath = os.path.join(data_dir, DATASET_FILES[modality])
+            if not os.path.exists(filepath):
+                if modality == 'strength':
+                    raise FileNotFoundError(filepath)
+                continue
+            schema_path = os.path.join(schema_dir, DATASET_FILES[modality])
+            schema = DatasetSchema.from_file(schema_path) \
+                if os.path.exists(schema_path) else DatasetSchema.default()
+            validator = validator_for(filepath, cache, schema_dir) if validate else None
+            catalog._add_dataset(modality, filepath, schema, validator)
+        return catalog
+
+    def _muscle_id(self, muscle: str, schema: DatasetSchema, filepath: str) -> int:
+        muscle_id = self._muscle_ids.get(muscle)
+        if muscle_id is not None:
+            return muscle_id
+        if schema.muscle_names and muscle not in schema.muscle_names:
+            raise ValueError(f"{filepath}: unknown muscle {muscle!r}")
+        if len(self.muscle_names) == 64:
+            raise ValueError("at most 64 distinct muscles are supported")
+        muscle_id = len(self.muscle_names)
+        self.muscle_names.append(muscle)
+        self._muscle_ids[muscle] = muscle_id
+        return muscle_id
+
+    def _add_dataset(self, modality: str, filepath: str, schema: DatasetSchema,
+                     validator=None) -> None:
+        # schema 中的肌群按词表顺序编号，数据中的肌群不依赖出现顺序
+        for muscle in schema.muscle_names:
+            self._muscle_id(muscle, schema, filepath)
+
+        modality_id = MODALITIES.index(modality)
+        start_row = len(self.pks)
+        pk_rows = {}
+        offsets = {}
+
+        for exercise, start, length in iter_exercises(filepath):
+            if validator is not None:
+                issue_count = len(validator.issues)
+                validator.check(exercise, start)
+                if len(validator.issues) > issue_count:
+                    continue  # 结束时统一报告，不再编码有问题的动作
+            missing = [field for field in schema.required if field not in exercise]
+            if missing:
+                raise ValueError(
+                    f"{filepath}: exercise at byte {start} is missing {missing}")
+
+            exercise_id = exercise['pk']
+            if exercise_id in pk_rows:
+                continue  # 与 load_exercises 一致：重复 pk 只保留第一条
+            pk_rows[exercise_id] = len(self.pks)
+            offsets[exercise_id] = (start, length)
+
+            self.modality.append(modality_id)
+            self.pks.append(exercise_id)
+            self.names.append(exercise['name'])
+            self.slugs.append(exercise.get('slug', ''))
+            for field, ids, row_offsets, masks in (
+                    ('primaryMuscles', self.primary_ids, self.primary_offsets,
+                     self.primary_masks),
+                    ('secondaryMuscles', self.secondary_ids, self.secondary_offsets,
+                     self.secondary_masks)):
+                mask = 0
+                for muscle in exercise.get(field, []):
+                    muscle_id = self._muscle_id(muscle, schema, filepath)
+                    ids.append(muscle_id)
+                    mask |= 1 << muscle_id
+                row_offsets.append(len(ids))
+                masks.append(mask)
+
+        if validator is not None:
+            validator.finish()
+        self._modality_rows[modality] = (start_row, len(self.pks))
+        self._pk_rows[modality] = pk_rows
+        self._text_indexes[modality] = ExerciseTextIndex(
+            filepath, offsets, schema.text_fields)
+
+    # ========== 查询 ==========
+
+    @property
+    def modalities(self) -> List[str]:
+        """已加载的训练方式"""
+        return list(self._modality_rows)
+
+    def rows(self, modality: str) -> range:
+        """某个训练方式的所有行（文件顺序）"""
+        start, end = self._modality_rows.get(modality, (0, 0))
+        return range(start, end)
+
+    def row_of(self, modality: str, exercise_id: int) -> int:
+        """pk 对应的行号，不存在时返回 -1"""
+        return self._pk_rows.get(modality, {}).get(exercise_id, -1)
+
+    def primary_muscles(self, row: int) -> Tuple[str, ...]:
+        ids = self.primary_ids[self.primary_offsets[row]:self.primary_offsets[row + 1]]
+        return tuple(self.muscle_names[muscle_id] for muscle_id in ids)
+
+    def secondary_muscles(self, row: int) -> Tuple[str, ...]:
+        ids = self.secondary_ids[self.secondary_offsets[row]:self.secondary_offsets[row + 1]]
+        return tuple(self.muscle_names[muscle_id] for muscle_id in ids)
+
+    def muscle_mask(self, muscles: Sequence[str]) -> int:
+        """肌群名称集合对应的位掩码（未知肌群忽略）"""
+        mask = 0
+        for muscle in muscles:
+            if muscle in self._muscle_ids:
+                mask |= 1 << self._muscle_ids[muscle]
+        return mask
+
+    def exercises(self, modality: str) -> ExerciseRows:
+        """
+        某个训练方式的动作行视图，格式与 load_exercises(lazy_text=True) 的结果相同，
+        可直接交给选择器使用；视图只引用列数据，所有选择器共用
+        """
+        start, end = self._modality_rows.get(modality, (0, 0))
+        return ExerciseRows(self, start, end, modality != 'cardio')
+
+    def records(self, modality: str) -> List[ExerciseRecord]:
+        """
+        某个训练方式的紧凑动作记录（row 为该训练方式内的行号），由列数据生成一次，
+        之后所有选择器共享同一个列表；肌群组合相同的记录共用同一个元组
+        """
+        records = self._records.get(modality)
+        if records is None:
+            muscle_tuples = {}
+            records = []
+            for index, row in enumerate(self.rows(modality)):
+                primary = self.primary_muscles(row)
+                secondary = self.secondary_muscles(row)
+                records.append(ExerciseRecord(
+                    index, self.pks[row], self.names[row],
+                    muscle_tuples.setdefault(primary, primary),
+                    muscle_tuples.setdefault(secondary, secondary)))
+            self._records[modality] = records
+        return records
+
+    def text_index(self, modality: str) -> ExerciseTextIndex:
+        """某个训练方式的文字字段索引"""
+        return self._text_indexes.get(modality)
+
+    def text(self, row: int) -> Dict:
+        """按行读取文字字段（steps/notes 或 instructions）"""
+        modality = MODALITIES[self.modality[row]]
+        return self._text_indexes[modality].get(self.pks[row])
@@ -0,0 +1,397 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from .catalog import iter_exercises
+except ImportError:
+    from catalog import iter_exercises
+
+# 校验规则有变化时递增，使旧的缓存结论失效
+VALIDATOR_VERSION = 1
+
+# 数据文件与 schemas/ 下同名的 schema 对应
+DATASETS = ('strength.json', 'flexibility.json', 'cardio.json')
+
+# 缓存最多保留的结论数量
+MAX_CACHE_ENTRIES = 64
+
+# 编译器支持的 JSON Schema（draft-07）关键字，其余关键字会报错而不是被忽略
+_ANNOTATION_KEYWORDS = {'$schema', '$id', 'title', 'description', '$comment'}
+_TYPE_CHECKS = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool)
+}
+
+# 校验函数：(值, 位置, 问题列表) -> None
+Check = Callable[[object, str, List[Tuple[str, str]]], None]
+
+
+def _join(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+
+def compile_schema(schema: Dict) -> Check:
+    """
+    把 schema 编译成一个校验函数，每个关键字只在编译时解析一次
+    问题以 (位置, 说明) 追加到问题列表，位置形如 primaryMuscles[1]
+    """
+    checks = []
+    unsupported = set(schema) - _ANNOTATION_KEYWORDS - {
+        'type', 'required', 'properties', 'additionalProperties', 'items',
+        'enum', 'uniqueItems', 'minimum', 'maximum', 'minItems'}
+    if unsupported:
+        raise ValueError(f"unsupported schema keywords: {sorted(unsupported)}")
+
+    if 'type' in schema:
+        type_name = schema['type']
+        type_check = _TYPE_CHECKS[type_name]
+
+        def check_type(value, path, issues):
+            if not type_check(value):
+                issues.append((path, f"expected {type_name}, got {type(value).__name__}"))
+                return False
+            return True
+    else:
+        def check_type(value, path, issues):
+            return True
+
+    if 'enum' in schema:
+        allowed = schema['enum']
+        allowed_set = set(value for value in allowed if not isinstance(value, (list, dict)))
+
+        def check_enum(value, path, issues):
+            if value not in allowed_set:
+                issues.append((path, f"{value!r} is not one of the allowed values"))
+        checks.append(check_enum)
+
+    if 'minimum' in schema:
+        minimum = schema['minimum']
+
+        def check_minimum(value, path, issues):
+            if value < minimum:
+                issues.append((path, f"{value!r} is less than the minimum {minimum}"))
+        checks.append(check_minimum)
+
+    if 'maximum' in schema:
+        maximum = schema['maximum']
+
+        def check_maximum(value, path, issues):
+            if value > maximum:
+                issues.append((path, f"{value!r} is greater than the maximum {maximum}"))
+        checks.append(check_maximum)
+
+    if 'required' in schema:
+        required = tuple(schema['required'])
+
+        def check_required(value, path, issues):
+            for key in required:
+                if key not in value:
+                    issues.append((path, f"missing required field {key!r}"))
+        checks.append(check_required)
+
+    if 'properties' in schema or schema.get('additionalProperties') is False:
+        properties = {key: compile_schema(subschema)
+                      for key, subschema in schema.get('properties', {}).items()}
+        closed = schema.get('additionalProperties') is False
+
+        def check_properties(value, path, issues):
+            for key, item in value.items():
+                check = properties.get(key)
+                if check is not None:
+                    check(item, _join(path, key), issues)
+                elif closed:
+                    issues.append((_join(path, key), "unexpected field"))
+        checks.append(check_properties)
+
+    if 'minItems' in schema:
+        min_items = schema['minItems']
+
+        def check_min_items(value, path, issues):
+            if len(value) < min_items:
+                issues.append((path, f"expected at least {min_items} items"))
+        checks.append(check_min_items)
+
+    if 'items' in schema:
+        item_check = compile_schema(schema['items'])
+
+        def check_items(value, path, issues):
+            for index, item in enumerate(value):
+                item_check(item, _join(path, index), issues)
+        checks.append(check_items)
+
+    if schema.get('uniqueItems'):
+        def check_unique(value, path, issues):
+            seen = set()
+            for index, item in enumerate(value):
+                key = json.dumps(item, sort_keys=True)
+                if key in seen:
+                    issues.append((_join(path, index), f"duplicate item {item!r}"))
+                seen.add(key)
+        checks.append(check_unique)
+
+    def check(value, path, issues):
+        # 类型不对时不再检查其他关键字，避免连锁报错
+        if check_type(value, path, issues):
+            for keyword_check in checks:
+                keyword_check(value, path, issues)
+    return check
+
+
+class ValidationIssue:
+    """一个校验问题及其精确位置（数组下标、pk、在文件中的字节偏移、字段路径）"""
+
+    __slots__ = ('filepath', 'index', 'pk', 'byte_offset', 'path', 'message')
+
+    def __init__(self, filepath: str, index: int, pk, byte_offset: int,
+                 path: str, message: str):
+        self.filepath = filepath
+        self.index = index
+        self.pk = pk
+        self.byte_offset = byte_offset
+        self.path = path
+        self.message = message
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ValidationIssue':
+        return cls(**data)
+
+    def __str__(self) -> str:
+        if self.index is None:
+            return f"{os.path.basename(self.filepath)}: {self.message}"
+        location = f"item {self.index} (pk {self.pk}, byte {self.byte_offset})"
+        if self.path:
+            location = f"{location} {self.path}"
+        return f"{os.path.basename(self.filepath)}: {location}: {self.message}"
+
+
+class CatalogValidationError(ValueError):
+    """数据文件未通过校验"""
+
+    def __init__(self, issues: List[ValidationIssue]):
+        self.issues = issues
+        lines = [str(issue) for issue in issues[:20]]
+        if len(issues) > 20:
+            lines.append(f"... and {len(issues) - 20} more")
+        super().__init__(f"{len(issues)} catalog validation issue(s):\n" + "\n".join(lines))
+
+
+class CatalogValidator:
+    """
+    逐个动作校验一个数据文件，可以插入加载过程，与解析共用一次遍历
+
+    除 schema 外还检查选择器依赖的不变量：
+    - pk 唯一（选择器按 pk 寻址，重复的 pk 会被静默忽略）
+    - 同一肌群不能同时是主肌群和次肌群（否则评分时重复计分）
+    肌群取值范围由 schema 的 enum 检查
+    """
+
+    def __init__(self, filepath: str, schema: Dict,
+                 cache: 'ValidationCache' = None, cache_key: str = None):
+        self.filepath = filepath
+        self._check = compile_schema(schema['items'])
+        self.issues = []
+        self._seen_pks = {}  # {pk: 首次出现的下标}
+        self._index = 0
+        # 校验完成后写入结论的缓存
+        self.cache = cache
+        self.cache_key = cache_key
+
+    def check(self, exercise: Dict, byte_offset: int) -> None:
+        index = self._index
+        self._index += 1
+        pk = exercise.get('pk') if isinstance(exercise, dict) else None
+
+        problems = []
+        self._check(exercise, '', problems)
+
+        if isinstance(pk, int):
+            if pk in self._seen_pks:
+                problems.append(('pk', f"duplicate pk {pk} (first used by item "
+                                       f"{self._seen_pks[pk]})"))
+            else:
+                self._seen_pks[pk] = index
+
+        if isinstance(exercise, dict):
+            primary = exercise.get('primaryMuscles')
+            secondary = exercise.get('secondaryMuscles')
+            if isinstance(primary, list) and isinstance(secondary, list):
+                for position, muscle in enumerate(secondary):
+                    if muscle in primary:
+                        problems.append((f"secondaryMuscles[{position}]",
+                                         f"{muscle!r} is also a primary muscle"))
+
+        for path, message in problems:
+            self.issues.append(ValidationIssue(
+                self.filepath, index, pk, byte_offset, path, message))
+
+    def finish(self) -> None:
+        """遍历结束：缓存结论，有问题时抛出 CatalogValidationError"""
+        if self.cache is not None:
+            self.cache.put(self.cache_key, self.issues)
+        if self.issues:
+            raise CatalogValidationError(self.issues)
+
+
+def _sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """
+    按内容哈希缓存的校验结论（JSON 文件）
+
+    键为校验器版本、schema 和数据文件的内容哈希，文件改动后自动失效；
+    进程内再按 mtime 和大小复用哈希，热启动只需读一次缓存文件
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._hashes = {}  # path -> (mtime_ns, size, sha256)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @classmethod
+    def default_path(cls, data_dir: str) -> str:
+        """默认缓存文件位置：数据目录下的 out/validation_cache.json"""
+        return os.path.join(data_dir, 'out', 'validation_cache.json')
+
+    def _file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        value = _sha256(path)
+        self._hashes[path] = (stat.st_mtime_ns, stat.st_size, value)
+        return value
+
+    def key(self, filepath: str, schema_path: str) -> str:
+        return f"{VALIDATOR_VERSION}:{self._file_hash(schema_path)}:{self._file_hash(filepath)}"
+
+    def get(self, key: str) -> Optional[List[ValidationIssue]]:
+        """缓存的问题列表（通过校验时为空列表），未命中返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return [ValidationIssue.from_dict(issue) for issue in entry]
+
+    def put(self, key: str, issues: List[ValidationIssue]) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = [issue.to_dict() for issue in issues]
+        while len(self._entries) > MAX_CACHE_ENTRIES:
+            del self._entries[next(iter(self._entries))]
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass  # 数据目录只读时只在进程内缓存
+
+
+def schema_path_for(filepath: str, schema_dir: str = None) -> str:
+    """数据文件对应的 schema（默认在同目录的 schemas/ 下），不存在时返回 None"""
+    if schema_dir is None:
+        schema_dir = os.path.join(os.path.dirname(os.path.abspath(filepath)), 'schemas')
+    schema_path = os.path.join(schema_dir, os.path.basename(filepath))
+    return schema_path if os.path.exists(schema_path) else None
+
+
+def load_schema(schema_path: str) -> Dict:
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def validator_for(filepath: str, cache: ValidationCache = None,
+                  schema_dir: str = None) -> Optional[CatalogValidator]:
+    """
+    加载数据文件时使用的校验器，传给 load_exercises 与解析共用一次遍历
+
+    没有对应 schema 或缓存中已有通过的结论时返回 None（跳过校验）；
+    缓存中是未通过的结论时直接抛出 CatalogValidationError
+    """
+    schema_path = schema_path_for(filepath, schema_dir)
+    if schema_path is None:
+        return None
+    key = None
+    if cache is not None:
+        key = cache.key(filepath, schema_path)
+        issues = cache.get(key)
+        if issues is not None:
+            if issues:
+                raise CatalogValidationError(issues)
+            return None
+    return CatalogValidator(filepath, load_schema(schema_path), cache, key)
+
+
+def validate_file(filepath: str, schema_path: str,
+                  cache: ValidationCache = None) -> List[ValidationIssue]:
+    """单独校验一个数据文件（结论命中缓存时不解析文件），返回问题列表"""
+    key = cache.key(filepath, schema_path) if cache is not None else None
+    if key is not None:
+        issues = cache.get(key)
+        if issues is not None:
+            return issues
+
+    validator = CatalogValidator(filepath, load_schema(schema_path), cache, key)
+    try:
+        for exercise, start, _ in iter_exercises(filepath):
+            validator.check(exercise, start)
+    except ValueError as e:
+        # 文件本身不是合法的 JSON 数组
+        validator.issues.append(ValidationIssue(filepath, None, None, None, '', str(e)))
+
+    try:
+        validator.finish()
+    except CatalogValidationError:
+        pass
+    return validator.issues
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate exercise catalogs against schemas/")
+    parser.add_argument('data_dir', nargs='?',
+                        default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--no-cache', action='store_true', help="忽略并且不写入缓存的结论")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else \
+        ValidationCache(ValidationCache.default_path(args.data_dir))
+
+    failed = False
+    for name in DATASETS:
+        filepath = os.path.join(args.data_dir, name)
+        schema_path = schema_path_for(filepath)
+        if not os.path.exists(filepath) or schema_path is None:
+            continue
+        issues = validate_file(filepath, schema_path, cache)
+        for issue in issues:
+            print(issue)
+        print(f"{name}: {'OK' if not issues else f'{len(issues)} issue(s)'}")
+        failed = failed or bool(issues)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
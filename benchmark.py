@@ -0,0 +1,433 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+# 将当前目录添加到 Python 路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from algorithms.greedy_selector import GreedySelector  # noqa: E402
+from algorithms.hybrid_selector import HybridSelector  # noqa: E402
+from greedy_algorithm import GreedyWorkoutSelector  # noqa: E402
+import greedy_algorithm_old  # noqa: E402
+
+
+# ========== 基准配置 ==========
+# 用户偏好场景：(肌群大类系数, 排除的动作ID)
+PROFILES = {
+    "default": ({}, {35}),
+    "upper_focus": ({"chest": 1.5, "shoulder": 1.5, "arm": 1.2}, {35}),
+    "lower_focus": ({"leg": 1.8, "core": 1.3, "chest": 0.8}, {35}),
+    "restricted": ({"back": 1.3}, {35, 2, 4, 9, 27, 40, 1, 86})
+}
+
+TEMPLATES = [1, 2, 3, 4, 5, 6, 7]
+
+DEFAULT_OUTPUT = os.path.join(current_dir, 'out', 'benchmark.json')
+DEFAULT_MEMORY_OUTPUT = os.path.join(current_dir, 'out', 'memory.json')
+
+# tracemalloc 记录的调用栈深度（用于定位仓库内的分配位置）
+TRACEBACK_DEPTH = 16
+# ========== 配置结束 ==========
+
+
+def _category_to_muscle_preferences(selector, preferences: Dict) -> Dict:
+    """把大类系数展开为旧版选择器使用的具体肌群系数"""
+    muscle_preferences = dict(selector.DEFAULT_MUSCLE_PREFERENCES)
+    with open(os.path.join(current_dir, 'classification', 'preferenceMapping.json'),
+              'r', encoding='utf-8') as f:
+        preference_mapping = json.load(f)
+    for category, coefficient in preferences.items():
+        for muscle in preference_mapping.get(category, []):
+            muscle_preferences[muscle] = coefficient
+    return muscle_preferences
+
+
+def _make_selector(selector_class: type, training_days: int,
+                   preferences: Dict, excluded: set, data_dir: str = None,
+                   lazy_text: bool = False):
+    """创建并配置选择器（在计时区外完成数据加载）"""
+    if lazy_text:
+        selector = selector_class(data_dir, lazy_text=True)
+    elif data_dir is not None:
+        selector = selector_class(data_dir)
+    else:
+        selector = selector_class()
+    selector.TRAINING_DAYS = training_days
+    selector.EXCLUDED_EXERCISES = set(excluded)
+    if hasattr(selector, 'MUSCLE_PREFERENCES'):
+        merged = dict(selector.MUSCLE_PREFERENCES)
+        merged.update(preferences)
+        selector.MUSCLE_PREFERENCES = merged
+    else:
+        # 旧版本体选择器按具体肌群设置系数
+        selector.DEFAULT_MUSCLE_PREFERENCES = _category_to_muscle_preferences(
+            selector, preferences)
+    return selector
+
+
+SELECTORS = {
+    "greedy": GreedySelector,
+    "hybrid": HybridSelector,
+    "greedy_standalone": GreedyWorkoutSelector,
+    "ontology_old": greedy_algorithm_old.GreedyWorkoutSelector
+}
+
+# 支持自定义数据目录（如 synthetic_catalog.py 生成的合成动作库）和文字懒加载的选择器
+DATA_DIR_SELECTORS = ["greedy", "hybrid"]
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """最近秩法百分位数"""
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _time_case(factory: Callable, warmup: int, repeat: int) -> Dict:
+    """对单个场景进行预热和重复计时，返回统计结果"""
+    timings = []
+    score = None
+
+    for run in range(warmup + repeat):
+        selector = factory()
+        # 屏蔽算法内部的进度输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            plan = selector.generate_weekly_plan()
+            elapsed = time.perf_counter() - start_time
+
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+        score = round(sum(day['total_score'] for day in plan.values()), 2)
+
+    timings.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "max_ms": round(timings[-1], 3),
+        "score": score
+    }
+
+
+def run_benchmarks(selector_names: List[str], templates: List[int],
+                   profile_names: List[str], warmup: int, repeat: int,
+                   data_dir: str = None) -> Dict:
+    """运行所有选择器 × 训练模板 × 偏好场景"""
+    if data_dir is not None:
+        unsupported = [name for name in selector_names
+                       if name not in DATA_DIR_SELECTORS]
+        if unsupported:
+            raise ValueError(
+                f"selectors {unsupported} do not support --data-dir")
+
+    results = []
+
+    for selector_name in selector_names:
+        selector_class = SELECTORS[selector_name]
+        for training_days in templates:
+            for profile_name in profile_names:
+                preferences, excluded = PROFILES[profile_name]
+
+                def factory():
+                    return _make_selector(
+                        selector_class, training_days, preferences, excluded,
+                        data_dir)
+
+                stats = _time_case(factory, warmup, repeat)
+                stats.update({
+                    "selector": selector_name,
+                    "template": training_days,
+                    "profile": profile_name
+                })
+                results.append(stats)
+                print(f"{selector_name:18} days={training_days} {profile_name:12} "
+                      f"median={stats['median_ms']:9.2f}ms p95={stats['p95_ms']:9.2f}ms "
+                      f"score={stats['score']}")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "warmup": warmup,
+            "repeat": repeat,
+            "data_dir": data_dir
+        },
+        "results": results
+    }
+
+
+def _measure_memory(func: Callable):
+    """
+    在 tracemalloc 下运行 func，返回 (结果, 内存统计)
+    peak_bytes 为运行期间相对起点的峰值，retained_bytes 为结束后仍被持有的增量
+    """
+    gc.collect()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    return result, {
+        "peak_bytes": peak - before,
+        "retained_bytes": current - before
+    }
+
+
+def _top_project_sites(stat_diffs: List, limit: int) -> List[Dict]:
+    """按仓库内最内层调用位置汇总内存增长（跳过标准库内部的帧）"""
+    sites = {}
+    for diff in stat_diffs:
+        location = None
+        for frame in reversed(diff.traceback):
+            if frame.filename.startswith(current_dir):
+                location = f"{os.path.relpath(frame.filename, current_dir)}:{frame.lineno}"
+                break
+        if location is not None:
+            sites[location] = sites.get(location, 0) + diff.size_diff
+
+    ranked = sorted(sites.items(), key=lambda item: item[1], reverse=True)
+    return [{"location": location, "size_diff_bytes": size}
+            for location, size in ranked[:limit]]
+
+
+def run_memory_benchmarks(selector_names: List[str], templates: List[int],
+                          data_dir: str = None, top_sites: int = 10,
+                          lazy_text: bool = False) -> Dict:
+    """
+    内存基准：测量每个选择器的数据加载、候选构建和各训练模板搜索的
+    峰值和保留内存，并记录数据加载阶段保留内存最多的代码位置
+    """
+    if data_dir is not None or lazy_text:
+        unsupported = [name for name in selector_names
+                       if name not in DATA_DIR_SELECTORS]
+        if unsupported:
+            raise ValueError(
+                f"selectors {unsupported} do not support --data-dir/--lazy-text")
+
+    preferences, excluded = PROFILES['default']
+    results = []
+    top_allocations = {}
+
+    tracemalloc.start(TRACEBACK_DEPTH)
+    try:
+        for selector_name in selector_names:
+            selector_class = SELECTORS[selector_name]
+
+            # 1. 数据加载
+            before_snapshot = tracemalloc.take_snapshot()
+            selector, stats = _measure_memory(lambda: _make_selector(
+                selector_class, TEMPLATES[0], preferences, excluded, data_dir,
+                lazy_text))
+            after_snapshot = tracemalloc.take_snapshot()
+            results.append(dict(stats, selector=selector_name,
+                                stage="catalog_load", template=None))
+            top_allocations[selector_name] = _top_project_sites(
+                after_snapshot.compare_to(before_snapshot, 'traceback'), top_sites)
+            del before_snapshot, after_snapshot
+
+            for training_days in templates:
+                selector.TRAINING_DAYS = training_days
+
+                # 2. 候选构建（仅 BaseSelector 子类有独立的候选构建步骤）
+                if hasattr(selector, '_get_candidate_exercises'):
+                    template = selector.training_templates[str(training_days)]
+                    _, stats = _measure_memory(lambda: [
+                        selector._get_candidate_exercises(muscle_groups, set())
+                        for muscle_groups in template if muscle_groups])
+                    results.append(dict(stats, selector=selector_name,
+                                        stage="candidate_building",
+                                        template=training_days))
+
+                # 3. 搜索（保留内存即计划本身）
+                _, stats = _measure_memory(selector.generate_weekly_plan)
+                results.append(dict(stats, selector=selector_name,
+                                    stage="search", template=training_days))
+
+            del selector
+    finally:
+        tracemalloc.stop()
+
+    for result in results:
+        template = f"days={result['template']}" if result['template'] else ""
+        print(f"{result['selector']:18} {result['stage']:19} {template:7} "
+              f"peak={result['peak_bytes'] / 1024:10.1f}KiB "
+              f"retained={result['retained_bytes'] / 1024:10.1f}KiB")
+
+    return {
+        "meta": {
+            "mode": "memory",
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "data_dir": data_dir,
+            "lazy_text": lazy_text
+        },
+        "results": results,
+        "top_allocations": top_allocations
+    }
+
+
+def compare_memory_results(baseline: Dict, current: Dict, threshold: float,
+                           min_delta_bytes: int) -> List[str]:
+    """比较两个内存结果文件，峰值或保留内存增长超过阈值即视为回归"""
+    def case_key(result):
+        return (result['selector'], result['stage'], result['template'])
+
+    baseline_cases = {case_key(r): r for r in baseline['results']}
+    regressions = []
+
+    print(f"{'case':48} {'metric':9} {'base KiB':>10} {'new KiB':>10} {'change':>8}")
+    for result in current['results']:
+        key = case_key(result)
+        base = baseline_cases.get(key)
+        if base is None:
+            continue
+
+        template = f" days={key[2]}" if key[2] else ""
+        name = f"{key[0]} {key[1]}{template}"
+        for metric in ('peak_bytes', 'retained_bytes'):
+            delta = result[metric] - base[metric]
+            change = delta / base[metric] if base[metric] else 0.0
+            regressed = change > threshold and delta > min_delta_bytes
+            marker = "  <-- REGRESSION" if regressed else ""
+            print(f"{name:48} {metric.split('_')[0]:9} {base[metric] / 1024:10.1f} "
+                  f"{result[metric] / 1024:10.1f} {change * 100:7.1f}%{marker}")
+            if regressed:
+                regressions.append(
+                    f"{name}: {metric} grew by {change * 100:.1f}% ({delta} bytes)")
+
+    return regressions
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float,
+                    min_delta_ms: float) -> List[str]:
+    """
+    比较两个结果文件，返回回归说明列表
+
+    回归判定：
+    - 中位数耗时比基线慢超过 threshold（比例）且绝对差超过 min_delta_ms
+    - 周总分低于基线
+    """
+    def case_key(result):
+        return (result['selector'], result['template'], result['profile'])
+
+    baseline_cases = {case_key(r): r for r in baseline['results']}
+    regressions = []
+
+    print(f"{'case':45} {'base ms':>10} {'new ms':>10} {'change':>8}  score")
+    for result in current['results']:
+        key = case_key(result)
+        base = baseline_cases.get(key)
+        if base is None:
+            continue
+
+        name = f"{key[0]} days={key[1]} {key[2]}"
+        change = result['median_ms'] / base['median_ms'] - \
+            1 if base['median_ms'] else 0.0
+        flags = []
+        if change > threshold and result['median_ms'] - base['median_ms'] > min_delta_ms:
+            flags.append(f"slower by {change * 100:.1f}%")
+        if result['score'] < base['score']:
+            flags.append(f"score {base['score']} -> {result['score']}")
+
+        marker = "  <-- REGRESSION" if flags else ""
+        print(f"{name:45} {base['median_ms']:10.2f} {result['median_ms']:10.2f} "
+              f"{change * 100:7.1f}%  {result['score']}{marker}")
+        if flags:
+            regressions.append(f"{name}: {', '.join(flags)}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Workout selector benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="运行基准测试")
+    run_parser.add_argument('--selectors', nargs='+', choices=list(SELECTORS),
+                            default=list(SELECTORS))
+    run_parser.add_argument('--templates', nargs='+', type=int, choices=TEMPLATES,
+                            default=TEMPLATES)
+    run_parser.add_argument('--profiles', nargs='+', choices=list(PROFILES),
+                            default=list(PROFILES))
+    run_parser.add_argument('--warmup', type=int, default=1)
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    run_parser.add_argument('--data-dir',
+                            help="使用其他数据目录（仅 greedy/hybrid 支持）")
+
+    memory_parser = subparsers.add_parser('memory', help="运行内存基准测试")
+    memory_parser.add_argument('--selectors', nargs='+', choices=list(SELECTORS),
+                               default=list(SELECTORS))
+    memory_parser.add_argument('--templates', nargs='+', type=int, choices=TEMPLATES,
+                               default=TEMPLATES)
+    memory_parser.add_argument('--output', default=DEFAULT_MEMORY_OUTPUT)
+    memory_parser.add_argument('--data-dir',
+                               help="使用其他数据目录（仅 greedy/hybrid 支持）")
+    memory_parser.add_argument('--lazy-text', action='store_true',
+                               help="不加载 steps/notes（仅 greedy/hybrid 支持）")
+
+    compare_parser = subparsers.add_parser(
+        'compare', help="比较两个结果文件（耗时或内存）")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.20,
+                                help="允许的中位数变慢比例（默认0.20）")
+    compare_parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                                help="忽略小于该绝对值的耗时变化（毫秒）")
+    compare_parser.add_argument('--min-delta-bytes', type=int, default=4096,
+                                help="内存比较时忽略小于该值的增长（字节）")
+
+    args = parser.parse_args()
+
+    if args.command in ('run', 'memory'):
+        if args.command == 'run':
+            report = run_benchmarks(args.selectors, args.templates, args.profiles,
+                                    args.warmup, args.repeat, args.data_dir)
+        else:
+            report = run_memory_benchmarks(
+                args.selectors, args.templates, args.data_dir,
+                lazy_text=args.lazy_text)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    else:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+
+        if baseline['meta'].get('mode') != current['meta'].get('mode'):
+            parser.error("cannot compare a memory report with a timing report")
+
+        if current['meta'].get('mode') == 'memory':
+            regressions = compare_memory_results(
+                baseline, current, args.threshold, args.min_delta_bytes)
+        else:
+            regressions = compare_results(
+                baseline, current, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import copy
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+# 将当前目录添加到 Python 路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from algorithms.compiled_catalog import CompiledCatalog  # noqa: E402
+from algorithms.greedy_selector import GreedySelector  # noqa: E402
+from algorithms.hybrid_selector import HybridSelector  # noqa: E402
+from benchmark import PROFILES, TEMPLATES  # noqa: E402
+
+SELECTORS = {
+    "greedy": GreedySelector,
+    "hybrid": HybridSelector
+}
+
+DEFAULT_OUTPUT = os.path.join(current_dir, 'out', 'sweep.json')
+
+# 结果表中显示的指标列
+METRICS = ('total_score', 'mean_day_score', 'family_repeats', 'weekly_repeats', 'runtime_ms')
+
+# 工作进程中创建的选择器：{算法名: 选择器}
+_worker_selectors = {}
+
+
+# ========== 配置变体 ==========
+
+def _set_path(config: Dict, path: str, value) -> None:
+    """按点分路径修改配置，如 diversity_rules.penalties.same_family"""
+    keys = path.split('.')
+    node = config
+    for key in keys[:-1]:
+        if key not in node:
+            raise KeyError(f"unknown config path: {path}")
+        node = node[key]
+    if keys[-1] not in node:
+        raise KeyError(f"unknown config path: {path}")
+    node[keys[-1]] = value
+
+
+def expand_variants(spec: Dict, base_config: Dict) -> List[Tuple[Dict, Dict]]:
+    """
+    根据扫描说明生成配置变体 [(修改项, 完整配置)]
+
+    扫描说明的格式（键为 config.json 中的点分路径）：
+        {"grid": {"diversity_rules.penalties.same_family": [-5, -10, -15],
+                  "position_scores.major_muscle.scores": [[8, 5, 0, 0, 0], [10, 6, 0, 0, 0]]}}
+    或随机采样：
+        {"random": {"samples": 500, "seed": 1,
+                    "ranges": {"diversity_rules.balance_penalty": {"min": -6, "max": 0},
+                               "position_scores.free_weight.scores": {"choices": [[3, 2, 0, 0, 0]]}}}}
+    min/max 都是整数时取整数，否则取两位小数
+    """
+    if 'grid' in spec:
+        paths = list(spec['grid'])
+        combinations = [dict(zip(paths, values))
+                        for values in itertools.product(*(spec['grid'][path] for path in paths))]
+    elif 'random' in spec:
+        sampling = spec['random']
+        rng = random.Random(sampling.get('seed', 0))
+        combinations = []
+        for _ in range(sampling['samples']):
+            overrides = {}
+            for path, value_range in sampling['ranges'].items():
+                if 'choices' in value_range:
+                    overrides[path] = rng.choice(value_range['choices'])
+                elif isinstance(value_range['min'], int) and isinstance(value_range['max'], int):
+                    overrides[path] = rng.randint(value_range['min'], value_range['max'])
+                else:
+                    overrides[path] = round(rng.uniform(value_range['min'], value_range['max']), 2)
+            combinations.append(overrides)
+    else:
+        raise ValueError("sweep spec needs a 'grid' or 'random' section")
+
+    variants = []
+    for overrides in combinations:
+        config = copy.deepcopy(base_config)
+        for path, value in overrides.items():
+            _set_path(config, path, value)
+        variants.append((overrides, config))
+    return variants
+
+
+# ========== 评估 ==========
+
+def _plan_metrics(selector, plan: Dict) -> Dict:
+    """单个周计划的指标：总分、训练日平均分、当天同族重复数、全周重复动作数"""
+    training_days = [day for day in plan.values() if day['exercises']]
+    family_repeats = 0
+    picks = []
+    for day in training_days:
+        families = set()
+        for exercise in day['exercises']:
+            picks.append(exercise['pk'])
+            family = selector._get_exercise_family(exercise['pk'])
+            if family is None:
+                continue
+            if family in families:
+                family_repeats += 1
+            families.add(family)
+
+    total_score = sum(day['total_score'] for day in training_days)
+    return {
+        'total_score': total_score,
+        'mean_day_score': total_score / len(training_days) if training_days else 0.0,
+        'family_repeats': family_repeats,
+        'weekly_repeats': len(picks) - len(set(picks))
+    }
+
+
+def _init_worker(catalog_path: str, data_dir: str, algorithms: List[str]) -> None:
+    """工作进程初始化：内存映射共享的编译索引，每种算法只创建一个选择器"""
+    compiled_catalog = CompiledCatalog.open_mmap(catalog_path)
+    for name in algorithms:
+        _worker_selectors[name] = SELECTORS[name](
+            data_dir, lazy_text=True, compiled_catalog=compiled_catalog)
+
+
+def _evaluate_chunk(chunk: List[Tuple[int, Dict]], algorithms: List[str],
+                    templates: List[int], profile_names: List[str]) -> List[Dict]:
+    """
+    评估一批配置变体
+
+    循环顺序为 偏好场景 → 变体 → 训练模板：候选缓存按用户配置保留，
+    扫描不涉及 scoring_weights 时，同一场景下的所有变体共用一次候选构建和静态评分
+    """
+    totals = {(index, name): dict.fromkeys(METRICS, 0)
+              for index, _ in chunk for name in algorithms}
+    for name in algorithms:
+        selector = _worker_selectors[name]
+        base_preferences = dict(type(selector).MUSCLE_PREFERENCES)
+        for profile_name in profile_names:
+            preferences, excluded = PROFILES[profile_name]
+            selector.MUSCLE_PREFERENCES = dict(base_preferences, **preferences)
+            selector.EXCLUDED_EXERCISES = set(excluded)
+            for index, config in chunk:
+                selector.set_config(config)
+                row = totals[(index, name)]
+                for training_days in templates:
+                    selector.TRAINING_DAYS = training_days
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        start_time = time.perf_counter()
+                        plan = selector.generate_weekly_plan()
+                        row['runtime_ms'] += (time.perf_counter() - start_time) * 1000
+                    for metric, value in _plan_metrics(selector, plan).items():
+                        row[metric] += value
+
+    cases = len(templates) * len(profile_names)
+    results = []
+    for (index, name), row in totals.items():
+        results.append(dict(
+            {metric: round(value, 3) for metric, value in row.items()},
+            variant=index, algorithm=name,
+            mean_day_score=round(row['mean_day_score'] / cases, 3)))
+    return results
+
+
+def run_sweep(spec: Dict, algorithms: List[str], templates: List[int],
+              profile_names: List[str], processes: int = 1,
+              data_dir: str = current_dir) -> Dict:
+    """
+    在所有训练模板 × 偏好场景上评估每个配置变体
+
+    动作库和分类文件只编译一次，写入 out/ 后由各工作进程内存映射共享；
+    每个变体只替换选择器的配置，不重新加载数据
+    """
+    base_selector = SELECTORS[algorithms[0]](data_dir, lazy_text=True)
+    variants = expand_variants(spec, base_selector.config)
+    indexed = [(index, config) for index, (_, config) in enumerate(variants)]
+
+    catalog_path = os.path.join(data_dir, 'out', 'sweep_catalog.bin')
+    base_selector.compiled_catalog.write(catalog_path)
+
+    start_time = time.perf_counter()
+    if processes <= 1:
+        _init_worker(catalog_path, data_dir, algorithms)
+        results = _evaluate_chunk(indexed, algorithms, templates, profile_names)
+    else:
+        # 每个进程分到若干批，批数多于进程数以平衡负载
+        chunk_count = min(len(indexed), processes * 4)
+        chunks = [indexed[start::chunk_count] for start in range(chunk_count)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(catalog_path, data_dir, algorithms)) as pool:
+            futures = [pool.submit(_evaluate_chunk, chunk, algorithms, templates,
+                                   profile_names) for chunk in chunks]
+            results = [row for future in futures for row in future.result()]
+    elapsed = time.perf_counter() - start_time
+
+    for row in results:
+        row['overrides'] = variants[row['variant']][0]
+    results.sort(key=lambda row: (row['algorithm'], row['variant']))
+    return {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "variants": len(variants),
+            "algorithms": algorithms,
+            "templates": templates,
+            "profiles": profile_names,
+            "processes": processes,
+            "elapsed_s": round(elapsed, 3)
+        },
+        "results": results
+    }
+
+
+def print_table(report: Dict, sort_by: str, limit: int) -> None:
+    """按指标排序打印结果表（分数越高越好，其余指标越低越好）"""
+    descending = sort_by in ('total_score', 'mean_day_score')
+    rows = sorted(report['results'], key=lambda row: row[sort_by], reverse=descending)
+    header = f"{'variant':>7} {'algorithm':9} " + " ".join(f"{metric:>15}" for metric in METRICS)
+    print(header)
+    print("-" * len(header))
+    for row in rows[:limit]:
+        print(f"{row['variant']:>7} {row['algorithm']:9} " +
+              " ".join(f"{row[metric]:>15}" for metric in METRICS) +
+              f"  {json.dumps(row['overrides'])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep config.json variants")
+    parser.add_argument('spec', help="扫描说明 JSON 文件（grid 或 random，见 expand_variants）")
+    parser.add_argument('--algorithms', nargs='+', choices=list(SELECTORS), default=['greedy'])
+    parser.add_argument('--templates', nargs='+', type=int, choices=TEMPLATES,
+                        default=TEMPLATES)
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES),
+                        default=list(PROFILES))
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--sort-by', choices=METRICS, default='total_score')
+    parser.add_argument('--top', type=int, default=20, help="打印前多少行")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    report = run_sweep(spec, args.algorithms, args.templates, args.profiles,
+                       args.processes)
+    print_table(report, args.sort_by, args.top)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{report['meta']['variants']} variants in {report['meta']['elapsed_s']}s; "
+          f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,10 @@ import os
 import sys
 from typing import Dict, List, Tuple, Set
 
-# 强制设置UTF-8编码
-import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# 强制设置UTF-8编码（原地重新配置，多个模块一起导入时不会关闭底层流）
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
 # Windows控制台UTF-8设置
 if sys.platform.startswith('win'):
@@ -3,10 +3,10 @@ import os
 import sys
 from typing import Dict, List, Tuple, Set
 
-# 强制设置UTF-8编码
-import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# 强制设置UTF-8编码（原地重新配置，多个模块一起导入时不会关闭底层流）
+if hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
 # Windows控制台UTF-8设置
 if sys.platform.startswith('win'):
@@ -64,10 +64,11 @@ class GreedyWorkoutSelector:
         # 加载所有需要的文件 - 明确指定UTF-8编码
         self.exercises = self._load_json(
             os.path.join(current_dir, 'strength.json'))
-        self.config = self._load_json(os.path.join(current_dir, 'config.json'))
+        self.config = self._load_json(
+            os.path.join(current_dir, 'config_old.json'))
 
         # 加载分类文件
-        classification_dir = os.path.join(current_dir, 'classification')
+        classification_dir = os.path.join(current_dir, 'classification_old')
         self.classifications = {
             'upper_lower': self._load_json(os.path.join(classification_dir, 'ontology1_upper_lower.json')),
             'ppl': self._load_json(os.path.join(classification_dir, 'ontology2_PPL.json')),
@@ -0,0 +1,187 @@
+import argparse
+import json
+import math
+import os
+import random
+import re
+import shutil
+from typing import Dict, List
+
+# 当前目录（仓库自带的真实数据）
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 预设规模
+SIZE_PRESETS = {
+    "1k": 1000,
+    "10k": 10000,
+    "100k": 100000
+}
+
+# 名称前缀变体（对应 README 中的 <Variation>）
+VARIATIONS = [
+    "", "", "", "Wide-Grip ", "Close-Grip ", "Incline ", "Decline ",
+    "Single-Arm ", "Single-Leg ", "Paused ", "Tempo ", "Seated ", "Standing ",
+    "Kneeling ", "Reverse-Grip ", "Deficit "
+]
+
+# 属性随机翻转概率（让合成动作不完全照抄模板）
+FLAG_FLIP_PROBABILITY = 0.05
+
+
+def _load_json(filepath: str):
+    """加载JSON文件 - 使用UTF-8编码"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(filepath: str, data) -> None:
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def _split_name(name: str):
+    """按 '<名称> – <器械>' 约定拆分动作名称"""
+    if ' – ' in name:
+        base, equipment = name.rsplit(' – ', 1)
+        return base.strip(), equipment.strip()
+    return name.strip(), None
+
+
+def _membership(mapping: Dict[str, List[int]]) -> Dict[int, List[str]]:
+    """把 {分组: [pk]} 反转为 {pk: [分组]}"""
+    result = {}
+    for group, exercise_ids in mapping.items():
+        for exercise_id in exercise_ids:
+            result.setdefault(exercise_id, []).append(group)
+    return result
+
+
+def generate_catalog(size: int, seed: int, output_dir: str,
+                     source_dir: str = current_dir) -> None:
+    """
+    生成与 strength.json 同格式的合成动作库及配套分类文件
+
+    每个合成动作以一个真实动作为模板：沿用其肌群、分类归属和文字说明，
+    再替换名称变体和器械，并以小概率翻转二元分类属性。动作族按规模扩展
+    （每个真实动作族拆成多个编号子族），保持族的平均大小与真实数据接近。
+    同样的 size 和 seed 总是生成完全相同的文件。
+
+    Args:
+        size: 合成动作数量
+        seed: 随机种子
+        output_dir: 输出目录（布局与仓库数据目录相同，可直接作为 data_dir）
+        source_dir: 真实数据目录
+    """
+    rng = random.Random(seed)
+    classification_dir = os.path.join(source_dir, 'classification')
+
+    templates = _load_json(os.path.join(source_dir, 'strength.json'))
+    category_membership = _membership(_load_json(
+        os.path.join(classification_dir, 'categoryMapping.json')))
+    family_membership = _membership(_load_json(
+        os.path.join(classification_dir, 'type6_movementFamily.json')))
+
+    binary_files = {
+        'type1_isMajor.json': None,
+        'type2_isCompound.json': None,
+        'type3_isSingle.json': None,
+        'type4_isMachine.json': None,
+        'type5_isCommon.json': None
+    }
+    for filename in binary_files:
+        binary_files[filename] = _load_json(
+            os.path.join(classification_dir, filename))
+
+    # 真实数据中的器械分布
+    equipment_pool = [equipment for _, equipment in
+                      (_split_name(ex['name']) for ex in templates)]
+
+    # 每个真实动作族拆分的子族数量
+    family_shards = max(1, math.ceil(size / len(templates)))
+
+    exercises = []
+    category_mapping = {group: [] for group in _load_json(
+        os.path.join(classification_dir, 'categoryMapping.json'))}
+    family_mapping = {}
+    binary_mappings = {filename: {group: [] for group in groups}
+                       for filename, groups in binary_files.items()}
+
+    for pk in range(1, size + 1):
+        template = rng.choice(templates)
+        base_name, _ = _split_name(template['name'])
+        variation = rng.choice(VARIATIONS)
+        equipment = rng.choice(equipment_pool)
+        name = f"{variation}{base_name}"
+        if equipment:
+            name = f"{name} – {equipment}"
+
+        exercises.append({
+            "pk": pk,
+            "name": name,
+            "slug": f"{_slugify(name)}-{pk}",
+            "primaryMuscles": list(template['primaryMuscles']),
+            "secondaryMuscles": list(template.get('secondaryMuscles', [])),
+            "steps": list(template.get('steps', [])),
+            "notes": template.get('notes', "")
+        })
+
+        for group in category_membership.get(template['pk'], []):
+            category_mapping[group].append(pk)
+
+        for family in family_membership.get(template['pk'], []):
+            shard = rng.randrange(family_shards)
+            family_name = family if shard == 0 else f"{family} #{shard + 1}"
+            family_mapping.setdefault(family_name, []).append(pk)
+
+        # 二元分类：沿用模板归属，小概率翻转到另一组
+        for filename, mapping in binary_files.items():
+            groups = [group for group, ids in mapping.items()
+                      if template['pk'] in ids]
+            if not groups:
+                continue
+            group = groups[0]
+            if len(mapping) == 2 and rng.random() < FLAG_FLIP_PROBABILITY:
+                group = next(g for g in mapping if g != group)
+            binary_mappings[filename][group].append(pk)
+
+    output_classification_dir = os.path.join(output_dir, 'classification')
+    _write_json(os.path.join(output_dir, 'strength.json'), exercises)
+    _write_json(os.path.join(output_classification_dir,
+                'categoryMapping.json'), category_mapping)
+    _write_json(os.path.join(output_classification_dir,
+                'type6_movementFamily.json'), family_mapping)
+    for filename, mapping in binary_mappings.items():
+        _write_json(os.path.join(output_classification_dir, filename), mapping)
+
+    # 与规模无关的文件直接复制
+    shutil.copyfile(os.path.join(source_dir, 'config.json'),
+                    os.path.join(output_dir, 'config.json'))
+    for filename in ('preferenceMapping.json', 'trainingTemplates.json'):
+        shutil.copyfile(os.path.join(classification_dir, filename),
+                        os.path.join(output_classification_dir, filename))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic strength catalogs for scaling studies")
+    parser.add_argument('--sizes', nargs='+', default=list(SIZE_PRESETS),
+                        help="规模：预设名（1k/10k/100k）或动作数量")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=os.path.join(current_dir, 'out', 'synthetic'),
+                        help="输出根目录，每个规模生成一个子目录")
+    args = parser.parse_args()
+
+    for size_name in args.sizes:
+        size = SIZE_PRESETS.get(size_name) or int(size_name)
+        output_dir = os.path.join(args.output, size_name)
+        generate_catalog(size, args.seed, output_dir)
+        print(f"Generated {size} exercises in {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
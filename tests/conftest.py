@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# 测试从仓库根目录导入 algorithms 包
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from algorithms.greedy_selector import GreedySelector  # noqa: E402
+from algorithms.hybrid_selector import HybridSelector  # noqa: E402
+
+SELECTOR_CLASSES = [GreedySelector, HybridSelector]
+
+
+@pytest.fixture(scope='session')
+def compiled_catalog():
+    """所有测试共用一份编译索引，选择器只加载动作库"""
+    return GreedySelector(ROOT, lazy_text=True).compiled_catalog
+
+
+@pytest.fixture(params=SELECTOR_CLASSES, ids=lambda cls: cls.__name__)
+def selector(request, compiled_catalog):
+    """每个测试一个新的选择器（两种算法各一次）"""
+    return request.param(ROOT, lazy_text=True, compiled_catalog=compiled_catalog)
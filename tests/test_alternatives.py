@@ -0,0 +1,37 @@
+import itertools
+
+import pytest
+
+from algorithms.hybrid_selector import HybridSelector
+
+from conftest import ROOT
+
+
+def _brute_force(selector, muscle_groups, k, min_difference):
+    """枚举全部组合，按总分从高到低（同分按枚举顺序）选取差异足够的K个方案"""
+    candidates = selector._get_candidate_exercises(muscle_groups, set())
+    exercises_per_day = selector.config['algorithm_params']['exercises_per_day']
+    scored = [(selector._evaluate_combination(combo, candidates, set()), combo)
+              for combo in itertools.combinations(candidates, exercises_per_day)]
+    scored.sort(key=lambda item: -item[0])
+
+    picked = []
+    for _, combo in scored:
+        if all(len(set(combo) - set(other)) >= min_difference for other in picked):
+            picked.append(combo)
+            if len(picked) == k:
+                break
+    return picked
+
+
+@pytest.mark.parametrize('min_difference', [1, 2, 3])
+def test_alternatives_match_brute_force(compiled_catalog, min_difference):
+    """背部候选不超过30个，"换一组"的方案与暴力枚举的结果一致"""
+    selector = HybridSelector(ROOT, lazy_text=True, compiled_catalog=compiled_catalog)
+    assert len(selector._get_candidate_exercises(['back'], set())) <= 30
+
+    alternatives = selector.select_day_alternatives(
+        ['back'], set(), k=4, min_difference=min_difference)
+    assert [tuple(exercise['pk'] for exercise in alternative)
+            for alternative in alternatives] == \
+        _brute_force(selector, ['back'], 4, min_difference)
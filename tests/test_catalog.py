@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from algorithms import catalog
+from algorithms.catalog import iter_exercises
+
+from conftest import ROOT
+
+
+def _exercises(count):
+    with open(os.path.join(ROOT, 'strength.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)[:count]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64])
+def test_records_split_across_chunks(tmp_path, chunk_size):
+    """块边界落在对象的任意位置（关键字、数字、转义中间）都能正确解析"""
+    exercises = _exercises(10)
+    path = tmp_path / 'strength.json'
+    path.write_text(json.dumps(exercises, indent=2), encoding='utf-8')
+    assert [exercise for exercise, _, _ in iter_exercises(str(path), chunk_size)] == exercises
+
+
+def test_malformed_record_is_reported_without_reading_to_eof(tmp_path, monkeypatch):
+    """文件中间的对象格式错误时立即报告出错位置，不再读取后面的数据"""
+    exercises = _exercises(40)
+    head = json.dumps(exercises[:2])[:-1]
+    text = head + ', {"pk": 99, "name" "Broken"}, ' + json.dumps(exercises[2:])[1:]
+    path = tmp_path / 'strength.json'
+    path.write_text(text, encoding='utf-8')
+
+    bytes_read = []
+
+    class CountingFile:
+        def __init__(self, f):
+            self._f = f
+
+        def read(self, size):
+            data = self._f.read(size)
+            bytes_read.append(len(data))
+            return data
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._f.close()
+
+    monkeypatch.setattr(catalog, 'open', lambda *args: CountingFile(open(*args)),
+                        raising=False)
+    start = len((head + ', ').encode('utf-8'))
+    with pytest.raises(ValueError, match=f'byte {start}'):
+        list(iter_exercises(str(path), chunk_size=1024))
+    assert sum(bytes_read) < os.path.getsize(path) // 2
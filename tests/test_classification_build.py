@@ -0,0 +1,31 @@
+import json
+import os
+import shutil
+
+from algorithms.classification_build import ClassificationBuilder
+
+from conftest import ROOT
+
+
+def test_shipped_data_has_only_known_issues(tmp_path):
+    """仓库中的分类文件只有已知问题清单中的问题，清单中也没有已解决的条目"""
+    builder = ClassificationBuilder(ROOT, state_path=str(tmp_path / 'state.json'))
+    result = builder.run(full=True)
+    baseline = builder.load_baseline()
+    assert result.new_issues(baseline) == []
+    assert result.resolved(baseline) == set()
+
+
+def test_new_issue_is_reported(tmp_path):
+    """清单之外的新问题（失效的 pk）会被报告"""
+    shutil.copy(os.path.join(ROOT, 'strength.json'), tmp_path)
+    shutil.copytree(os.path.join(ROOT, 'classification'), tmp_path / 'classification')
+    path = tmp_path / 'classification' / 'type2_isCompound.json'
+    mapping = json.loads(path.read_text(encoding='utf-8'))
+    next(iter(mapping.values())).append(9999)
+    path.write_text(json.dumps(mapping), encoding='utf-8')
+
+    builder = ClassificationBuilder(str(tmp_path))
+    result = builder.run()
+    assert [issue.key for issue in result.new_issues(builder.load_baseline())] == \
+        [('type2_isCompound.json', 'unknown', 9999)]
@@ -0,0 +1,29 @@
+import warnings
+
+from algorithms.compiled_catalog import equipment_key, equipment_of
+
+
+def test_equipment_suffix_forms():
+    """' – ' 和 ' - ' 两种分隔符都能取出器械，名称内的连字符不算"""
+    assert equipment_of('Bench Press – Barbell') == 'Barbell'
+    assert equipment_of('Plank - BOSU') == 'BOSU'
+    assert equipment_of('Pull-Up') == ''
+    assert equipment_of('Face Pull') == ''
+
+
+def test_equipment_aliases_share_one_id(compiled_catalog):
+    """同一器械的不同写法归并到同一个编号"""
+    assert equipment_key('Rings') == equipment_key('Hands in Rings') == 'ring'
+    assert equipment_key('Cable With Rope') == equipment_key('cable with bar') == 'cable'
+    assert compiled_catalog.equipment_mask(['Rings']) == compiled_catalog.equipment_mask(['ring'])
+    names = [equipment_key(name) for name in compiled_catalog.equipment_names]
+    assert len(names) == len(set(names))
+
+
+def test_unknown_equipment_is_ignored(compiled_catalog):
+    """动作库中没有的器械不报错，只给出警告"""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        mask = compiled_catalog.equipment_mask(['Foo', 'Dumbbell'])
+    assert mask == compiled_catalog.equipment_mask(['Dumbbell'])
+    assert any('Foo' in str(warning.message) for warning in caught)
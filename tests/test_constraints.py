@@ -0,0 +1,75 @@
+import pytest
+
+from algorithms.compiled_catalog import EQUIPMENT, SINGLE_SIDED
+from algorithms.constraints import InfeasibleConstraintsError
+
+SPECS = [
+    {'must_include': [2], 'max_machine_per_day': 1, 'min_unilateral_per_day': 2},
+    {'must_include': [9, 38], 'max_machine_per_day': 2},
+    {'max_machine_per_day': 0, 'min_unilateral_per_day': 3},
+    {'min_unilateral_per_day': 5},
+]
+
+
+def _check_plan(selector, spec, plan):
+    flags = selector.compiled_catalog.flags
+    exercises_per_day = selector.config['algorithm_params']['exercises_per_day']
+    picked = set()
+    for day_name, day_plan in plan.items():
+        exercise_ids = [exercise['pk'] for exercise in day_plan['exercises']]
+        if not exercise_ids:
+            continue
+        picked.update(exercise_ids)
+        assert len(exercise_ids) == exercises_per_day, day_name
+        unilateral = sum(1 for pk in exercise_ids if flags[pk] & SINGLE_SIDED)
+        machines = sum(1 for pk in exercise_ids if flags[pk] & EQUIPMENT)
+        assert unilateral >= spec.get('min_unilateral_per_day', 0), day_name
+        if spec.get('max_machine_per_day') is not None:
+            assert machines <= spec['max_machine_per_day'], day_name
+    assert set(spec.get('must_include', [])) <= picked
+
+
+# (约束, 训练天数, 预期报告不可行的训练日；None 表示每天都能满足)
+# 5天计划的胸部日（Day 1）单侧动作不足，后两组约束在这一天不可行
+CASES = [
+    (SPECS[0], 3, None), (SPECS[0], 5, None), (SPECS[0], 7, None),
+    (SPECS[1], 3, None), (SPECS[1], 5, None), (SPECS[1], 7, None),
+    (SPECS[2], 3, None), (SPECS[2], 5, 'Day 1'), (SPECS[2], 7, None),
+    (SPECS[3], 3, None), (SPECS[3], 5, 'Day 1'), (SPECS[3], 7, None),
+]
+
+
+@pytest.mark.parametrize('spec, training_days, infeasible_day', CASES)
+def test_days_satisfy_constraints_or_report_infeasible(selector, spec, training_days,
+                                                       infeasible_day):
+    """每天都满足硬约束，否则明确报告不可行的那一天，不会返回不完整的一天"""
+    selector.TRAINING_DAYS = training_days
+    selector.HARD_CONSTRAINTS = spec
+    if infeasible_day is not None:
+        with pytest.raises(InfeasibleConstraintsError, match=infeasible_day):
+            selector.generate_weekly_plan()
+    else:
+        _check_plan(selector, spec, selector.generate_weekly_plan())
+
+
+def test_greedy_does_not_dead_end(selector):
+    """贪心逐个加入动作时按候选池检查剩余位置，背部日能选满5个"""
+    selector.TRAINING_DAYS = 5
+    selector.HARD_CONSTRAINTS = SPECS[0]
+    _check_plan(selector, SPECS[0], selector.generate_weekly_plan())
+
+
+def test_infeasible_day_is_reported(selector):
+    """胸部候选中只有4个单侧动作，要求5个时报告不可行"""
+    selector.TRAINING_DAYS = 5
+    selector.HARD_CONSTRAINTS = {'min_unilateral_per_day': 5}
+    with pytest.raises(InfeasibleConstraintsError, match='Day 1'):
+        selector.generate_weekly_plan()
+
+
+def test_unplaceable_must_include_is_rejected(selector):
+    """不属于任何训练日候选池的必选动作（如 Plank）直接报错"""
+    selector.TRAINING_DAYS = 5
+    selector.HARD_CONSTRAINTS = {'must_include': [12]}
+    with pytest.raises(ValueError, match=r'\[12\]'):
+        selector.generate_weekly_plan()
@@ -0,0 +1,34 @@
+import copy
+import json
+import os
+
+from algorithms.duplicates import DuplicateIndex, review_submissions
+
+from conftest import ROOT
+
+
+def _submissions(start):
+    """动作库中两个动作的改名副本（每个都应与原动作判为疑似重复）"""
+    with open(os.path.join(ROOT, 'strength.json'), 'r', encoding='utf-8') as f:
+        exercises = json.load(f)[start:start + 2]
+    submissions = []
+    for exercise in exercises:
+        exercise = copy.deepcopy(exercise)
+        exercise['name'] += ' Variation'
+        submissions.append(exercise)
+    return submissions
+
+
+def test_review_submissions_keeps_the_index_reusable():
+    """同一个索引连续检查两批提交：索引不变，第二批的结果与在新索引上相同"""
+    index = DuplicateIndex.from_data_dir(ROOT)
+    entries = dict(index.entries)
+    buckets = {key: list(exercise_ids) for key, exercise_ids in index.buckets.items()}
+
+    first = review_submissions(index, _submissions(0))
+    second = review_submissions(index, _submissions(10))
+
+    assert index.entries == entries
+    assert index.buckets == buckets
+    assert first[0]['duplicates'][0]['pk'] == 1
+    assert second == review_submissions(DuplicateIndex.from_data_dir(ROOT), _submissions(10))
@@ -0,0 +1,43 @@
+import copy
+
+from algorithms.greedy_selector import GreedySelector
+from algorithms.plan_cache import PlanCache
+
+from conftest import ROOT
+
+
+def _negated_config(config):
+    config = copy.deepcopy(config)
+    for weight in config['scoring_weights'].values():
+        for key, value in weight.items():
+            if isinstance(value, (int, float)):
+                weight[key] = -value
+    return config
+
+
+def test_set_config_misses_the_cache(compiled_catalog, tmp_path):
+    """set_config 替换评分配置后不会命中替换前的计划"""
+    selector = GreedySelector(ROOT, lazy_text=True, compiled_catalog=compiled_catalog)
+    selector.TRAINING_DAYS = 3
+    cache = PlanCache(str(tmp_path / 'plans.sqlite'))
+    cache.get_or_generate(selector)
+
+    selector.set_config(_negated_config(selector.config))
+    misses = cache.misses
+    plan = cache.get_or_generate(selector)
+    assert cache.misses == misses + 1
+    assert plan == selector.generate_weekly_plan()
+
+
+def test_previous_weeks_are_part_of_the_key(compiled_catalog, tmp_path):
+    """前几周已选动作不同的计划使用不同的缓存键"""
+    selector = GreedySelector(ROOT, lazy_text=True, compiled_catalog=compiled_catalog)
+    selector.TRAINING_DAYS = 3
+    cache = PlanCache(str(tmp_path / 'plans.sqlite'))
+    first = cache.get_or_generate(selector)
+
+    selector.previous_week_ids = {exercise['pk'] for day in first.values()
+                                  for exercise in day['exercises']}
+    misses = cache.misses
+    assert cache.get_or_generate(selector) == selector.generate_weekly_plan()
+    assert cache.misses == misses + 1
@@ -0,0 +1,66 @@
+import pytest
+
+from algorithms.compiled_catalog import CompiledCatalog
+from algorithms.unified_catalog import UnifiedCatalog
+
+from conftest import ROOT, SELECTOR_CLASSES
+
+TRAINING_DAYS = range(1, 8)
+
+
+@pytest.fixture(scope='module')
+def reference_plans():
+    """普通方式构造的选择器（自行加载并编译分类文件）生成的各模板计划"""
+    plans = {}
+    for selector_class in SELECTOR_CLASSES:
+        selector = selector_class(ROOT, lazy_text=True)
+        for training_days in TRAINING_DAYS:
+            selector.TRAINING_DAYS = training_days
+            plans[selector_class, training_days] = selector.generate_weekly_plan()
+    return plans
+
+
+def _plans(selector):
+    plans = {}
+    for training_days in TRAINING_DAYS:
+        selector.TRAINING_DAYS = training_days
+        plans[type(selector), training_days] = selector.generate_weekly_plan()
+    return plans
+
+
+@pytest.mark.parametrize('selector_class', SELECTOR_CLASSES, ids=lambda cls: cls.__name__)
+def test_mmapped_catalog_gives_same_plans(tmp_path, reference_plans, selector_class):
+    """工作进程内存映射的编译索引与现场编译的索引生成相同的计划"""
+    path = str(tmp_path / 'catalog.bin')
+    selector_class(ROOT, lazy_text=True).compiled_catalog.write(path)
+    selector = selector_class(ROOT, lazy_text=True,
+                              compiled_catalog=CompiledCatalog.open_mmap(path))
+    for key, plan in _plans(selector).items():
+        assert plan == reference_plans[key], key
+
+
+@pytest.mark.parametrize('selector_class', SELECTOR_CLASSES, ids=lambda cls: cls.__name__)
+def test_unified_catalog_gives_same_plans(reference_plans, selector_class):
+    """从统一列式索引取动作的选择器生成相同的计划"""
+    selector = selector_class(ROOT, unified_catalog=UnifiedCatalog.load(ROOT))
+    for key, plan in _plans(selector).items():
+        assert plan == reference_plans[key], key
+
+
+def test_plans_are_well_formed(reference_plans):
+    """每个训练日选满且动作属于当天的候选池，一周内不重复，重复生成结果不变"""
+    for (selector_class, training_days), plan in reference_plans.items():
+        selector = selector_class(ROOT, lazy_text=True)
+        selector.TRAINING_DAYS = training_days
+        assert selector.generate_weekly_plan() == plan
+        exercises_per_day = selector.config['algorithm_params']['exercises_per_day']
+        picked = []
+        for day_plan in plan.values():
+            exercise_ids = [exercise['pk'] for exercise in day_plan['exercises']]
+            if not exercise_ids:
+                continue
+            assert len(exercise_ids) == exercises_per_day
+            assert set(exercise_ids) <= selector._get_candidate_ids(day_plan['muscle_groups'])
+            assert not set(exercise_ids) & selector.EXCLUDED_EXERCISES
+            picked.extend(exercise_ids)
+        assert len(picked) == len(set(picked)), (selector_class.__name__, training_days)
@@ -0,0 +1,62 @@
+import itertools
+
+import pytest
+
+from algorithms.greedy_selector import GreedySelector
+from algorithms.hybrid_selector import HybridSelector
+from algorithms.plan_cache import PlanCache
+from algorithms.sensitivity import PreferenceSensitivity
+
+CATEGORIES = ('chest', 'back', 'shoulder', 'arm', 'leg', 'core')
+
+
+def _preference_grid():
+    """同分边界上的整齐系数、它们的小幅扰动，以及评审中复现过的系数"""
+    grid = [dict(zip(CATEGORIES, values))
+            for values in itertools.product((0.8, 1.0), repeat=len(CATEGORIES))
+            if sum(values) >= 5.8]
+    grid.append({'chest': 1.0, 'back': 0.8, 'shoulder': 1.0, 'arm': 1.0, 'leg': 1.0,
+                 'core': 1.0})
+    grid.append(dict(dict.fromkeys(CATEGORIES, 1.0), leg=5.0))
+    nudged = []
+    for index, preferences in enumerate(grid):
+        for step, category in enumerate(CATEGORIES[index % 3::3]):
+            nudged.append(dict(preferences, **{category: preferences[category] +
+                                               (0.0013 if step else -0.0021)}))
+    return grid + nudged
+
+
+@pytest.mark.parametrize('selector_class, training_days', [
+    (GreedySelector, 3), (GreedySelector, 5), (HybridSelector, 3)])
+def test_region_cache_matches_fresh_plans(compiled_catalog, tmp_path, selector_class,
+                                          training_days):
+    """按区域命中的计划与直接生成的计划完全相同"""
+    selector = selector_class(lazy_text=True, compiled_catalog=compiled_catalog)
+    selector.TRAINING_DAYS = training_days
+    cache = PlanCache(str(tmp_path / 'plans.sqlite'))
+    grid = _preference_grid()
+    for preferences in grid:
+        selector.MUSCLE_PREFERENCES = dict(preferences)
+        assert cache.get_or_generate_by_region(selector) == selector.generate_weekly_plan(), \
+            preferences
+    regions = cache.get('region-v2:' + cache.make_key(selector, include_preferences=False))
+    assert len(regions) < len(grid)  # 确实有系数命中了已有区域
+
+
+@pytest.mark.parametrize('selector_class, training_days, category', [
+    (GreedySelector, 5, 'leg'), (HybridSelector, 3, 'arm')])
+def test_segment_plans_match_selector(compiled_catalog, selector_class, training_days,
+                                      category):
+    """每段的计划与选择器在该段中点生成的计划相同，相邻两段的计划不同"""
+    selector = selector_class(lazy_text=True, compiled_catalog=compiled_catalog)
+    selector.TRAINING_DAYS = training_days
+    segments = PreferenceSensitivity(selector).segments(category)
+    assert segments[0].low == 0.0 and segments[-1].high == 3.0
+    for before, after in zip(segments, segments[1:]):
+        assert before.high == after.low
+        assert before.picks != after.picks
+    for segment in segments:
+        selector.MUSCLE_PREFERENCES = {category: (segment.low + segment.high) / 2}
+        plan = selector.generate_weekly_plan()
+        assert tuple(tuple(exercise['pk'] for exercise in day['exercises'])
+                     for day in plan.values()) == segment.picks
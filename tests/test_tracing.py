@@ -0,0 +1,36 @@
+import asyncio
+
+from algorithms.hybrid_selector import HybridSelector
+from algorithms.plan_stats import PlanStats
+from algorithms.tracing import Tracer
+
+from conftest import ROOT
+
+
+def test_two_opt_swaps_are_not_materialization(compiled_catalog):
+    """2-opt 的交换计入搜索阶段，每天只在最终结果上记一次物化区间"""
+    selector = HybridSelector(ROOT, lazy_text=True, compiled_catalog=compiled_catalog)
+    selector.tracer = Tracer()
+    stats = PlanStats()
+    selector.generate_weekly_plan(stats=stats)
+
+    assert 'greedy+2opt' in stats.search_branches.values()
+    names = [event['name'] for event in selector.tracer.events]
+    assert names.count('two_opt_iteration') > 0
+    # 穷举分支在 to_dict 外还会构建一次结果，因此每天最多两个物化区间
+    assert names.count('materialization') <= 2 * selector.TRAINING_DAYS
+
+
+def test_async_plan_records_stats(selector):
+    """异步生成与同步生成写入同样的计数，计划也相同"""
+    async def collect(stats):
+        return {day_name: day_plan
+                async for day_name, day_plan, _ in selector.agenerate_weekly_plan(stats)}
+
+    stats = PlanStats()
+    plan = asyncio.run(collect(stats))
+    expected_stats = PlanStats()
+    assert plan == selector.generate_weekly_plan(expected_stats)
+    assert stats.search_branches == expected_stats.search_branches
+    assert stats.dynamic_score_evaluations == expected_stats.dynamic_score_evaluations
+    assert stats.total_time > 0
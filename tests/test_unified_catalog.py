@@ -0,0 +1,31 @@
+import pytest
+
+from algorithms.catalog import load_exercises
+from algorithms.greedy_selector import GreedySelector
+from algorithms.unified_catalog import UnifiedCatalog
+
+from conftest import ROOT
+
+
+@pytest.fixture(scope='module')
+def unified_catalog():
+    return UnifiedCatalog.load(ROOT)
+
+
+def test_selectors_share_columnar_records(unified_catalog):
+    """同一统一索引上的选择器共享动作记录，不再各自复制动作字典"""
+    first = GreedySelector(ROOT, unified_catalog=unified_catalog)
+    second = GreedySelector(ROOT, unified_catalog=unified_catalog)
+    assert first.records is second.records
+
+
+@pytest.mark.parametrize('modality, filename', [('strength', 'strength.json'),
+                                                ('flexibility', 'flexibility.json')])
+def test_exercise_rows_match_load_exercises(unified_catalog, modality, filename):
+    """行视图生成的动作字典与 load_exercises(lazy_text=True) 相同"""
+    exercises, _ = load_exercises(f'{ROOT}/{filename}', lazy_text=True)
+    rows = unified_catalog.exercises(modality)
+    assert len(rows) == len(exercises)
+    assert list(rows) == exercises
+    with pytest.raises(IndexError):
+        rows[len(rows)]